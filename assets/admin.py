@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Asset, UserProfile, AuditLog, SupportTicket
+from .models import Asset, AssetStatusCount, UserProfile, AuditLog, SupportTicket, ProfilerSwitch, ScanEvent
+from .search import fts_available, matching_asset_ids
 
 
 @admin.register(Asset)
@@ -9,6 +10,21 @@ class AssetAdmin(admin.ModelAdmin):
     search_fields = ['manufacturer', 'model', 'serial_number', 'asset_tag', 'product_name']
     list_editable = ['status']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS index rather than a LIKE '%term%' scan of every column
+        if not search_term or not fts_available():
+            return super().get_search_results(request, queryset, search_term)
+        matches = matching_asset_ids(search_term)
+        if matches is None:
+            return queryset.none(), False
+        return queryset.filter(id__in=matches), False
+
+
+@admin.register(AssetStatusCount)
+class AssetStatusCountAdmin(admin.ModelAdmin):
+    list_display = ['asset_type', 'status', 'count']
+    readonly_fields = ['asset_type', 'status', 'count']
+
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -27,4 +43,22 @@ class AuditLogAdmin(admin.ModelAdmin):
 class SupportTicketAdmin(admin.ModelAdmin):
     list_display = ['id', 'asset', 'title', 'status', 'created_by', 'created_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['title', 'description']
\ No newline at end of file
+    search_fields = ['title', 'description']
+
+
+@admin.register(ScanEvent)
+class ScanEventAdmin(admin.ModelAdmin):
+    list_display = ['scan_id', 'asset_tag', 'asset', 'action', 'location', 'scanned_at']
+    list_filter = ['action', 'scanned_at']
+    search_fields = ['scan_id', 'asset_tag']
+    readonly_fields = ['scan_id', 'asset', 'asset_tag', 'action', 'location', 'scanned_at', 'received_at']
+
+
+@admin.register(ProfilerSwitch)
+class ProfilerSwitchAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'path_pattern', 'sample_rate', 'header', 'interval_ms', 'expires_at', 'updated_at']
+    readonly_fields = ['updated_at']
+
+    def has_add_permission(self, request):
+        # A single row holds the switch
+        return not ProfilerSwitch.objects.exists()
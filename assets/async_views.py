@@ -0,0 +1,156 @@
+"""
+ASGI-native versions of the busiest read/write endpoints.
+
+Served under ``/api/async/`` next to their synchronous counterparts in
+``views.py`` and returning identical payloads. Under an ASGI server these
+never hold a worker thread while waiting: queries go through the async ORM
+and streamed listings are produced by async iterators, so a slow client
+downloading a large stream costs a coroutine rather than a thread.
+Django's async ORM still executes each query in a worker thread, so a
+single query is no faster; the gain is in how many requests can wait at
+once. Writes go through ``run_write`` like the sync views, so they get the
+same lock retries and optional write queue.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from . import search
+from .db import run_write
+from .metrics import JsonResponse
+from .models import Asset
+from .pagination import InvalidCursor, akeyset_page, parse_page_size
+from .replica import read_from_replica
+from .response_cache import cached_response
+from .revisions import RevisionConflict, parse_revision, update_asset
+from .serializers import asset_list_values, serialize_asset_row, serialize_columnar
+from .stats import aasset_stats
+from .streaming import aiter_asset_dicts, ajson_array_stream, andjson_stream
+from .versions import async_condition
+from .views import asset_update_values, filter_assets, is_stream_request
+
+
+ASYNC_STREAM_FORMATS = {
+    'ndjson': (andjson_stream, 'application/x-ndjson'),
+    'stream': (ajson_array_stream, 'application/json'),
+}
+
+
+@csrf_exempt
+@read_from_replica
+@async_condition('assets', 'users')
+@cached_response('assets', 'users', unless=is_stream_request)
+async def api_assets_list(request):
+    """Get one page of assets or create new asset"""
+    if request.method == 'GET':
+        if is_stream_request(request):
+            try:
+                queryset = filter_assets(Asset.objects.all(), request.GET)
+                assets = aiter_asset_dicts(queryset, request.GET.get('cursor'))
+            except (InvalidCursor, ValueError) as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+            encode, content_type = ASYNC_STREAM_FORMATS[request.GET['format']]
+            return StreamingHttpResponse(encode(assets), content_type=content_type)
+
+        try:
+            limit = parse_page_size(request.GET.get('limit'))
+            queryset = filter_assets(Asset.objects.all(), request.GET)
+            rows, next_cursor = await akeyset_page(asset_list_values(queryset), request.GET.get('cursor'), limit)
+        except (InvalidCursor, ValueError) as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        if request.GET.get('format') == 'columnar':
+            return JsonResponse({**serialize_columnar(rows), 'nextCursor': next_cursor})
+        return JsonResponse({'assets': [serialize_asset_row(row) for row in rows], 'nextCursor': next_cursor})
+
+    elif request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            asset_data = {
+                'asset_type': data.get('type'),
+                'status': 'in_service' if data.get('status') == 'In Service' else 'out_repair',
+            }
+            if data.get('assigneeId'):
+                user = await User.objects.filter(id=data['assigneeId']).afirst()
+                if user is not None:
+                    asset_data['assigned_to'] = user
+
+            if data.get('type') == 'physical':
+                asset_data.update({
+                    'manufacturer': data.get('manufacturer', ''),
+                    'model': data.get('model', ''),
+                    'serial_number': data.get('serialNumber'),
+                    'asset_tag': data.get('assetTag', ''),
+                    'location': data.get('location', ''),
+                })
+            else:
+                asset_data.update({
+                    'product_name': data.get('productName', ''),
+                    'license_key': data.get('licenseKey', ''),
+                    'version': data.get('version', ''),
+                    'renewal_date': data.get('renewalDate') or None,
+                })
+
+            asset = await sync_to_async(run_write)(Asset.objects.create, **asset_data)
+            return JsonResponse({'success': True, 'asset_id': asset.id})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+
+    return JsonResponse({'success': False})
+
+
+@csrf_exempt
+async def api_asset_detail(request, asset_id):
+    """Update or delete specific asset"""
+    try:
+        if request.method == 'PUT':
+            data = json.loads(request.body)
+            try:
+                revision = parse_revision(data.get('revision'))
+            except ValueError as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+            new_revision = await sync_to_async(run_write)(
+                update_asset, asset_id, asset_update_values(data), revision)
+            return JsonResponse({'success': True, 'revision': new_revision})
+
+        elif request.method == 'DELETE':
+            asset = await Asset.objects.aget(id=asset_id)
+            await sync_to_async(run_write)(asset.delete)
+            return JsonResponse({'success': True})
+
+    except RevisionConflict as e:
+        return JsonResponse({'success': False, 'error': str(e), 'revision': e.current}, status=409)
+    except Asset.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Asset not found'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+    return JsonResponse({'success': False})
+
+
+@read_from_replica
+async def api_assets_stats(request):
+    """Dashboard totals from the maintained counter table"""
+    return JsonResponse(await aasset_stats())
+
+
+@read_from_replica
+async def api_search(request):
+    """Ranked full-text search over assets, repair notes and support tickets"""
+    query = request.GET.get('q', '')
+    kind = request.GET.get('kind') or None
+    if kind and kind not in search.KINDS:
+        return JsonResponse({'success': False, 'error': 'kind must be asset or ticket'}, status=400)
+
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=20, maximum=100)
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    # FTS5 MATCH runs through a raw cursor, which has no async API
+    hits, has_more = await sync_to_async(search.search)(query, kind=kind, limit=limit, offset=(page - 1) * limit)
+    return JsonResponse({'results': hits, 'page': page, 'hasMore': has_more})
@@ -0,0 +1,296 @@
+"""
+Buffered audit-log writer.
+
+Asset changes are recorded into an in-memory buffer once their transaction
+commits, and written to ``AuditLog`` with ``bulk_create`` by a background
+thread when the buffer reaches ``AUDIT_LOG_BATCH_SIZE`` entries or
+``AUDIT_LOG_FLUSH_INTERVAL`` seconds have passed. Requests therefore never
+wait on an audit insert, and SQLite sees one write transaction per batch
+instead of one per change. Whatever is still buffered is flushed at
+interpreter shutdown.
+
+A batch the database rejects is split until the offending entries are
+isolated, so one bad entry cannot hold back the others. Entries that keep
+failing are retried on later flushes and dropped, with a log message, after
+``AUDIT_LOG_MAX_ATTEMPTS`` attempts.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# Asset fields whose changes are recorded. Bookkeeping columns are skipped.
+AUDITED_FIELDS = (
+    'asset_type', 'status', 'assigned_to_id', 'manufacturer', 'model', 'serial_number',
+    'asset_tag', 'location', 'product_name', 'license_key', 'version', 'renewal_date',
+    'repair_notes',
+)
+
+_current_user_id = contextvars.ContextVar('audit_user_id', default=None)
+
+
+@contextmanager
+def audit_actor(user):
+    """Attribute audit entries recorded inside the block to ``user``"""
+    token = _current_user_id.set(user.pk if user is not None and user.is_authenticated else None)
+    try:
+        yield
+    finally:
+        _current_user_id.reset(token)
+
+
+def current_user_id():
+    return _current_user_id.get()
+
+
+def field_changes(old_values, instance):
+    """Return ``{field: [old, new]}`` for audited fields that differ"""
+    changes = {}
+    for field in AUDITED_FIELDS:
+        if field not in old_values:
+            continue
+        new = getattr(instance, field)
+        if old_values[field] != new:
+            changes[field] = [old_values[field], new]
+    return changes
+
+
+def initial_values(instance):
+    """Return ``{field: [None, value]}`` for every non-empty audited field"""
+    changes = {}
+    for field in AUDITED_FIELDS:
+        value = getattr(instance, field)
+        if value not in (None, ''):
+            changes[field] = [None, value]
+    return changes
+
+
+class AuditWriter:
+    """Thread-safe buffer of pending AuditLog rows with a background flusher"""
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_pending=50_000, max_attempts=5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._stats = {
+            'recorded': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'dropped': 0,
+            'last_flush_seconds': 0.0,
+            'max_flush_seconds': 0.0,
+            'total_flush_seconds': 0.0,
+        }
+
+    def record(self, asset_id, action, changes=None, user_id=None, timestamp=None):
+        """Buffer one audit entry; never touches the database itself"""
+        self.record_many(action, {asset_id: changes}, user_id=user_id, timestamp=timestamp)
+
+    def record_many(self, action, changes_by_asset, user_id=None, timestamp=None):
+        """Buffer one entry per asset in ``{asset_id: changes}`` under a single lock"""
+        timestamp = timestamp or timezone.now()
+        # (asset_id, user_id, action, timestamp, details, failed attempts)
+        entries = [
+            (asset_id, user_id, action, timestamp,
+             json.dumps({'asset_id': asset_id, 'changes': changes or {}}, cls=DjangoJSONEncoder), 0)
+            for asset_id, changes in changes_by_asset.items()
+        ]
+        if not entries:
+            return
+        with self._condition:
+            self._pending.extend(entries)
+            self._stats['recorded'] += len(entries)
+            depth = len(self._pending)
+            if depth >= self.batch_size:
+                self._condition.notify()
+
+        if self._use_background_thread():
+            if depth >= self.max_pending:
+                # The flusher has fallen far behind; apply back-pressure
+                self.flush()
+        elif depth >= self.batch_size:
+            self.flush()
+
+    def _use_background_thread(self):
+        if not getattr(settings, 'AUDIT_LOG_BACKGROUND', True):
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            with self._condition:
+                if self._stopping:
+                    return False
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                    self._thread.start()
+        return True
+
+    def _run(self):
+        from django.db import connection
+
+        try:
+            while True:
+                with self._condition:
+                    if not self._stopping and len(self._pending) < self.batch_size:
+                        self._condition.wait(self.flush_interval)
+                    stopping = self._stopping
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('Audit log writer flush failed')
+                if stopping:
+                    return
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows written."""
+        from django.contrib.auth.models import User
+        from .models import Asset
+
+        with self._flush_lock:
+            with self._condition:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                # Assets and users deleted since the entry was recorded can
+                # no longer be referenced; keep the entry without them (the
+                # asset id stays in its details).
+                assets = set(Asset.objects.filter(
+                    id__in={entry[0] for entry in batch if entry[0] is not None}).values_list('id', flat=True))
+                users = set(User.objects.filter(
+                    id__in={entry[1] for entry in batch if entry[1] is not None}).values_list('id', flat=True))
+            except DatabaseError:
+                logger.exception('Failed to write %d audit log entries; will retry', len(batch))
+                self._retry_later(batch)
+                with self._condition:
+                    self._stats['failed_flushes'] += 1
+                return 0
+            failed = self._write(batch, assets, users)
+
+            if failed:
+                self._retry_later(failed)
+            written = len(batch) - len(failed)
+            elapsed = time.perf_counter() - started
+            with self._condition:
+                stats = self._stats
+                stats['written'] += written
+                stats['flushes'] += 1
+                stats['failed_flushes'] += bool(failed)
+                stats['last_flush_seconds'] = elapsed
+                stats['max_flush_seconds'] = max(stats['max_flush_seconds'], elapsed)
+                stats['total_flush_seconds'] += elapsed
+            return written
+
+    def _write(self, entries, assets, users):
+        """
+        Insert ``entries``, halving the batch whenever the database rejects
+        it. Returns the entries that could not be written on their own.
+        """
+        from .models import AuditLog
+
+        logs = [
+            AuditLog(
+                asset_id=asset_id if asset_id in assets else None,
+                user_id=user_id if user_id in users else None,
+                action=action,
+                timestamp=timestamp,
+                details=details,
+            )
+            for asset_id, user_id, action, timestamp, details, attempts in entries
+        ]
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create(logs, batch_size=self.batch_size)
+            return []
+        except IntegrityError:
+            if len(entries) == 1:
+                logger.warning('Audit log entry rejected: %s', entries[0][4], exc_info=True)
+                return list(entries)
+        except DatabaseError:
+            # Not the entries' fault (e.g. the database is locked); retry them all later
+            logger.exception('Failed to write %d audit log entries; will retry', len(entries))
+            return list(entries)
+        middle = len(entries) // 2
+        return self._write(entries[:middle], assets, users) + self._write(entries[middle:], assets, users)
+
+    def _retry_later(self, entries):
+        """Put failed entries back at the front of the queue, dropping those out of attempts"""
+        retry = []
+        dropped = 0
+        for entry in entries:
+            attempts = entry[5] + 1
+            if attempts >= self.max_attempts:
+                logger.error('Dropping audit log entry after %d failed attempts: %s', attempts, entry[4])
+                dropped += 1
+            else:
+                retry.append(entry[:5] + (attempts,))
+        with self._condition:
+            self._pending.extendleft(reversed(retry))
+            self._stats['dropped'] += dropped
+
+    def close(self):
+        """Stop the background thread and flush what is left"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5.0, self.flush_interval * 2))
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Failed to flush audit log at shutdown')
+
+    def metrics(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._pending)
+        flushes = stats['flushes']
+        stats['avg_flush_seconds'] = stats['total_flush_seconds'] / flushes if flushes else 0.0
+        stats['background_thread'] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+
+audit_writer = AuditWriter(
+    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 500),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 1.0),
+    max_attempts=getattr(settings, 'AUDIT_LOG_MAX_ATTEMPTS', 5),
+)
+atexit.register(audit_writer.close)
+
+
+def record_on_commit(asset_id, action, changes):
+    """Buffer an entry once the surrounding transaction commits"""
+    user_id = current_user_id()
+    timestamp = timezone.now()
+    transaction.on_commit(
+        lambda: audit_writer.record(asset_id, action, changes, user_id=user_id, timestamp=timestamp))
+
+
+def record_many_on_commit(action, changes_by_asset):
+    """Buffer one entry per asset in ``{asset_id: changes}`` once the surrounding transaction commits"""
+    user_id = current_user_id()
+    timestamp = timezone.now()
+    transaction.on_commit(
+        lambda: audit_writer.record_many(action, changes_by_asset, user_id=user_id, timestamp=timestamp))
@@ -0,0 +1,120 @@
+"""
+Set-based bulk updates of asset status, assignee and repair notes.
+
+``bulk_update_assets`` applies one change to many assets in a single
+transaction: one SELECT per chunk of ids reads the current values, and one
+``UPDATE ... WHERE id IN (...)`` per chunk writes the assets that actually
+change. ``QuerySet.update()`` skips ``save()``, so ``updated_at`` and
+``revision`` are set explicitly, and the audit entries are recorded here,
+in one batch, instead of by the post_save receiver. The SQLite triggers on
+the asset table still maintain the status counts, the search index, the
+collection generations and the sync sequence row by row.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .audit import record_many_on_commit
+from .models import Asset
+
+
+# SQLite allows 999 bound parameters per statement in Django's default build
+CHUNK_SIZE = 500
+
+STATUS_LABELS = {label.lower(): value for value, label in Asset.STATUS_CHOICES}
+STATUS_VALUES = {value for value, label in Asset.STATUS_CHOICES}
+
+
+def parse_changes(data):
+    """
+    Validate the API's ``{"status", "assigneeId", "repairNotes"}`` change
+    and return model field values. Raises ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('changes must be an object')
+    unknown = set(data) - {'status', 'assigneeId', 'repairNotes'}
+    if unknown:
+        raise ValueError(f"Unknown fields in changes: {', '.join(sorted(unknown))}")
+
+    values = {}
+    if 'status' in data:
+        status = str(data['status'])
+        status = STATUS_LABELS.get(status.lower(), status)
+        if status not in STATUS_VALUES:
+            raise ValueError(f"Unknown status: {data['status']!r}")
+        values['status'] = status
+    if 'assigneeId' in data:
+        assignee = data['assigneeId']
+        if assignee is not None:
+            try:
+                assignee = int(assignee)
+            except (TypeError, ValueError):
+                raise ValueError(f'assigneeId must be a user id or null, not {assignee!r}')
+            if not User.objects.filter(id=assignee).exists():
+                raise ValueError(f'User {assignee} does not exist')
+        values['assigned_to_id'] = assignee
+    if 'repairNotes' in data:
+        values['repair_notes'] = str(data['repairNotes'] or '')
+    if not values:
+        raise ValueError('changes must set status, assigneeId or repairNotes')
+    return values
+
+
+def parse_ids(ids):
+    """De-duplicated asset ids in request order. Raises ValueError."""
+    if not isinstance(ids, list):
+        raise ValueError('ids must be a list')
+    try:
+        return list(dict.fromkeys(int(asset_id) for asset_id in ids))
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+
+
+def _chunks(values):
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def bulk_update_assets(values, ids=None, queryset=None):
+    """
+    Apply ``values`` to the assets in ``ids`` or matched by ``queryset``.
+
+    Returns ``[(asset_id, result)]`` in request order (id order for a
+    queryset), where result is ``updated``, ``unchanged`` or ``not_found``.
+    Raises ValueError when more than ``BULK_UPDATE_MAX_ASSETS`` are selected.
+    """
+    limit = getattr(settings, 'BULK_UPDATE_MAX_ASSETS', 5000)
+    fields = list(values)
+    rows = None
+    with transaction.atomic():
+        if ids is None:
+            rows = list(queryset.order_by('id').values('id', *fields)[:limit + 1])
+            ids = [row['id'] for row in rows]
+        if len(ids) > limit:
+            raise ValueError(f'At most {limit} assets can be updated at once')
+        if rows is None:
+            rows = [row for chunk in _chunks(ids) for row in Asset.objects.filter(id__in=chunk).values('id', *fields)]
+
+        current = {}
+        for row in rows:
+            current[row.pop('id')] = row
+
+        changes_by_asset = {}
+        for asset_id, old in current.items():
+            changes = {field: [old[field], new] for field, new in values.items() if old[field] != new}
+            if changes:
+                changes_by_asset[asset_id] = changes
+
+        changed = list(changes_by_asset)
+        updated_at = timezone.now()
+        for chunk in _chunks(changed):
+            Asset.objects.filter(id__in=chunk).update(**values, updated_at=updated_at, revision=F('revision') + 1)
+        record_many_on_commit('updated', changes_by_asset)
+
+    return [
+        (asset_id, 'not_found' if asset_id not in current
+         else 'updated' if asset_id in changes_by_asset else 'unchanged')
+        for asset_id in ids
+    ]
@@ -0,0 +1,126 @@
+"""
+SQLite tuning for concurrent use.
+
+``configure_sqlite`` runs on every new connection (connected to
+``connection_created`` in ``AssetsConfig.ready()``) and applies the
+``SQLITE_PRAGMAS`` setting: WAL so readers never block the writer,
+synchronous=NORMAL (durable across crashes of the process, one fsync per
+checkpoint instead of per commit), a memory-mapped file and a larger page
+cache.
+
+Write paths call ``run_write``, which retries "database is locked" errors
+with jittered backoff once the busy timeout has expired, and optionally
+hands the write to a single in-process writer thread
+(``SQLITE_WRITE_QUEUE``) so request threads never contend for the write
+lock at all.
+"""
+import contextvars
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+
+logger = logging.getLogger(__name__)
+
+REPLICA_SKIPPED_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.alias == getattr(settings, 'REPLICA_DATABASE_ALIAS', None):
+        # The replica file is replaced wholesale by each sync: never write
+        # to it, not even to switch it to WAL
+        pragmas = {name: value for name, value in pragmas.items() if name not in REPLICA_SKIPPED_PRAGMAS}
+        pragmas['query_only'] = 1
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked_error(error):
+    return isinstance(error, OperationalError) and 'locked' in str(error).lower()
+
+
+def retry_on_locked(fn, *args, attempts=None, base_delay=0.05, **kwargs):
+    """
+    Call ``fn``, retrying if SQLite reports the database as locked.
+
+    Only retries outside an atomic block: inside one, the enclosing
+    transaction is already broken and must be retried as a whole.
+    """
+    if attempts is None:
+        attempts = getattr(settings, 'SQLITE_WRITE_RETRIES', 5)
+    for attempt in range(attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except OperationalError as e:
+            if not is_locked_error(e) or attempt == attempts or connection.in_atomic_block:
+                raise
+            delay = base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning('Database locked, retrying write in %.0f ms (attempt %d)', delay * 1000, attempt + 1)
+            time.sleep(delay)
+
+
+class WriteQueue:
+    """
+    Single writer thread that runs write callables one at a time.
+
+    Callers block until their write has run and get its result or
+    exception back, so the request sees exactly what a direct call would.
+    The caller's context (e.g. the audit actor) is carried over.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            context, fn, args, kwargs, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(retry_on_locked, fn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs):
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((contextvars.copy_context(), fn, args, kwargs, future))
+        return future
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+write_queue = WriteQueue()
+
+
+def run_write(fn, *args, **kwargs):
+    """
+    Run a database write the configured way and return its result.
+
+    Writes inside an atomic block always run inline, on the connection
+    that owns the transaction.
+    """
+    if getattr(settings, 'SQLITE_WRITE_QUEUE', False) and not connection.in_atomic_block:
+        return write_queue.submit(fn, *args, **kwargs).result()
+    return retry_on_locked(fn, *args, **kwargs)
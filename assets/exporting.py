@@ -0,0 +1,126 @@
+"""
+Streaming export of assets, audit logs and support tickets.
+
+Tables are read in primary-key order one keyset chunk at a time, so each
+query is short, memory stays constant and a long export never holds a
+read transaction open for its whole run. Output is produced as a stream of
+byte blocks that can go to a file or straight into an HTTP response.
+"""
+import csv
+import io
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Asset, AuditLog, SupportTicket
+
+
+EXPORT_CHUNK_SIZE = 5000
+
+FORMATS = ('csv', 'ndjson')
+
+# Table name -> (model, exported columns). Foreign keys are exported as ids.
+TABLES = {
+    'assets': (Asset, (
+        'id', 'asset_type', 'status', 'assigned_to_id', 'date_in_service', 'created_at',
+        'updated_at', 'manufacturer', 'model', 'serial_number', 'asset_tag', 'location',
+        'product_name', 'license_key', 'version', 'renewal_date', 'repair_notes',
+    )),
+    'audit_logs': (AuditLog, (
+        'id', 'asset_id', 'user_id', 'action', 'timestamp', 'details',
+    )),
+    'tickets': (SupportTicket, (
+        'id', 'asset_id', 'created_by_id', 'title', 'description', 'status',
+        'created_at', 'updated_at', 'resolved_at',
+    )),
+}
+
+_json = DjangoJSONEncoder(separators=(',', ':'))
+
+
+def iter_table_rows(table, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield value tuples for ``table`` in primary-key order"""
+    model, columns = TABLES[table]
+    queryset = model.objects.order_by('pk').values_list(*columns)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+def _csv_blocks(columns, rows, rows_per_block):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(['' if value is None else _csv_value(value) for value in row])
+        pending += 1
+        if pending >= rows_per_block:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_blocks(columns, rows, rows_per_block):
+    block = []
+    for row in rows:
+        block.append(_json.encode(dict(zip(columns, row))))
+        if len(block) >= rows_per_block:
+            yield ('\n'.join(block) + '\n').encode()
+            block = []
+    if block:
+        yield ('\n'.join(block) + '\n').encode()
+
+
+def gzip_stream(blocks, level=6):
+    """Compress a stream of byte blocks into one gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(table, output_format='csv', compress=False, chunk_size=EXPORT_CHUNK_SIZE,
+                  rows_per_block=500):
+    """Return an iterator of byte blocks holding ``table`` in ``output_format``"""
+    if table not in TABLES:
+        raise ValueError(f'table must be one of {sorted(TABLES)}')
+    if output_format not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}')
+
+    columns = TABLES[table][1]
+    rows = iter_table_rows(table, chunk_size)
+    encode = _csv_blocks if output_format == 'csv' else _ndjson_blocks
+    blocks = encode(columns, rows, rows_per_block)
+    return gzip_stream(blocks) if compress else blocks
+
+
+def export_filename(table, output_format='csv', compress=False):
+    return f'{table}.{output_format}' + ('.gz' if compress else '')
+
+
+def export_to_file(table, path, output_format='csv', compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write one table to ``path`` and return the number of bytes written"""
+    written = 0
+    with open(path, 'wb') as output:
+        for block in export_stream(table, output_format, compress, chunk_size):
+            output.write(block)
+            written += len(block)
+    return written
@@ -0,0 +1,266 @@
+"""
+Bulk asset import from CSV or JSON Lines.
+
+The input is read as a stream and cut into chunks. Chunks are parsed and
+validated in a process pool while the parent process checks serial-number
+and assignee collisions for a whole chunk at a time and writes it with
+``bulk_create`` inside its own transaction. Rows that fail are reported
+with their line number instead of aborting the import.
+"""
+import csv
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import django
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .models import Asset
+from .signals import assets_bulk_created
+
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_BATCH_SIZE = 500
+
+FORMATS = ('csv', 'jsonl')
+
+IMPORT_FIELDS = (
+    'asset_type', 'status', 'assigned_to_id', 'manufacturer', 'model',
+    'serial_number', 'asset_tag', 'location', 'product_name', 'license_key',
+    'version', 'renewal_date', 'repair_notes',
+)
+
+# API-style column names accepted alongside the model field names
+FIELD_ALIASES = {
+    'type': 'asset_type',
+    'assigneeId': 'assigned_to_id',
+    'assigned_to': 'assigned_to_id',
+    'serialNumber': 'serial_number',
+    'assetTag': 'asset_tag',
+    'productName': 'product_name',
+    'licenseKey': 'license_key',
+    'renewalDate': 'renewal_date',
+    'repairNotes': 'repair_notes',
+}
+
+STATUS_LABELS = {label.lower(): value for value, label in Asset.STATUS_CHOICES}
+STATUS_VALUES = {value for value, label in Asset.STATUS_CHOICES}
+ASSET_TYPES = {value for value, label in Asset.ASSET_TYPE_CHOICES}
+MAX_LENGTHS = {
+    field.name: field.max_length
+    for field in Asset._meta.get_fields()
+    if getattr(field, 'max_length', None)
+}
+
+
+def detect_format(filename, default='csv'):
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return default
+
+
+def clean_record(record):
+    """
+    Validate one input record and return model field values.
+
+    Raises ValueError with a message suitable for the error report.
+    """
+    values = {}
+    for key, value in record.items():
+        field = FIELD_ALIASES.get(key, key)
+        if field in IMPORT_FIELDS:
+            values[field] = value.strip() if isinstance(value, str) else value
+
+    asset_type = values.get('asset_type')
+    if not isinstance(asset_type, str) or asset_type not in ASSET_TYPES:
+        raise ValueError(f'asset_type must be one of {sorted(ASSET_TYPES)}')
+
+    status = str(values.get('status') or 'in_service')
+    status = STATUS_LABELS.get(status.lower(), status)
+    if status not in STATUS_VALUES:
+        raise ValueError(f'unknown status {status!r}')
+    values['status'] = status
+
+    for field, max_length in MAX_LENGTHS.items():
+        value = values.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            value = values[field] = str(value)
+        if len(value) > max_length:
+            raise ValueError(f'{field} is longer than {max_length} characters')
+
+    values['serial_number'] = values.get('serial_number') or None
+
+    assignee = values.get('assigned_to_id')
+    if assignee in (None, ''):
+        values['assigned_to_id'] = None
+    else:
+        try:
+            values['assigned_to_id'] = int(assignee)
+        except (TypeError, ValueError):
+            raise ValueError(f'assigned_to_id must be an integer, got {assignee!r}')
+
+    renewal_date = values.get('renewal_date')
+    if renewal_date:
+        try:
+            values['renewal_date'] = date.fromisoformat(renewal_date)
+        except (TypeError, ValueError):
+            raise ValueError(f'renewal_date must be YYYY-MM-DD, got {renewal_date!r}')
+    else:
+        values['renewal_date'] = None
+
+    for field in IMPORT_FIELDS:
+        values.setdefault(field, '')
+    return values
+
+
+def parse_chunk(input_format, header, raw_rows):
+    """
+    Parse and validate one chunk. Runs inside a worker process.
+
+    ``raw_rows`` are ``(line, raw)`` pairs where raw is a CSV field list or
+    a JSONL text line. Returns ``(rows, errors)`` where rows are
+    ``(line, values)`` pairs and errors are ``(line, message)`` pairs.
+    """
+    rows = []
+    errors = []
+    for line, raw in raw_rows:
+        try:
+            if input_format == 'jsonl':
+                record = json.loads(raw)
+                if not isinstance(record, dict):
+                    raise ValueError('expected a JSON object')
+            else:
+                if len(raw) != len(header):
+                    raise ValueError(f'expected {len(header)} columns, got {len(raw)}')
+                record = dict(zip(header, raw))
+            rows.append((line, clean_record(record)))
+        except ValueError as e:
+            errors.append((line, str(e)))
+    return rows, errors
+
+
+def _read_chunks(stream, input_format, chunk_size):
+    """Yield ``(input_format, header, raw_rows)`` without reading the whole file"""
+    if input_format == 'jsonl':
+        header = None
+        rows = ((line, text) for line, text in enumerate(stream, start=1) if text.strip())
+    else:
+        reader = csv.reader(stream)
+        header = [column.strip() for column in next(reader, [])]
+        rows = ((reader.line_num, fields) for fields in reader if any(fields))
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield input_format, header, chunk
+            chunk = []
+    if chunk:
+        yield input_format, header, chunk
+
+
+def _parsed_chunks(chunks, workers):
+    """Parse chunks in a process pool, keeping only a few in flight"""
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_chunk(*chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, *chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _drop_collisions(rows, errors):
+    """Remove rows whose serial number or assignee would fail in the database"""
+    serials = {values['serial_number'] for _, values in rows if values['serial_number']}
+    taken = set(Asset.objects.filter(serial_number__in=serials).values_list('serial_number', flat=True))
+    assignees = {values['assigned_to_id'] for _, values in rows if values['assigned_to_id']}
+    known_users = set(User.objects.filter(id__in=assignees).values_list('id', flat=True))
+
+    kept = []
+    seen = set()
+    for line, values in rows:
+        serial = values['serial_number']
+        if serial and (serial in taken or serial in seen):
+            errors.append((line, f'serial_number {serial!r} already exists'))
+            continue
+        if values['assigned_to_id'] and values['assigned_to_id'] not in known_users:
+            errors.append((line, f"user {values['assigned_to_id']} does not exist"))
+            continue
+        if serial:
+            seen.add(serial)
+        kept.append((line, values))
+    return kept
+
+
+def _write_chunk(rows, errors, batch_size):
+    """Insert one chunk in a single transaction and return the new assets"""
+    assets = [Asset(**values) for _, values in rows]
+    try:
+        with transaction.atomic():
+            Asset.objects.bulk_create(assets, batch_size=batch_size)
+            assets_bulk_created.send(sender=Asset, assets=assets)
+        return assets
+    except IntegrityError:
+        pass
+
+    # Something changed between the collision check and the insert (for
+    # example a concurrent write). Retry row by row so only the offending
+    # rows are rejected. bulk_create, not save(), so post_save does not
+    # record the rows a second time next to assets_bulk_created.
+    created = []
+    with transaction.atomic():
+        for line, values in rows:
+            try:
+                with transaction.atomic():
+                    created.extend(Asset.objects.bulk_create([Asset(**values)]))
+            except IntegrityError as e:
+                errors.append((line, str(e)))
+        if created:
+            assets_bulk_created.send(sender=Asset, assets=created)
+    return created
+
+
+def import_assets(stream, input_format='csv', workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                  batch_size=DEFAULT_BATCH_SIZE, error_writer=None):
+    """
+    Import assets from a text stream.
+
+    ``error_writer``, if given, is a ``csv.writer`` that receives one
+    ``(line, error)`` row per rejected input row as soon as it is known.
+    Returns a dict with ``created``, ``failed`` and the first errors.
+    """
+    if input_format not in FORMATS:
+        raise ValueError(f'format must be one of {FORMATS}')
+
+    created = 0
+    failed = 0
+    first_errors = []
+    chunks = _read_chunks(stream, input_format, chunk_size)
+    for rows, errors in _parsed_chunks(chunks, workers):
+        rows = _drop_collisions(rows, errors)
+        if rows:
+            created += len(_write_chunk(rows, errors, batch_size))
+
+        errors.sort()
+        failed += len(errors)
+        if error_writer is not None:
+            error_writer.writerows(errors)
+        if len(first_errors) < 100:
+            first_errors.extend(errors[:100 - len(first_errors)])
+
+    return {
+        'created': created,
+        'failed': failed,
+        'errors': [{'line': line, 'error': message} for line, message in first_errors],
+    }
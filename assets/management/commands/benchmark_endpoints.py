@@ -0,0 +1,292 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from assets import urls as asset_urls
+from assets.metrics import RequestMetrics
+from assets.models import Asset, AuditLog, SupportTicket
+from assets.response_cache import response_cache
+from assets.sync import encode_token
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+IMPORT_SAMPLE = 'type,manufacturer,model,serialNumber\n' + ''.join(
+    f'physical,Dell,Latitude,BENCH-IMPORT-{i}\n' for i in range(100))
+
+
+def sample_requests():
+    """
+    ``{url name: [(variant, method, kwargs, params, body)]}`` exercising every
+    route in assets/urls.py against the current data. Writes are rolled back.
+    """
+    asset = Asset.objects.order_by('-id').values('id', 'asset_tag', 'manufacturer', 'product_name').first() or {}
+    asset_id = asset.get('id', 1)
+    user_id = (Asset.objects.exclude(assigned_to=None).order_by('-id').values_list('assigned_to_id', flat=True).first()
+               or User.objects.values_list('id', flat=True).first() or 1)
+    term = asset.get('manufacturer') or asset.get('product_name') or 'dell'
+    prefix = (asset.get('asset_tag') or 'AT')[:4]
+    create = {'type': 'physical', 'status': 'In Service', 'manufacturer': 'Dell', 'model': 'Latitude',
+              'serialNumber': 'BENCH-CREATE', 'assetTag': 'BENCH'}
+    update = {'status': 'Out for Repair', 'repairNotes': 'Benchmark'}
+    cart = list(Asset.objects.order_by('-id').values_list('id', flat=True)[:300])
+    tags = list(Asset.objects.exclude(asset_tag='').order_by('-id').values_list('asset_tag', flat=True)[:500])
+    scans = [{'scanId': f'BENCH-{i}', 'assetTag': tag, 'action': 'check_in', 'location': f'Dock {i % 4}'}
+             for i, tag in enumerate(tags or ['AT'])]
+    return {
+        'index': [('', 'GET', {}, {}, None)],
+        'api_login': [('', 'POST', {}, {}, {'username': 'admin', 'password': 'admin'})],
+        'api_assets_list': [
+            ('', 'GET', {}, {}, None),
+            ('limit=500', 'GET', {}, {'limit': 500}, None),
+            ('columnar limit=500', 'GET', {}, {'limit': 500, 'format': 'columnar'}, None),
+            ('status', 'GET', {}, {'status': 'out for repair'}, None),
+            ('assignee', 'GET', {}, {'assigneeId': user_id}, None),
+            ('ndjson', 'GET', {}, {'format': 'ndjson', 'status': 'out for repair'}, None),
+            ('create', 'POST', {}, {}, create),
+        ],
+        'async_api_assets_list': [
+            ('', 'GET', {}, {}, None),
+            ('ndjson', 'GET', {}, {'format': 'ndjson', 'status': 'out for repair'}, None),
+        ],
+        'api_assets_bulk_update': [
+            ('300 ids', 'POST', {}, {}, {'ids': cart, 'changes': update}),
+            ('filter', 'POST', {}, {}, {'filter': {'assigneeId': user_id}, 'changes': {'repairNotes': 'Benchmark'}}),
+        ],
+        'api_assets_changes': [('', 'GET', {}, {'since': _week_old_token()}, None)],
+        'api_assets_import': [('100 rows', 'POST', {}, {'format': 'csv'}, IMPORT_SAMPLE)],
+        'api_assets_stats': [('', 'GET', {}, {}, None)],
+        'async_api_assets_stats': [('', 'GET', {}, {}, None)],
+        'api_typeahead': [('', 'GET', {}, {'q': prefix}, None)],
+        'api_asset_detail': [
+            ('update', 'PUT', {'asset_id': asset_id}, {}, update),
+            ('delete', 'DELETE', {'asset_id': asset_id}, {}, None),
+        ],
+        'async_api_asset_detail': [('update', 'PUT', {'asset_id': asset_id}, {}, update)],
+        'api_audit_metrics': [('', 'GET', {}, {}, None)],
+        'api_cache_metrics': [('', 'GET', {}, {}, None)],
+        'api_export': [('tickets', 'GET', {'table': 'tickets'}, {'format': 'ndjson'}, None)],
+        'api_request_metrics': [('', 'GET', {}, {}, None)],
+        # Admin-only: anonymous requests measure the redirect to the login page
+        'api_profiles': [('', 'GET', {}, {}, None)],
+        'api_profiles_merged': [('', 'GET', {}, {}, None)],
+        'api_profile_download': [('', 'GET', {'name': 'none.folded'}, {}, None)],
+        'api_report_who_has_what': [('', 'GET', {}, {}, None)],
+        'api_report_user_assets': [('', 'GET', {'user_id': user_id}, {}, None)],
+        'api_scans': [('500 scans', 'POST', {}, {}, {'scans': scans})],
+        'api_search': [('', 'GET', {}, {'q': term}, None)],
+        'async_api_search': [('', 'GET', {}, {'q': term}, None)],
+        'api_users_list': [('', 'GET', {}, {}, None)],
+    }
+
+
+def _week_old_token():
+    # Positioned just before the first asset changed in the last week
+    first = (Asset.objects.filter(updated_at__gte=timezone.now() - timedelta(days=7))
+             .order_by('change_seq').values_list('change_seq', flat=True).first())
+    return encode_token(max((first or 1) - 1, 0), 0)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def _aread(iterator):
+    return b''.join([chunk async for chunk in iterator])
+
+
+def _read_body(response):
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        return async_to_sync(_aread)(response.streaming_content)
+    return b''.join(response.streaming_content)
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = ('Measure latency percentiles, query counts, peak memory and response size of every '
+            'route in assets/urls.py against the current database, and compare runs across commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint (default: 30)')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests first (default: 3)')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep the response cache between requests (default: empty it before each)')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Only these URL names')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', metavar='BASELINE',
+                            help='JSON from an earlier run; fail if any endpoint regressed')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Relative p95 latency or memory growth that counts as a regression (default: 0.25)')
+
+    @override_settings(REQUEST_SLOW_MS=None)
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*',) and not h.startswith('.')), 'localhost')
+        client = Client(HTTP_HOST=host)
+        samples = sample_requests()
+        names = [pattern.name for pattern in asset_urls.urlpatterns]
+        if options['only']:
+            unknown = set(options['only']) - set(names)
+            if unknown:
+                raise CommandError(f"Unknown URL names: {', '.join(sorted(unknown))}")
+            names = [name for name in names if name in options['only']]
+
+        results = {}
+        self.stdout.write(f"{'endpoint':42} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                          f"{'queries':>7} {'peak KiB':>9} {'bytes':>10}")
+        for name in names:
+            if name not in samples:
+                self.stdout.write(self.style.WARNING(f'{name:42} skipped: no sample request'))
+                continue
+            for variant, method, kwargs, params, body in samples[name]:
+                label = f'{name}[{variant}]' if variant else name
+                url = reverse(f'{asset_urls.app_name}:{name}', kwargs=kwargs)
+                if params:
+                    url += '?' + urlencode(params)
+                result = self._measure(client, method, url, body, options)
+                results[label] = result
+                self.stdout.write(
+                    f"{label:42} {result['status']:>6} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+                    f"{result['p99_ms']:8.2f} {result['queries']:7d} {result['peak_memory_kib']:9.0f} "
+                    f"{result['response_bytes']:10d}")
+
+        report = {'meta': self._meta(options), 'endpoints': results}
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            self._compare(report, options['compare'], options['threshold'])
+
+    def _request(self, client, method, url, body):
+        """Send one request; returns (status, body bytes). Writes are rolled back."""
+        if isinstance(body, (dict, list)):
+            data, content_type = json.dumps(body), 'application/json'
+        else:
+            data, content_type = body or '', 'text/csv'
+        if method in SAFE_METHODS:
+            response = client.generic(method, url, data, content_type=content_type)
+            return response.status_code, len(_read_body(response))
+        with transaction.atomic():
+            response = client.generic(method, url, data, content_type=content_type)
+            content = _read_body(response)
+            transaction.set_rollback(True)
+        return response.status_code, len(content)
+
+    def _measure(self, client, method, url, body, options):
+        def fresh():
+            if not options['warm_cache']:
+                response_cache.clear()
+                caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+        for _ in range(options['warmup']):
+            fresh()
+            self._request(client, method, url, body)
+
+        latencies = []
+        for _ in range(options['iterations']):
+            fresh()
+            started = time.perf_counter()
+            status, size = self._request(client, method, url, body)
+            latencies.append(time.perf_counter() - started)
+
+        # Tracing slows Python down, so memory and queries get a run of their own
+        fresh()
+        metrics = RequestMetrics()
+        tracemalloc.start()
+        try:
+            with metrics.capture():
+                self._request(client, method, url, body)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'method': method,
+            'url': url,
+            'status': status,
+            'iterations': len(latencies),
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p95_ms': _percentile(latencies, 0.95) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'queries': metrics.queries,
+            'sql_ms': metrics.sql_seconds * 1000,
+            'peak_memory_kib': peak / 1024,
+            'response_bytes': size,
+        }
+
+    def _meta(self, options):
+        return {
+            'commit': git_commit(),
+            'recorded_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+            'warm_cache': options['warm_cache'],
+            'rows': {
+                'assets': Asset.objects.count(),
+                'users': User.objects.count(),
+                'audit_logs': AuditLog.objects.count(),
+                'tickets': SupportTicket.objects.count(),
+            },
+        }
+
+    def _compare(self, report, baseline_path, threshold):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f"Compared with {baseline['meta'].get('commit') or baseline_path}")
+        if baseline['meta'].get('rows') != report['meta']['rows']:
+            self.stdout.write(self.style.WARNING('Row counts differ from the baseline; timings may not be comparable'))
+
+        regressions = []
+        for label, current in report['endpoints'].items():
+            before = baseline['endpoints'].get(label)
+            if before is None:
+                continue
+            problems = []
+            # Sub-millisecond differences are noise, whatever the ratio
+            if (current['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                    and current['p95_ms'] - before['p95_ms'] > 1.0):
+                problems.append(f"p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+            if current['queries'] > before['queries']:
+                problems.append(f"queries {before['queries']} -> {current['queries']}")
+            if (current['peak_memory_kib'] > before['peak_memory_kib'] * (1 + threshold)
+                    and current['peak_memory_kib'] - before['peak_memory_kib'] > 64):
+                problems.append(f"peak memory {before['peak_memory_kib']:.0f} -> "
+                                f"{current['peak_memory_kib']:.0f} KiB")
+            if problems:
+                regressions.append(f"{label}: {'; '.join(problems)}")
+
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
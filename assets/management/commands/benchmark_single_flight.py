@@ -0,0 +1,77 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import resolve
+
+from assets.response_cache import response_cache
+from assets.singleflight import single_flight
+
+
+class Command(BaseCommand):
+    help = ('Fire bursts of identical uncached GETs from many threads and compare the '
+            'database load with and without single-flight coalescing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/assets/?limit=500',
+                            help='Endpoint to request (default: /api/assets/?limit=500)')
+        parser.add_argument('--threads', type=int, default=32,
+                            help='Concurrent identical requests per burst (default: 32)')
+        parser.add_argument('--bursts', type=int, default=5,
+                            help='Bursts per mode; the cache is emptied before each (default: 5)')
+
+    def _burst(self, url, threads):
+        """Run one burst; return (wall seconds, queries that read asset rows)"""
+        factory = RequestFactory()
+        path = urlsplit(url).path
+        match = resolve(path)
+        barrier = threading.Barrier(threads)
+        counts = []
+        counts_lock = threading.Lock()
+
+        def count_asset_queries(execute, sql, params, many, context):
+            if 'assets_asset' in sql:
+                with counts_lock:
+                    counts.append(sql)
+            return execute(sql, params, many, context)
+
+        def worker():
+            try:
+                with connection.execute_wrapper(count_asset_queries):
+                    barrier.wait()
+                    match.func(factory.get(url), *match.args, **match.kwargs)
+            finally:
+                connection.close()
+
+        response_cache.clear()
+        response_cache.backend.clear()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, len(counts)
+
+    def handle(self, *args, **options):
+        url, threads, bursts = options['url'], options['threads'], options['bursts']
+        previous = single_flight.enabled
+        results = {}
+        try:
+            for enabled in (False, True):
+                single_flight.enabled = enabled
+                runs = [self._burst(url, threads) for _ in range(bursts)]
+                results[enabled] = (
+                    sum(seconds for seconds, _ in runs) / bursts,
+                    sum(queries for _, queries in runs) / bursts,
+                )
+        finally:
+            single_flight.enabled = previous
+
+        self.stdout.write(f'{threads} concurrent GET {url}, {bursts} bursts each')
+        for enabled, label in ((False, 'without single-flight'), (True, 'with single-flight')):
+            seconds, queries = results[enabled]
+            self.stdout.write(f'{label:24} {seconds * 1000:8.1f} ms/burst  {queries:6.1f} asset queries/burst')
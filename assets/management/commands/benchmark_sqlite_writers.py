@@ -0,0 +1,141 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from assets.audit import audit_writer
+from assets.db import is_locked_error, run_write, write_queue
+from assets.models import Asset
+
+
+# name -> (OPTIONS, SQLITE_PRAGMAS, retries, write queue, persistent connections)
+PROFILES = {
+    'default': ({}, {}, 0, False, False),
+    'tuned': (None, None, None, False, True),
+    'tuned+queue': (None, None, None, True, True),
+}
+
+
+def _close_connection():
+    # Resolves ``connection`` in the calling thread, unlike a bound method
+    connection.close()
+
+
+def _update_asset(asset_id, note):
+    # Read-modify-write in one transaction, as the detail view's PUT does
+    with transaction.atomic():
+        asset = Asset.objects.get(id=asset_id)
+        asset.repair_notes = note
+        asset.save()
+
+
+class Command(BaseCommand):
+    help = ('Hammer a scratch copy of the schema with concurrent readers and writers and '
+            'compare "database is locked" errors and latency across SQLite profiles')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent clients (default: 16)')
+        parser.add_argument('--ops', type=int, default=200, help='Operations per client (default: 200)')
+        parser.add_argument('--write-ratio', type=float, default=0.3,
+                            help='Fraction of operations that write (default: 0.3)')
+        parser.add_argument('--assets', type=int, default=5000, help='Assets in the scratch database')
+        parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=list(PROFILES))
+
+    @override_settings(AUDIT_LOG_BACKGROUND=False)
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        original = (settings_dict['NAME'], settings_dict['OPTIONS'], settings_dict['CONN_MAX_AGE'])
+        scratch = tempfile.mkdtemp(prefix='sqlite-bench-')
+        try:
+            template = os.path.join(scratch, 'template.sqlite3')
+            self._switch(template, settings_dict['OPTIONS'])
+            call_command('migrate', verbosity=0)
+            Asset.objects.bulk_create(
+                Asset(asset_type='physical', serial_number=f'BENCH-{i}', asset_tag=f'B{i}')
+                for i in range(options['assets']))
+            connection.close()
+
+            self.stdout.write(f"{options['threads']} clients x {options['ops']} ops, "
+                              f"{options['write_ratio']:.0%} writes")
+            self.stdout.write(f"{'profile':14} {'ops/s':>8} {'write p99 ms':>13} {'locked errors':>14}")
+            for name in options['profiles']:
+                path = os.path.join(scratch, f'{name}.sqlite3')
+                shutil.copy(template, path)
+                self._run_profile(name, path, original[1], options)
+        finally:
+            self._switch(original[0], original[1], original[2])
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _switch(self, name, db_options, conn_max_age=0):
+        # Audit entries belong to the database being left
+        audit_writer.flush()
+        connection.close()
+        write_queue.submit(_close_connection).result()
+        connection.settings_dict.update(NAME=name, OPTIONS=db_options, CONN_MAX_AGE=conn_max_age)
+
+    def _run_profile(self, name, path, tuned_options, options):
+        db_options, pragmas, retries, use_queue, persistent = PROFILES[name]
+        if db_options is None:
+            db_options = tuned_options
+        if pragmas is None:
+            pragmas = settings.SQLITE_PRAGMAS
+        if retries is None:
+            retries = settings.SQLITE_WRITE_RETRIES
+        if not pragmas:
+            # Undo the WAL mode the template was migrated with
+            with sqlite3.connect(path) as raw:
+                raw.execute('PRAGMA journal_mode = DELETE')
+        self._switch(path, db_options, 600 if persistent else 0)
+
+        asset_ids = list(range(1, options['assets'] + 1))
+        write_latencies = []
+        locked = [0]
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+
+        def client(seed):
+            rng = random.Random(seed)
+            barrier.wait()
+            try:
+                for i in range(options['ops']):
+                    try:
+                        if rng.random() < options['write_ratio']:
+                            started = time.perf_counter()
+                            run_write(_update_asset, rng.choice(asset_ids), f'note {seed}/{i}')
+                            with lock:
+                                write_latencies.append(time.perf_counter() - started)
+                        else:
+                            list(Asset.objects.values('id', 'status')[rng.randrange(len(asset_ids)):][:50])
+                    except OperationalError as e:
+                        if not is_locked_error(e):
+                            raise
+                        with lock:
+                            locked[0] += 1
+                    if not persistent:
+                        connection.close()
+            finally:
+                connection.close()
+
+        with override_settings(SQLITE_PRAGMAS=pragmas, SQLITE_WRITE_RETRIES=retries, SQLITE_WRITE_QUEUE=use_queue):
+            threads = [threading.Thread(target=client, args=(seed,)) for seed in range(options['threads'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            write_queue.submit(_close_connection).result()
+
+        total_ops = options['threads'] * options['ops']
+        write_latencies.sort()
+        p99 = write_latencies[max(0, int(len(write_latencies) * 0.99) - 1)] * 1000 if write_latencies else 0.0
+        self.stdout.write(f'{name:14} {total_ops / elapsed:8.0f} {p99:13.1f} {locked[0]:14d}')
@@ -0,0 +1,66 @@
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from assets.typeahead import PrefixIndex
+
+
+class Command(BaseCommand):
+    help = 'Measure build time, memory and lookup latency of the typeahead prefix index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=100_000,
+                            help='Number of synthetic keys to index (default: 100000)')
+        parser.add_argument('--lookups', type=int, default=10_000,
+                            help='Number of random prefix lookups to time (default: 10000)')
+        parser.add_argument('--seed', type=int, default=4081)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        key_count = options['keys']
+
+        # Mix of asset tags, serial numbers and license keys, one per asset
+        rows = []
+        for asset_id in range(1, key_count + 1):
+            kind = asset_id % 3
+            if kind == 0:
+                rows.append((asset_id, f'AST-{asset_id:07d}', None, ''))
+            elif kind == 1:
+                serial = ''.join(rng.choices(string.ascii_uppercase + string.digits, k=12))
+                rows.append((asset_id, '', serial, ''))
+            else:
+                license_key = '-'.join(
+                    ''.join(rng.choices(string.ascii_uppercase + string.digits, k=5)) for _ in range(4))
+                rows.append((asset_id, '', None, license_key))
+
+        index = PrefixIndex()
+        tracemalloc.start()
+        started = time.perf_counter()
+        index.build(rows)
+        build_seconds = time.perf_counter() - started
+        index_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        prefixes = []
+        for _ in range(options['lookups']):
+            _, tag, serial, license_key = rng.choice(rows)
+            key = tag or serial or license_key
+            prefixes.append(key[:rng.randint(2, 6)])
+
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            index.lookup(prefix)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        timings.sort()
+
+        self.stdout.write(f'keys indexed:        {len(index)}')
+        self.stdout.write(f'build time:          {build_seconds * 1000:.1f} ms')
+        self.stdout.write(f'index memory:        {index_bytes / 1024 / 1024:.2f} MiB')
+        self.stdout.write(f'memory per 100k:     {index_bytes / len(index) * 100_000 / 1024 / 1024:.2f} MiB')
+        self.stdout.write(f'lookup p50:          {statistics.median(timings):.1f} us')
+        self.stdout.write(f'lookup p99:          {timings[int(len(timings) * 0.99) - 1]:.1f} us')
@@ -0,0 +1,59 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from assets.exporting import EXPORT_CHUNK_SIZE, FORMATS, TABLES, export_filename, export_to_file
+
+
+def _export_in_thread(table, path, output_format, compress, chunk_size):
+    # Each thread gets its own SQLite connection; close it when done
+    try:
+        return export_to_file(table, path, output_format, compress, chunk_size)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Stream assets, audit logs and support tickets to CSV or NDJSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=sorted(TABLES), default=sorted(TABLES),
+                            help='Tables to export (default: all)')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress each file with gzip')
+        parser.add_argument('--output-dir', default='.', help='Directory to write files into')
+        parser.add_argument('--parallel', type=int, default=1,
+                            help='Number of tables to export concurrently (default: 1)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        os.makedirs(options['output_dir'], exist_ok=True)
+        jobs = [
+            (table, os.path.join(options['output_dir'],
+                                 export_filename(table, options['format'], options['gzip'])))
+            for table in options['tables']
+        ]
+
+        started = time.perf_counter()
+        if options['parallel'] > 1:
+            with ThreadPoolExecutor(max_workers=options['parallel']) as pool:
+                futures = [
+                    pool.submit(_export_in_thread, table, path, options['format'],
+                                options['gzip'], options['chunk_size'])
+                    for table, path in jobs
+                ]
+                sizes = [future.result() for future in futures]
+        else:
+            sizes = [
+                export_to_file(table, path, options['format'], options['gzip'], options['chunk_size'])
+                for table, path in jobs
+            ]
+
+        for (table, path), size in zip(jobs, sizes):
+            self.stdout.write(f'{table}: {size} bytes -> {path}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Exported {len(jobs)} tables in {elapsed:.1f}s'))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.synthetic import ASSIGNMENT_SKEW, DEFAULT_BATCH_SIZE, generate_inventory
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with a large synthetic inventory (users, assets, audit logs and '
+            'support tickets with skewed assignment and status distributions) for benchmarking')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create (default: 1000)')
+        parser.add_argument('--assets', type=int, default=100_000, help='Assets to create (default: 100000)')
+        parser.add_argument('--audit-logs', type=int, default=200_000,
+                            help='Audit log entries to create (default: 200000)')
+        parser.add_argument('--tickets', type=int, default=20_000,
+                            help='Support tickets to create (default: 20000)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data')
+        parser.add_argument('--skew', type=float, default=ASSIGNMENT_SKEW,
+                            help=f'Assignment skew; 1 is uniform (default: {ASSIGNMENT_SKEW})')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per transaction')
+
+    def handle(self, *args, **options):
+        counts = [options[name] for name in ('users', 'assets', 'audit_logs', 'tickets', 'batch_size')]
+        if min(counts) < 0 or options['batch_size'] < 1 or options['skew'] <= 0:
+            raise CommandError('Counts must not be negative; batch size and skew must be positive')
+
+        started = time.perf_counter()
+        created = generate_inventory(
+            users=options['users'], assets=options['assets'], audit_logs=options['audit_logs'],
+            tickets=options['tickets'], seed=options['seed'], batch_size=options['batch_size'],
+            skew=options['skew'])
+        elapsed = time.perf_counter() - started
+        rows = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created['users']} users, {created['assets']} assets, {created['audit_logs']} audit "
+            f"log entries and {created['tickets']} tickets in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)"))
@@ -0,0 +1,64 @@
+import csv
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.importer import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, FORMATS, detect_format, import_assets,
+)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import assets from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: from the file extension, else csv)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Parser processes; 1 parses in this process (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Rows per parse chunk and per transaction')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows per INSERT statement')
+        parser.add_argument('--errors', default=None,
+                            help='Write rejected rows as CSV (line,error) to this path')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or detect_format(path)
+
+        error_file = open(options['errors'], 'w', newline='') if options['errors'] else None
+        error_writer = None
+        if error_file:
+            error_writer = csv.writer(error_file)
+            error_writer.writerow(['line', 'error'])
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        started = time.perf_counter()
+        try:
+            result = import_assets(
+                stream,
+                input_format=input_format,
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                batch_size=options['batch_size'],
+                error_writer=error_writer,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if error_file:
+                error_file.close()
+
+        elapsed = time.perf_counter() - started
+        rate = result['created'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} assets in {elapsed:.1f}s ({rate:.0f} rows/s)"))
+        if result['failed']:
+            where = f" (see {options['errors']})" if options['errors'] else ''
+            self.stdout.write(self.style.WARNING(f"{result['failed']} rows rejected{where}"))
@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Open many keep-alive connections to a running server and compare throughput '
+            'and latency of sync and async endpoints, e.g. against '
+            '`uvicorn inventory_project.asgi:application`')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', default='http://127.0.0.1:8000',
+                            help='Base URL of the running server (default: http://127.0.0.1:8000)')
+        parser.add_argument('--paths', nargs='+', default=['/api/assets/', '/api/async/assets/'],
+                            help='Paths to compare, one run each (default: sync and async asset list)')
+        parser.add_argument('--connections', type=int, default=500,
+                            help='Concurrent connections (default: 500)')
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help='Seconds to run each path (default: 10)')
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Seconds before a single request counts as failed (default: 30)')
+
+    def handle(self, *args, **options):
+        server = urlsplit(options['server'])
+        if server.scheme != 'http' or not server.hostname:
+            raise CommandError('--server must be a plain http:// URL')
+        host, port = server.hostname, server.port or 80
+
+        self.stdout.write(f"{options['connections']} connections, {options['duration']:.0f}s per path")
+        self.stdout.write(f"{'path':32} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for path in options['paths']:
+            latencies, errors, elapsed = asyncio.run(self._run(
+                host, port, path, options['connections'], options['duration'], options['timeout']))
+            latencies.sort()
+            if latencies:
+                p50 = statistics.median(latencies) * 1000
+                p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+            else:
+                p50 = p99 = float('nan')
+            self.stdout.write(
+                f'{path:32} {len(latencies) / elapsed:9.1f} {p50:9.1f} {p99:9.1f} {errors:7d}')
+
+    async def _run(self, host, port, path, connections, duration, timeout):
+        request = (f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+                   f'Connection: keep-alive\r\n\r\n').encode()
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def client():
+            nonlocal errors
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    started = time.perf_counter()
+                    writer.write(request)
+                    status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+                    if status == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+                    if not keep_alive:
+                        writer.close()
+                        writer = None
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(connections)))
+        return latencies, errors, time.perf_counter() - started
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response; return (status, connection stays open)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
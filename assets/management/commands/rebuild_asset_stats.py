@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from assets.stats import asset_stats, rebuild_status_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-status asset counters behind /api/assets/stats/'
+
+    def handle(self, *args, **options):
+        rebuild_status_counts()
+        stats = asset_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt asset counters: {stats['total']} assets "
+            f"({stats['inService']} in service, {stats['outRepair']} out for repair)"))
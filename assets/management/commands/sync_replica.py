@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assets.replica import replica_alias, replica_path, sync_lead, sync_replica
+
+
+class Command(BaseCommand):
+    help = ('Copy the primary database into the read replica with SQLite\'s backup API, '
+            'once or every --interval seconds')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running and re-sync this often, in seconds')
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError('REPLICA_DATABASE_ALIAS does not name a configured database')
+
+        if options['interval'] is not None and replica_path(alias) is None:
+            raise CommandError('No file-backed replica database is configured')
+
+        while True:
+            started = time.perf_counter()
+            if options['interval'] is not None and not sync_lead.acquire(alias):
+                # A server process (or another copy of this command) is syncing
+                self.stdout.write('Another process holds the replica sync lock; waiting')
+                time.sleep(options['interval'])
+                continue
+            try:
+                pages = sync_replica(alias)
+            except ValueError as e:
+                raise CommandError(str(e))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced replica '{alias}': {pages} pages in {elapsed * 1000:.0f} ms"))
+            if options['interval'] is None:
+                return
+            time.sleep(max(0.0, options['interval'] - elapsed))
@@ -0,0 +1,284 @@
+"""
+Per-request SQL and timing instrumentation.
+
+``RequestMetricsMiddleware`` (see middleware.py) gives every request a
+``RequestMetrics`` that an execute wrapper on each database connection
+feeds with query counts and SQL time, and that ``JsonResponse`` below feeds
+with the time spent encoding JSON. The totals go out as a ``Server-Timing``
+header, requests slower than ``REQUEST_SLOW_MS`` are logged with their
+slowest queries, and every request is added to per-endpoint histograms
+served in Prometheus text format by ``GET /api/metrics/``.
+
+The histograms are cumulative since the process started, as Prometheus
+expects; windowed views (p95 over the last 5 minutes, etc.) come from
+``rate()``/``histogram_quantile()`` on the scraped series. Each worker
+process keeps its own, so scrape every worker or sum them.
+"""
+import heapq
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import JsonResponse as BaseJsonResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, as in the Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TOP_QUERIES = 5
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for one request, filled in while it is being handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with ``connection.execute_wrapper``
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_seconds += elapsed
+            entry = (elapsed, self.queries, sql)
+            if len(self._slowest) < TOP_QUERIES:
+                heapq.heappush(self._slowest, entry)
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @contextmanager
+    def capture(self):
+        """Attribute queries and JSON encoding inside the block to this request"""
+        token = _current.set(self)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            _current.reset(token)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def top_queries(self):
+        """The slowest queries as ``(seconds, sql)``, slowest first"""
+        return [(seconds, sql) for seconds, _, sql in sorted(self._slowest, reverse=True)]
+
+    def server_timing(self, total_seconds):
+        app_seconds = max(0.0, total_seconds - self.sql_seconds - self.serialize_seconds)
+        parts = [
+            f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_seconds * 1000:.2f}',
+            f'app;dur={app_seconds * 1000:.2f}',
+            f'total;dur={total_seconds * 1000:.2f}',
+        ]
+        if self.response_bytes:
+            parts.append(f'size;desc="{self.response_bytes} bytes"')
+        return ', '.join(parts)
+
+
+class TimedJSONEncoder(DjangoJSONEncoder):
+    """``DjangoJSONEncoder`` that charges its time to the current request"""
+
+    def encode(self, o):
+        metrics = _current.get()
+        if metrics is None:
+            return super().encode(o)
+        started = time.perf_counter()
+        try:
+            return super().encode(o)
+        finally:
+            metrics.serialize_seconds += time.perf_counter() - started
+
+
+class JsonResponse(BaseJsonResponse):
+    """``django.http.JsonResponse`` with its encoding time measured"""
+
+    def __init__(self, data, encoder=TimedJSONEncoder, **kwargs):
+        super().__init__(data, encoder=encoder, **kwargs)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class EndpointHistograms:
+    """Thread-safe per-endpoint latency histograms and request counters"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self._statuses = {}
+
+    def observe(self, endpoint, method, status, metrics, seconds):
+        key = (endpoint, method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'buckets': [0] * len(self.buckets), 'count': 0, 'seconds': 0.0, 'queries': 0,
+                    'sql_seconds': 0.0, 'serialize_seconds': 0.0, 'response_bytes': 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series['buckets'][i] += 1
+            series['count'] += 1
+            series['seconds'] += seconds
+            series['queries'] += metrics.queries
+            series['sql_seconds'] += metrics.sql_seconds
+            series['serialize_seconds'] += metrics.serialize_seconds
+            series['response_bytes'] += metrics.response_bytes
+            status_key = (endpoint, method, str(status))
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        with self._lock:
+            series = {key: {**value, 'buckets': list(value['buckets'])} for key, value in self._series.items()}
+            statuses = dict(self._statuses)
+
+        lines = [
+            '# HELP inventory_request_duration_seconds Time to produce the response, per endpoint.',
+            '# TYPE inventory_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), value in sorted(series.items()):
+            for bound, count in zip(self.buckets, value['buckets']):
+                lines.append('inventory_request_duration_seconds_bucket'
+                             f'{_labels(endpoint=endpoint, method=method, le=bound)} {count}')
+            lines.append('inventory_request_duration_seconds_bucket'
+                         f'{_labels(endpoint=endpoint, method=method, le="+Inf")} {value["count"]}')
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f'inventory_request_duration_seconds_sum{labels} {value["seconds"]:.6f}')
+            lines.append(f'inventory_request_duration_seconds_count{labels} {value["count"]}')
+
+        lines += [
+            '# HELP inventory_requests_total Requests answered, per endpoint and status code.',
+            '# TYPE inventory_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f'inventory_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+        for name, field, kind, help_text in (
+            ('inventory_db_queries_total', 'queries', 'd', 'SQL statements executed.'),
+            ('inventory_db_seconds_total', 'sql_seconds', '.6f', 'Time spent executing SQL.'),
+            ('inventory_serialize_seconds_total', 'serialize_seconds', '.6f', 'Time spent encoding JSON.'),
+            ('inventory_response_bytes_total', 'response_bytes', 'd', 'Response body bytes sent.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (endpoint, method), value in sorted(series.items()):
+                lines.append(f'{name}{_labels(endpoint=endpoint, method=method)} {value[field]:{kind}}')
+        return '\n'.join(lines) + '\n'
+
+
+request_histograms = EndpointHistograms(getattr(settings, 'REQUEST_METRICS_BUCKETS', DEFAULT_BUCKETS))
+
+
+def endpoint_name(request):
+    # The route name keeps label cardinality bounded; 404s share one label
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def finish_request(request, response, metrics):
+    """Record a completed request in the histograms and the slow-request log"""
+    seconds = metrics.elapsed()
+    endpoint = endpoint_name(request)
+    request_histograms.observe(endpoint, request.method, response.status_code, metrics, seconds)
+
+    slow_ms = getattr(settings, 'REQUEST_SLOW_MS', None)
+    if slow_ms is not None and seconds * 1000 >= slow_ms:
+        top = '\n'.join(f'  {query_seconds * 1000:8.2f} ms  {sql}' for query_seconds, sql in metrics.top_queries())
+        logger.warning('Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, %.0f ms serializing\n%s',
+                       request.method, request.get_full_path(), endpoint, seconds * 1000, metrics.queries,
+                       metrics.sql_seconds * 1000, metrics.serialize_seconds * 1000, top)
+
+
+def _measured(iterator, request, response, metrics):
+    try:
+        for chunk in iterator:
+            metrics.response_bytes += len(chunk)
+            yield chunk
+    finally:
+        finish_request(request, response, metrics)
+
+
+async def _ameasured(iterator, request, response, metrics):
+    try:
+        async for chunk in iterator:
+            metrics.response_bytes += len(chunk)
+            yield chunk
+    finally:
+        finish_request(request, response, metrics)
+
+
+def _captured(iterator, metrics):
+    iterator = iter(iterator)
+    while True:
+        with metrics.capture():
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+async def _acaptured(iterator, metrics):
+    iterator = aiter(iterator)
+    while True:
+        with metrics.capture():
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+def finish_response(request, response, metrics):
+    """
+    Add the Server-Timing header and record the request.
+
+    A streamed body is only produced after the headers are sent, so its
+    header covers the time to the first byte, and the request is recorded
+    when the last chunk has gone out.
+    """
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = _ameasured(
+                _acaptured(response.streaming_content, metrics), request, response, metrics)
+        else:
+            response.streaming_content = _measured(
+                _captured(response.streaming_content, metrics), request, response, metrics)
+        response['Server-Timing'] = metrics.server_timing(metrics.elapsed())
+        return response
+
+    metrics.response_bytes = len(response.content)
+    response['Server-Timing'] = metrics.server_timing(metrics.elapsed())
+    finish_request(request, response, metrics)
+    return response
@@ -0,0 +1,141 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .audit import audit_actor
+from .metrics import RequestMetrics, finish_response
+from .profiling import profiler_switch, request_sampler, save_profile
+from .replica import PIN_COOKIE, SAFE_METHODS, replica_alias
+
+
+class RequestMetricsMiddleware:
+    """
+    Query count, SQL time, JSON encoding time and response size per request,
+    sent as a Server-Timing header and collected for /api/metrics/
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        with metrics.capture():
+            response = self.get_response(request)
+        return finish_response(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        with metrics.capture():
+            response = await self.get_response(request)
+        return finish_response(request, response, metrics)
+
+
+class ProfilerMiddleware:
+    """
+    Sample the stacks of the requests picked by the admin's profiler switch
+    and save them as flame-graph input (see ``assets.profiling``)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        switch = profiler_switch.current()
+        if switch is None or not switch.wants(request):
+            return self.get_response(request)
+        profile = request_sampler.start(switch.interval)
+        if profile is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_sampler.stop(profile)
+        return save_profile(request, response, profile)
+
+    async def __acall__(self, request):
+        switch = profiler_switch.current()
+        if switch is None or not switch.wants(request):
+            return await self.get_response(request)
+        profile = request_sampler.start(switch.interval)
+        if profile is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_sampler.stop(profile)
+        return save_profile(request, response, profile)
+
+
+class AuditUserMiddleware:
+    """Attribute audit log entries recorded during a request to request.user"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with audit_actor(getattr(request, 'user', None)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Under ASGI the lazy request.user cannot be resolved synchronously
+        user = await request.auser() if hasattr(request, 'auser') else None
+        with audit_actor(user):
+            return await self.get_response(request)
+
+
+class PrimaryPinMiddleware:
+    """
+    Remember when a client last wrote, so its reads stay on the primary
+    until the replica has caught up (see ``assets.replica``).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        # Taken after the view, so any snapshot started later has the write
+        written_at = time.time()
+        if (request.method not in SAFE_METHODS and response.status_code < 400
+                and replica_alias() is not None):
+            response.set_cookie(PIN_COOKIE, f'{written_at:.6f}', max_age=settings.REPLICA_MAX_STALENESS,
+                                httponly=True, samesite='Lax')
+        return response
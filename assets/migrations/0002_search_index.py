@@ -0,0 +1,114 @@
+from django.db import migrations
+
+
+# Full-text index over assets and support tickets. Rows are keyed by rowid so
+# triggers can update them without scanning the index: assets use id * 2 and
+# tickets use id * 2 + 1.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE assets_searchindex USING fts5(
+        kind UNINDEXED,
+        ref_id UNINDEXED,
+        asset_id UNINDEXED,
+        identifiers,
+        title,
+        body,
+        tokenize = 'unicode61',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER assets_asset_search_insert AFTER INSERT ON assets_asset BEGIN
+        INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+        VALUES (
+            new.id * 2, 'asset', new.id, new.id,
+            new.asset_tag || ' ' || coalesce(new.serial_number, '') || ' ' || new.license_key,
+            new.manufacturer || ' ' || new.model || ' ' || new.product_name,
+            new.location || ' ' || new.repair_notes
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER assets_asset_search_update AFTER UPDATE OF
+        asset_tag, serial_number, license_key, manufacturer, model, product_name, location, repair_notes
+    ON assets_asset BEGIN
+        DELETE FROM assets_searchindex WHERE rowid = old.id * 2;
+        INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+        VALUES (
+            new.id * 2, 'asset', new.id, new.id,
+            new.asset_tag || ' ' || coalesce(new.serial_number, '') || ' ' || new.license_key,
+            new.manufacturer || ' ' || new.model || ' ' || new.product_name,
+            new.location || ' ' || new.repair_notes
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER assets_asset_search_delete AFTER DELETE ON assets_asset BEGIN
+        DELETE FROM assets_searchindex WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER assets_ticket_search_insert AFTER INSERT ON assets_supportticket BEGIN
+        INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+        VALUES (new.id * 2 + 1, 'ticket', new.id, new.asset_id, '', new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER assets_ticket_search_update AFTER UPDATE OF title, description, asset_id
+    ON assets_supportticket BEGIN
+        DELETE FROM assets_searchindex WHERE rowid = old.id * 2 + 1;
+        INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+        VALUES (new.id * 2 + 1, 'ticket', new.id, new.asset_id, '', new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER assets_ticket_search_delete AFTER DELETE ON assets_supportticket BEGIN
+        DELETE FROM assets_searchindex WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    # Index whatever already exists
+    """
+    INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+    SELECT id * 2, 'asset', id, id,
+           asset_tag || ' ' || coalesce(serial_number, '') || ' ' || license_key,
+           manufacturer || ' ' || model || ' ' || product_name,
+           location || ' ' || repair_notes
+    FROM assets_asset
+    """,
+    """
+    INSERT INTO assets_searchindex (rowid, kind, ref_id, asset_id, identifiers, title, body)
+    SELECT id * 2 + 1, 'ticket', id, asset_id, '', title, description
+    FROM assets_supportticket
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS assets_asset_search_insert',
+    'DROP TRIGGER IF EXISTS assets_asset_search_update',
+    'DROP TRIGGER IF EXISTS assets_asset_search_delete',
+    'DROP TRIGGER IF EXISTS assets_ticket_search_insert',
+    'DROP TRIGGER IF EXISTS assets_ticket_search_update',
+    'DROP TRIGGER IF EXISTS assets_ticket_search_delete',
+    'DROP TABLE IF EXISTS assets_searchindex',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite-only; other backends fall back to LIKE search
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_sqlite(CREATE_SQL), _run_on_sqlite(DROP_SQL)),
+    ]
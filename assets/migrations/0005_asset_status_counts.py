@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:37
+
+from django.db import migrations, models
+
+
+# Keep assets_assetstatuscount in step with assets_asset inside the same
+# transaction as every insert, delete or status/type change, whichever code
+# path (save, bulk_create, queryset.update, admin) performed it.
+CREATE_SQL = [
+    """
+    CREATE TRIGGER assets_asset_count_insert AFTER INSERT ON assets_asset BEGIN
+        INSERT INTO assets_assetstatuscount (status, asset_type, count)
+        VALUES (new.status, new.asset_type, 1)
+        ON CONFLICT (status, asset_type) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER assets_asset_count_update AFTER UPDATE OF status, asset_type ON assets_asset
+    WHEN old.status IS NOT new.status OR old.asset_type IS NOT new.asset_type BEGIN
+        UPDATE assets_assetstatuscount SET count = count - 1
+        WHERE status = old.status AND asset_type = old.asset_type;
+        INSERT INTO assets_assetstatuscount (status, asset_type, count)
+        VALUES (new.status, new.asset_type, 1)
+        ON CONFLICT (status, asset_type) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER assets_asset_count_delete AFTER DELETE ON assets_asset BEGIN
+        UPDATE assets_assetstatuscount SET count = count - 1
+        WHERE status = old.status AND asset_type = old.asset_type;
+    END
+    """,
+    """
+    INSERT INTO assets_assetstatuscount (status, asset_type, count)
+    SELECT status, asset_type, COUNT(*) FROM assets_asset GROUP BY status, asset_type
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS assets_asset_count_insert',
+    'DROP TRIGGER IF EXISTS assets_asset_count_update',
+    'DROP TRIGGER IF EXISTS assets_asset_count_delete',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('in_service', 'In Service'), ('out_repair', 'Out for Repair'), ('decommissioned', 'Decommissioned')], max_length=15)),
+                ('asset_type', models.CharField(choices=[('physical', 'Physical Asset'), ('digital', 'Digital Asset')], max_length=10)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'asset_type'), name='asset_status_count_key')],
+            },
+        ),
+        migrations.RunPython(_run_on_sqlite(CREATE_SQL), _run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:45
+
+from django.db import migrations, models
+
+
+def _bump(name):
+    return (
+        f"INSERT INTO assets_collectionversion (name, generation) VALUES ('{name}', 1) "
+        f"ON CONFLICT (name) DO UPDATE SET generation = generation + 1;"
+    )
+
+
+# (trigger name, event, table, collection). Every write to a table that
+# feeds an API collection bumps that collection's generation in the same
+# transaction, whichever code path performed it. Users only bump on the
+# columns the API shows, so logins (last_login) do not invalidate caches.
+TRIGGERS = [
+    ('assets_asset_version_insert', 'INSERT', 'assets_asset', 'assets'),
+    ('assets_asset_version_update', 'UPDATE', 'assets_asset', 'assets'),
+    ('assets_asset_version_delete', 'DELETE', 'assets_asset', 'assets'),
+    ('auth_user_version_insert', 'INSERT', 'auth_user', 'users'),
+    ('auth_user_version_update', 'UPDATE OF username, first_name, last_name, is_active', 'auth_user', 'users'),
+    ('auth_user_version_delete', 'DELETE', 'auth_user', 'users'),
+    ('assets_userprofile_version_insert', 'INSERT', 'assets_userprofile', 'users'),
+    ('assets_userprofile_version_update', 'UPDATE', 'assets_userprofile', 'users'),
+    ('assets_userprofile_version_delete', 'DELETE', 'assets_userprofile', 'users'),
+]
+
+CREATE_SQL = [
+    f'CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN {_bump(collection)} END'
+    for name, event, table, collection in TRIGGERS
+] + [
+    "INSERT INTO assets_collectionversion (name, generation) VALUES ('assets', 1), ('users', 1)",
+]
+
+DROP_SQL = [f'DROP TRIGGER IF EXISTS {name}' for name, _, _, _ in TRIGGERS]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0006_asset_tombstones'),
+        # auth's own migrations rebuild auth_user on SQLite, which would
+        # drop the triggers; run after the last of them.
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(_run_on_sqlite(CREATE_SQL), _run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+# Cached response bodies are keyed by generation and may outlive the
+# database (file-based cache, restored backup, rolled-back transaction).
+# Counting up from 1 would hand out the same generation twice in those
+# cases, so each bump now moves to at least the current time in
+# microseconds (SQLite's clock has millisecond resolution, leaving room for
+# up to 1000 bumps per millisecond before it falls back to counting).
+NOW_US = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) * 1000"
+
+
+def _bump(name):
+    return (
+        f"INSERT INTO assets_collectionversion (name, generation) VALUES ('{name}', {NOW_US}) "
+        f"ON CONFLICT (name) DO UPDATE SET generation = max(generation + 1, {NOW_US});"
+    )
+
+
+TRIGGERS = [
+    ('assets_asset_version_insert', 'INSERT', 'assets_asset', 'assets'),
+    ('assets_asset_version_update', 'UPDATE', 'assets_asset', 'assets'),
+    ('assets_asset_version_delete', 'DELETE', 'assets_asset', 'assets'),
+    ('auth_user_version_insert', 'INSERT', 'auth_user', 'users'),
+    ('auth_user_version_update', 'UPDATE OF username, first_name, last_name, is_active', 'auth_user', 'users'),
+    ('auth_user_version_delete', 'DELETE', 'auth_user', 'users'),
+    ('assets_userprofile_version_insert', 'INSERT', 'assets_userprofile', 'users'),
+    ('assets_userprofile_version_update', 'UPDATE', 'assets_userprofile', 'users'),
+    ('assets_userprofile_version_delete', 'DELETE', 'assets_userprofile', 'users'),
+]
+
+DROP_SQL = [f'DROP TRIGGER IF EXISTS {name}' for name, _, _, _ in TRIGGERS]
+
+CREATE_SQL = DROP_SQL + [
+    f'CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN {_bump(collection)} END'
+    for name, event, table, collection in TRIGGERS
+] + [
+    f"UPDATE assets_collectionversion SET generation = max(generation + 1, {NOW_US})",
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0007_collection_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_sqlite(CREATE_SQL), migrations.RunPython.noop),
+    ]
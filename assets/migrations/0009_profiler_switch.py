@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0008_time_based_generations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilerSwitch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=False)),
+                ('path_pattern', models.CharField(blank=True, help_text='Regular expression searched for in the request path; blank matches every path', max_length=200)),
+                ('sample_rate', models.FloatField(default=0.01, help_text='Fraction of the matching requests to profile', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)])),
+                ('header', models.CharField(blank=True, default='X-Profile', help_text='Requests sending this header are always profiled while enabled', max_length=60)),
+                ('interval_ms', models.PositiveIntegerField(default=5, help_text='Milliseconds between stack samples', validators=[django.core.validators.MinValueValidator(1)])),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Switch off automatically at this time', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+# AddField rebuilds the asset table on SQLite, which copies every row and
+# drops the search, counter and generation triggers created by earlier
+# migrations. ADD COLUMN with a constant default only changes the schema.
+ADD_COLUMN_SQL = (
+    'ALTER TABLE "assets_asset" ADD COLUMN "revision" integer unsigned NOT NULL DEFAULT 1 '
+    'CHECK ("revision" >= 0)'
+)
+
+
+def add_revision(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(ADD_COLUMN_SQL)
+    else:
+        schema_editor.add_field(Asset, Asset._meta.get_field('revision'))
+
+
+def remove_revision(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('ALTER TABLE "assets_asset" DROP COLUMN "revision"')
+    else:
+        schema_editor.remove_field(Asset, Asset._meta.get_field('revision'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0009_profiler_switch'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='asset',
+                    name='revision',
+                    field=models.PositiveIntegerField(db_default=1, default=1),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_revision, remove_revision),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0010_asset_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scan_id', models.CharField(max_length=64, unique=True)),
+                ('asset_tag', models.CharField(max_length=50)),
+                ('action', models.CharField(choices=[('check_in', 'Check In'), ('check_out', 'Check Out'), ('audit', 'Audit')], max_length=10)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('scanned_at', models.DateTimeField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scans', to='assets.asset')),
+            ],
+            options={
+                'ordering': ['-scanned_at'],
+                'indexes': [models.Index(fields=['asset', 'scanned_at'], name='scan_asset_time_idx')],
+            },
+        ),
+    ]
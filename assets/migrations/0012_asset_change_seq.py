@@ -0,0 +1,90 @@
+from django.db import migrations, models
+
+
+# Delta sync used to order changes by updated_at, which Python sets before
+# the write lock is taken: a writer waiting out the busy timeout could
+# commit a row stamped earlier than a token already handed to a client.
+# change_seq is assigned by triggers from a counter row instead, inside the
+# writing transaction and under the write lock, so it follows commit order.
+ADD_COLUMN_SQL = 'ALTER TABLE "assets_asset" ADD COLUMN "change_seq" bigint NOT NULL DEFAULT 0'
+
+# Existing rows are numbered in their (updated_at, id) order
+BACKFILL_SQL = [
+    'UPDATE assets_asset SET change_seq = ordered.seq FROM '
+    '(SELECT id, row_number() OVER (ORDER BY updated_at, id) AS seq FROM assets_asset) AS ordered '
+    'WHERE ordered.id = assets_asset.id',
+    "INSERT INTO assets_collectionversion (name, generation) "
+    "VALUES ('asset_changes', (SELECT count(*) FROM assets_asset)) "
+    "ON CONFLICT (name) DO UPDATE SET generation = excluded.generation",
+]
+
+NEXT_SEQ = (
+    "INSERT INTO assets_collectionversion (name, generation) VALUES ('asset_changes', 1) "
+    "ON CONFLICT (name) DO UPDATE SET generation = generation + 1; "
+    "UPDATE assets_asset SET change_seq = "
+    "(SELECT generation FROM assets_collectionversion WHERE name = 'asset_changes') WHERE id = new.id;"
+)
+
+# SQLite does not fire a trigger from its own UPDATE (recursive_triggers is
+# off), so stamping the row does not stamp it again.
+TRIGGERS = [
+    ('assets_asset_change_seq_insert', 'INSERT'),
+    ('assets_asset_change_seq_update', 'UPDATE'),
+]
+
+CREATE_TRIGGERS_SQL = [
+    f'CREATE TRIGGER {name} AFTER {event} ON assets_asset BEGIN {NEXT_SEQ} END'
+    for name, event in TRIGGERS
+]
+
+DROP_TRIGGERS_SQL = [f'DROP TRIGGER IF EXISTS {name}' for name, _ in TRIGGERS]
+
+
+def add_change_seq(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    if schema_editor.connection.vendor != 'sqlite':
+        schema_editor.add_field(Asset, Asset._meta.get_field('change_seq'))
+        return
+    # ADD COLUMN keeps the triggers that a table rebuild by AddField would drop
+    schema_editor.execute(ADD_COLUMN_SQL)
+    for sql in BACKFILL_SQL + CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def remove_change_seq(apps, schema_editor):
+    Asset = apps.get_model('assets', 'Asset')
+    if schema_editor.connection.vendor != 'sqlite':
+        schema_editor.remove_field(Asset, Asset._meta.get_field('change_seq'))
+        return
+    for sql in DROP_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute("DELETE FROM assets_collectionversion WHERE name = 'asset_changes'")
+    schema_editor.execute('ALTER TABLE "assets_asset" DROP COLUMN "change_seq"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0011_scan_events'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='asset',
+                    name='change_seq',
+                    field=models.BigIntegerField(db_default=0, default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_change_seq, remove_change_seq),
+        migrations.RemoveIndex(
+            model_name='asset',
+            name='asset_updated_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['change_seq'], name='asset_change_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+# The change_seq triggers from 0012 stamp the row with a second UPDATE,
+# which fired the plain AFTER UPDATE generation trigger again, so every
+# asset write bumped the 'assets' generation twice. Listing the data
+# columns leaves that change_seq-only UPDATE out; a new asset column has
+# to be added here for writes to it to invalidate cached responses.
+NOW_US = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) * 1000"
+
+BUMP_ASSETS = (
+    f"INSERT INTO assets_collectionversion (name, generation) VALUES ('assets', {NOW_US}) "
+    f"ON CONFLICT (name) DO UPDATE SET generation = max(generation + 1, {NOW_US});"
+)
+
+DATA_COLUMNS = (
+    'asset_type, status, assigned_to_id, date_in_service, created_at, updated_at, manufacturer, '
+    'model, serial_number, asset_tag, location, product_name, license_key, version, renewal_date, '
+    'repair_notes, revision'
+)
+
+DROP_SQL = 'DROP TRIGGER IF EXISTS assets_asset_version_update'
+
+FORWARD_SQL = [
+    DROP_SQL,
+    f'CREATE TRIGGER assets_asset_version_update AFTER UPDATE OF {DATA_COLUMNS} ON assets_asset '
+    f'BEGIN {BUMP_ASSETS} END',
+]
+
+REVERSE_SQL = [
+    DROP_SQL,
+    f'CREATE TRIGGER assets_asset_version_update AFTER UPDATE ON assets_asset BEGIN {BUMP_ASSETS} END',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0012_asset_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_sqlite(FORWARD_SQL), _run_on_sqlite(REVERSE_SQL)),
+    ]
@@ -1,5 +1,10 @@
+import re
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class UserProfile(models.Model):
@@ -60,6 +65,29 @@ class Asset(models.Model):
     # Repair tracking
     repair_notes = models.TextField(blank=True)
     
+    # Bumped by every write; API updates only apply to the revision they read
+    revision = models.PositiveIntegerField(default=1, db_default=1)
+    # Position in the order writes commit, stamped by SQLite triggers from
+    # a counter row (see migration 0012); delta sync pages by it
+    change_seq = models.BigIntegerField(default=0, db_default=0, editable=False)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can be audited as field diffs
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            # Incremented in SQL so that two saves of the same read both count
+            self.revision = models.F('revision') + 1
+        super().save(*args, **kwargs)
+        if bump:
+            # Reloaded from the database if it is read again
+            del self.revision
+    
     def __str__(self):
         if self.asset_type == 'physical':
             return f"{self.manufacturer} {self.model} - {self.asset_tag}"
@@ -68,17 +96,76 @@ class Asset(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination walks (created_at, id) backwards; the
+            # filtered variants let the list filters use the same order.
+            models.Index(fields=['created_at', 'id'], name='asset_created_id_idx'),
+            models.Index(fields=['status', 'created_at'], name='asset_status_created_idx'),
+            models.Index(fields=['asset_type', 'created_at'], name='asset_type_created_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='asset_assignee_status_idx'),
+            models.Index(fields=['asset_tag'], name='asset_tag_idx'),
+            # Delta sync walks change_seq forwards
+            models.Index(fields=['change_seq'], name='asset_change_seq_idx'),
+        ]
+
+
+class AssetTombstone(models.Model):
+    """
+    Marker left behind when an asset is deleted, so sync clients that
+    already hold the asset learn to drop it. Written by the Asset
+    post_delete receiver; the id doubles as a change sequence.
+    """
+    asset_id = models.IntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Asset #{self.asset_id} deleted at {self.deleted_at}"
+
+
+class AssetStatusCount(models.Model):
+    """
+    Number of assets per (status, asset_type), for O(1) dashboard stats.
+    Maintained by SQLite triggers on the asset table (see migration 0005)
+    and rebuildable with ``manage.py rebuild_asset_stats``.
+    """
+    status = models.CharField(max_length=15, choices=Asset.STATUS_CHOICES)
+    asset_type = models.CharField(max_length=10, choices=Asset.ASSET_TYPE_CHOICES)
+    count = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.asset_type}/{self.status}: {self.count}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'asset_type'], name='asset_status_count_key'),
+        ]
+
+
+class CollectionVersion(models.Model):
+    """
+    Generation number per API collection ("assets", "users"), bumped by
+    SQLite triggers on every write to the underlying tables (see migration
+    0007). Drives the ETags of the list and report endpoints.
+    """
+    name = models.CharField(max_length=30, unique=True)
+    generation = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.generation}"
 
 
 class AuditLog(models.Model):
     """
     Immutable audit log for tracking asset changes.
     Implements Epic 5: Data Integrity & Auditing
+    
+    Entries outlive the asset they describe: deleting an asset clears the
+    foreign key and the asset id stays in the JSON details.
     """
-    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='audit_logs')
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     action = models.CharField(max_length=50)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     details = models.TextField()
     
     def __str__(self):
@@ -86,6 +173,9 @@ class AuditLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['asset', '-timestamp'], name='auditlog_asset_time_idx'),
+        ]
 
 
 class SupportTicket(models.Model):
@@ -113,4 +203,69 @@ class SupportTicket(models.Model):
         return f"Ticket #{self.id}: {self.title} - {self.status}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['asset', 'status'], name='ticket_asset_status_idx'),
+        ]
+
+
+class ScanEvent(models.Model):
+    """
+    One barcode scan from a warehouse handheld, stored once per client
+    scan id so that re-sent batches are not applied twice (see scans.py).
+    """
+    ACTION_CHOICES = [
+        ('check_in', 'Check In'),
+        ('check_out', 'Check Out'),
+        ('audit', 'Audit'),
+    ]
+    
+    scan_id = models.CharField(max_length=64, unique=True)
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='scans')
+    asset_tag = models.CharField(max_length=50)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    location = models.CharField(max_length=200, blank=True)
+    scanned_at = models.DateTimeField()
+    received_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Scan {self.scan_id}: {self.action} {self.asset_tag} at {self.scanned_at}"
+    
+    class Meta:
+        ordering = ['-scanned_at']
+        indexes = [
+            # Latest scan per asset, to ignore scans that arrive out of order
+            models.Index(fields=['asset', 'scanned_at'], name='scan_asset_time_idx'),
+        ]
+
+
+class ProfilerSwitch(models.Model):
+    """
+    Settings of the on-demand request profiler (a single row, edited in the
+    admin). Saving publishes them to PROFILER_DIR, where every worker picks
+    them up without a query (see assets/profiling.py).
+    """
+    enabled = models.BooleanField(default=False)
+    path_pattern = models.CharField(max_length=200, blank=True,
+                                    help_text='Regular expression searched for in the request path; blank matches every path')
+    sample_rate = models.FloatField(default=0.01, validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+                                    help_text='Fraction of the matching requests to profile')
+    header = models.CharField(max_length=60, blank=True, default='X-Profile',
+                              help_text='Requests sending this header are always profiled while enabled')
+    interval_ms = models.PositiveIntegerField(default=5, validators=[MinValueValidator(1)],
+                                              help_text='Milliseconds between stack samples')
+    expires_at = models.DateTimeField(null=True, blank=True, help_text='Switch off automatically at this time')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Profiler {'on' if self.enabled else 'off'}"
+    
+    def clean(self):
+        try:
+            re.compile(self.path_pattern)
+        except re.error as e:
+            raise ValidationError({'path_pattern': f'Invalid regular expression: {e}'})
+    
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super().save(*args, **kwargs)
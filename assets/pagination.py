@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Keyset order for asset listings. Matches Asset.Meta.ordering with the
+# primary key as a tie-breaker so rows sharing a created_at are never
+# skipped or repeated between pages.
+ASSET_KEYSET_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(created_at, pk):
+    """Build an opaque cursor pointing just past the given row."""
+    raw = json.dumps([created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) pair stored in a cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a ?limit= query value to 1..maximum."""
+    if value in (None, ''):
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(1, min(size, maximum))
+
+
+def seek(queryset, cursor=None):
+    """Order ``queryset`` by the keyset and skip everything up to ``cursor``"""
+    queryset = queryset.order_by(*ASSET_KEYSET_ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # The redundant created_at <= bound gives SQLite a range to seek to
+        # in the (created_at, id) index instead of filtering from the top.
+        queryset = queryset.filter(
+            Q(created_at__lte=created_at),
+            Q(created_at__lt=created_at) | Q(id__lt=pk),
+        )
+    return queryset
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of ``queryset`` in (-created_at, -id) order.
+
+    Seeks directly to the cursor position instead of using OFFSET, so the
+    cost of fetching a page does not grow with how deep the client is.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    Rows may be model instances or ``values()`` dicts, as long as they
+    carry ``created_at`` and ``id``.
+    """
+    queryset = seek(queryset, cursor)
+    return _page(list(queryset[:limit + 1]), limit)
+
+
+async def akeyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Async twin of ``keyset_page``, for ASGI views"""
+    queryset = seek(queryset, cursor)
+    return _page([row async for row in queryset[:limit + 1]], limit)
+
+
+def _page(rows, limit):
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last['created_at'], last['id'])
+    return rows, encode_cursor(last.created_at, last.id)
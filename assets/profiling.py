@@ -0,0 +1,324 @@
+"""
+On-demand sampling profiler for live requests.
+
+Switched on in the admin (``ProfilerSwitch``), ``ProfilerMiddleware``
+profiles a sample of the requests whose path matches a pattern, plus every
+request that sends the configured header. While such a request is handled,
+one sampler thread records the handling thread's stack every
+``interval_ms`` with ``sys._current_frames()``. The stacks are counted in
+the collapsed ("folded") format read by flamegraph.pl, speedscope and
+similar tools, one ``frame;frame;frame count`` line per distinct stack, and
+saved to ``PROFILER_DIR``, where admins list and download them from
+``/api/profiles/``.
+
+Saving the switch writes it to ``PROFILER_DIR/switch.json``. Workers look
+at that file's mtime at most every ``PROFILER_SWITCH_TTL`` seconds, so
+while profiling is off a request costs a clock read and a comparison.
+
+Async views run on the event loop thread, which is shared by every request
+in flight, so their profiles also contain whatever else the loop ran.
+Streamed bodies are produced after the view returns and are not sampled.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .metrics import endpoint_name
+
+
+logger = logging.getLogger(__name__)
+
+SWITCH_FILE = 'switch.json'
+
+PROFILE_SUFFIX = '.folded'
+
+# 20261017T093000-assets.api_assets_list-GET-153ms-1a2b3c4d.folded
+PROFILE_NAME = re.compile(
+    r'^(?P<started>\d{8}T\d{6})-(?P<endpoint>[\w.]+)-(?P<method>[A-Z]+)-(?P<ms>\d+)ms-[0-9a-f]{8}\.folded$')
+
+
+def profiler_dir():
+    """Directory holding the switch and the saved profiles, or None if profiling is disabled"""
+    directory = getattr(settings, 'PROFILER_DIR', None)
+    return str(directory) if directory else None
+
+
+def _write_atomic(path, text):
+    fd, temp_path = tempfile.mkstemp(prefix='.profile-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class SwitchState:
+    """The published switch settings, as checked on each request"""
+
+    def __init__(self, path_pattern, sample_rate, header, interval_ms, expires_at):
+        self.path_pattern = re.compile(path_pattern) if path_pattern else None
+        self.sample_rate = sample_rate
+        # request.META spelling of the header
+        self.header = 'HTTP_' + header.upper().replace('-', '_') if header else None
+        self.interval = interval_ms / 1000
+        self.expires_at = expires_at
+
+    def wants(self, request):
+        if self.expires_at is not None and time.time() >= self.expires_at:
+            return False
+        if self.header is not None and self.header in request.META:
+            return True
+        if self.path_pattern is not None and not self.path_pattern.search(request.path):
+            return False
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+def publish_switch(switch):
+    """Write the admin's settings where every worker's ``SwitchReader`` finds them"""
+    directory = profiler_dir()
+    if directory is None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    data = {
+        'enabled': switch.enabled,
+        'pathPattern': switch.path_pattern,
+        'sampleRate': switch.sample_rate,
+        'header': switch.header,
+        'intervalMs': switch.interval_ms,
+        'expiresAt': switch.expires_at.timestamp() if switch.expires_at else None,
+    }
+    _write_atomic(os.path.join(directory, SWITCH_FILE), json.dumps(data))
+    profiler_switch.invalidate()
+
+
+def withdraw_switch():
+    directory = profiler_dir()
+    if directory is not None:
+        try:
+            os.unlink(os.path.join(directory, SWITCH_FILE))
+        except FileNotFoundError:
+            pass
+    profiler_switch.invalidate()
+
+
+class SwitchReader:
+    """Per-process view of the published switch, re-read only when the file changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float('-inf')
+        self._mtime = None
+        self._state = None
+
+    def current(self):
+        """The switch settings if profiling is on, otherwise None"""
+        now = time.monotonic()
+        if now - self._checked_at < settings.PROFILER_SWITCH_TTL:
+            return self._state
+        with self._lock:
+            if now - self._checked_at >= settings.PROFILER_SWITCH_TTL:
+                self._reload()
+                self._checked_at = now
+        return self._state
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = float('-inf')
+
+    def _reload(self):
+        directory = profiler_dir()
+        try:
+            mtime = os.stat(os.path.join(directory, SWITCH_FILE)).st_mtime_ns if directory else None
+        except OSError:
+            mtime = None
+        if mtime is None:
+            self._mtime = self._state = None
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            with open(os.path.join(directory, SWITCH_FILE)) as f:
+                data = json.load(f)
+            self._state = SwitchState(data['pathPattern'], data['sampleRate'], data['header'],
+                                      data['intervalMs'], data['expiresAt']) if data['enabled'] else None
+        except (OSError, ValueError, KeyError, re.error):
+            logger.exception('Ignoring unreadable profiler switch')
+            self._state = None
+
+
+profiler_switch = SwitchReader()
+
+
+def collapse(frame, root=None):
+    """``frame``'s stack as ``outer;...;inner``, starting at ``root`` if it is on the stack"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+        if frame is root:
+            break
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+class Profile:
+    """Stack counts for one request"""
+
+    def __init__(self, thread_id, root, interval):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.started = time.time()
+        self.stacks = Counter()
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class StackSampler:
+    """
+    One daemon thread that samples the stacks of the threads being
+    profiled. It only runs while a profile is in progress.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = set()
+        self._thread = None
+
+    def start(self, interval):
+        """
+        Start sampling the calling thread from its caller's frame down.
+        Returns None when ``PROFILER_MAX_CONCURRENT`` profiles are running.
+        """
+        profile = Profile(threading.get_ident(), sys._getframe(1), interval)
+        with self._lock:
+            if len(self._profiles) >= settings.PROFILER_MAX_CONCURRENT:
+                return None
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile):
+        with self._lock:
+            self._profiles.discard(profile)
+        profile.root = None
+        return profile
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for profile in self._profiles:
+                    if profile.thread_id in frames:
+                        profile.stacks[collapse(frames[profile.thread_id], profile.root)] += 1
+                interval = min(profile.interval for profile in self._profiles)
+                # Frames keep their locals alive; let them go before sleeping
+                del frames
+            time.sleep(interval)
+
+
+request_sampler = StackSampler()
+
+
+def save_profile(request, response, profile):
+    """Write ``profile`` to PROFILER_DIR and name the file in an X-Profile-Id header"""
+    directory = profiler_dir()
+    if directory is None or not profile.stacks:
+        return response
+    os.makedirs(directory, exist_ok=True)
+    started = datetime.fromtimestamp(profile.started, dt_timezone.utc).strftime('%Y%m%dT%H%M%S')
+    endpoint = re.sub(r'[^\w.]', '.', endpoint_name(request))
+    elapsed_ms = int((time.time() - profile.started) * 1000)
+    name = f'{started}-{endpoint}-{request.method}-{elapsed_ms}ms-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}'
+    try:
+        _write_atomic(os.path.join(directory, name), profile.folded())
+        prune_profiles(directory)
+    except OSError:
+        logger.exception('Could not save profile %s', name)
+        return response
+    response['X-Profile-Id'] = name
+    return response
+
+
+def prune_profiles(directory, keep=None):
+    """Delete all but the newest ``PROFILER_MAX_FILES`` profiles"""
+    keep = settings.PROFILER_MAX_FILES if keep is None else keep
+    names = sorted(name for name in os.listdir(directory) if PROFILE_NAME.match(name))
+    for name in names[:max(0, len(names) - keep)]:
+        try:
+            os.unlink(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles(endpoint=None):
+    """Saved profiles, newest first, optionally only those of one endpoint"""
+    directory = profiler_dir()
+    if directory is None or not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        match = PROFILE_NAME.match(name)
+        if match is None or (endpoint and match['endpoint'] != re.sub(r'[^\w.]', '.', endpoint)):
+            continue
+        started = datetime.strptime(match['started'], '%Y%m%dT%H%M%S').replace(tzinfo=dt_timezone.utc)
+        try:
+            size = os.path.getsize(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            'name': name,
+            'endpoint': match['endpoint'],
+            'method': match['method'],
+            'durationMs': int(match['ms']),
+            'startedAt': started.isoformat(),
+            'bytes': size,
+        })
+    profiles.sort(key=lambda profile: profile['name'], reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    """Path of a saved profile; raises ValueError for anything that is not one"""
+    directory = profiler_dir()
+    if directory is None or not PROFILE_NAME.match(name):
+        raise ValueError(f'Unknown profile: {name}')
+    return os.path.join(directory, name)
+
+
+def merge_profiles(names):
+    """Add up the stack counts of several saved profiles into one folded text"""
+    stacks = Counter()
+    for name in names:
+        with open(profile_path(name)) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] += int(count)
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
@@ -0,0 +1,313 @@
+"""
+Read replica for the heavy read-only endpoints.
+
+``ReplicaRouter`` sends reads made inside a ``read_from_replica`` view to
+the ``REPLICA_DATABASE_ALIAS`` database: the asset list, reports, stats,
+export and search. Everything else, and every write, uses ``default``.
+
+The replica is a local file copied from the primary with SQLite's online
+backup API (``sync_replica``), either by a background thread started from
+the server entry point (``REPLICA_SYNC_INTERVAL``) or by running
+``manage.py sync_replica`` on a schedule. Each sync writes a new file and
+renames it over the old one, so readers never see a half-copied database;
+the file's mtime records when the snapshot was taken.
+
+Every server process starts the thread, but only the one holding an
+exclusive lock on ``<replica>.sync-lock`` copies; the others keep trying
+for the lock, so another worker takes over when that process exits.
+
+A request is answered from the primary instead when the replica is older
+than ``REPLICA_MAX_STALENESS`` seconds, or when the client wrote something
+that the replica has not caught up with yet (the ``replica_pin`` cookie
+set by ``PrimaryPinMiddleware``), so clients always read their own writes.
+"""
+import contextvars
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process syncs
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'replica_pin'
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+
+
+def replica_alias():
+    """The configured replica alias, or None if there is no replica"""
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+    if alias and alias in settings.DATABASES and alias != 'default':
+        return alias
+    return None
+
+
+def replica_path(alias):
+    name = str(connections[alias].settings_dict['NAME'])
+    if not name or name == ':memory:' or name.startswith('file:'):
+        return None
+    return name
+
+
+def _replica_stat(alias):
+    path = replica_path(alias)
+    if path is None:
+        return None
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def replica_synced_at(alias=None):
+    """Time of the snapshot the replica holds, or None if it has none"""
+    alias = alias or replica_alias()
+    stat = _replica_stat(alias) if alias else None
+    return stat.st_mtime if stat is not None else None
+
+
+def _reconnect_if_replaced(alias, stat):
+    # An open connection keeps reading the file it opened, even after a
+    # sync has renamed a newer snapshot over it
+    replica = connections[alias]
+    if replica.connection is not None and getattr(replica, 'replica_inode', None) != stat.st_ino:
+        replica.close()
+    replica.replica_inode = stat.st_ino
+
+
+def replica_for_request(request):
+    """Alias to read from for ``request``, or None to use the primary"""
+    alias = replica_alias()
+    if alias is None or request.method not in SAFE_METHODS:
+        return None
+
+    stat = _replica_stat(alias)
+    if stat is None or time.time() - stat.st_mtime > settings.REPLICA_MAX_STALENESS:
+        return None
+    synced_at = stat.st_mtime
+
+    try:
+        written_at = float(request.COOKIES.get(PIN_COOKIE, ''))
+    except ValueError:
+        written_at = None
+    if written_at is not None and written_at >= synced_at:
+        return None
+
+    _reconnect_if_replaced(alias, stat)
+    return alias
+
+
+class ReplicaRouter:
+    """Route reads inside ``read_from_replica`` views to the replica"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects loaded from the replica must still be saved to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary with each sync
+        if db == replica_alias():
+            return False
+        return None
+
+
+def _iter_on(alias, iterator):
+    # Streamed bodies are produced after the view has returned
+    iterator = iter(iterator)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+async def _aiter_on(alias, iterator):
+    iterator = aiter(iterator)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+def read_from_replica(view):
+    """
+    Run a view's GET/HEAD reads against the replica when it is fresh enough.
+
+    Apply it outside ``condition`` and ``cached_response`` so the ETag, the
+    cache key and the body all come from the same snapshot.
+    """
+    def rebind(response, alias):
+        if getattr(response, 'streaming', False):
+            if response.is_async:
+                response.streaming_content = _aiter_on(alias, response.streaming_content)
+            else:
+                response.streaming_content = _iter_on(alias, response.streaming_content)
+        return response
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            alias = replica_for_request(request)
+            if alias is None:
+                return await view(request, *args, **kwargs)
+            token = _read_alias.set(alias)
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+            return rebind(response, alias)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_for_request(request)
+        if alias is None:
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(alias)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+        return rebind(response, alias)
+    return wrapper
+
+
+def sync_replica(alias=None, source='default'):
+    """
+    Copy ``source`` into the replica file with SQLite's backup API.
+
+    Returns the number of pages copied. The copy is made in one step, so
+    it is a consistent snapshot; in WAL mode writers carry on meanwhile.
+    """
+    alias = alias or replica_alias()
+    path = replica_path(alias) if alias else None
+    if path is None:
+        raise ValueError('No file-backed replica database is configured')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.replica-', suffix='.sqlite3', dir=directory)
+    os.close(fd)
+    try:
+        source_connection = connections[source]
+        source_connection.ensure_connection()
+        started = time.time()
+        target = sqlite3.connect(temp_path)
+        try:
+            source_connection.connection.backup(target)
+            # Readers open the copy read-only; it never needs a WAL
+            target.execute('PRAGMA journal_mode = DELETE')
+            pages = target.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            target.close()
+        source_name = str(source_connection.settings_dict['NAME'])
+        if os.path.isfile(source_name):
+            shutil.copymode(source_name, temp_path)
+        # The mtime is the freshness clock: date the file by its snapshot
+        os.utime(temp_path, (started, started))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return pages
+
+
+class SyncLead:
+    """
+    Per-process claim on the right to refresh the replica: an exclusive
+    ``flock`` on a file next to it, held until the process exits.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, alias):
+        """Whether this process now holds the lead for ``alias``; never blocks"""
+        if fcntl is None:
+            return True
+        with self._lock:
+            if alias in self._files:
+                return True
+            f = open(replica_path(alias) + '.sync-lock', 'a')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._files[alias] = f
+            return True
+
+
+sync_lead = SyncLead()
+
+
+class ReplicaSyncer:
+    """
+    Background thread that refreshes the replica every ``interval`` seconds
+    while this process holds the sync lead
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, interval):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(interval,),
+                                            name='replica-sync', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            started = time.perf_counter()
+            try:
+                alias = replica_alias()
+                if alias and replica_path(alias) and sync_lead.acquire(alias):
+                    sync_replica(alias)
+            except Exception:
+                logger.exception('Replica sync failed')
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+replica_syncer = ReplicaSyncer()
+
+
+def start_replica_sync():
+    """Start syncing from a server entry point, if configured in settings"""
+    interval = getattr(settings, 'REPLICA_SYNC_INTERVAL', None)
+    if interval and replica_alias() is not None:
+        replica_syncer.start(interval)
@@ -0,0 +1,99 @@
+"""
+"Who Has What" report, computed in the database.
+
+Users are paged in id order first, then their asset counts are aggregated
+with one GROUP BY over just the users on the page, which SQLite answers
+from the (assigned_to, status) index. A third query fetches the newest few
+assets for those users using a ROW_NUMBER() window, so the work per page is
+bounded by the page size rather than by the number of users or assets.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q
+from django.db.models.functions import RowNumber
+from django.db.models.expressions import Window
+
+from .models import Asset
+
+
+DEFAULT_USERS_PER_PAGE = 50
+MAX_USERS_PER_PAGE = 200
+ASSETS_PER_USER = 5
+
+SUMMARY_FIELDS = (
+    'id', 'assigned_to_id', 'asset_type', 'status', 'manufacturer', 'model',
+    'product_name', 'asset_tag', 'license_key',
+)
+
+
+def display_name(user_row):
+    full_name = f"{user_row['first_name']} {user_row['last_name']}".strip()
+    return full_name or user_row['username']
+
+
+def summarize_asset(row):
+    physical = row['asset_type'] == 'physical'
+    return {
+        'id': row['id'],
+        'type': row['asset_type'],
+        'status': 'In Service' if row['status'] == 'in_service' else 'Out for Repair',
+        'title': f"{row['manufacturer']} {row['model']}".strip() if physical else row['product_name'],
+        'identifier': row['asset_tag'] if physical else row['license_key'],
+    }
+
+
+def who_has_what(after=None, limit=DEFAULT_USERS_PER_PAGE, role=None, assets_per_user=ASSETS_PER_USER):
+    """
+    Return ``(entries, next_after)`` for one page of users.
+
+    Each entry has the user's id, username, name, asset counts and up to
+    ``assets_per_user`` of their newest assets. ``next_after`` is the last
+    user id on the page, or None when there are no more users.
+    """
+    users = User.objects.order_by('id')
+    if after is not None:
+        users = users.filter(id__gt=after)
+    if role == 'user':
+        # Users without a profile get the model's default role
+        users = users.filter(Q(profile__role=role) | Q(profile__isnull=True))
+    elif role:
+        users = users.filter(profile__role=role)
+
+    # Grouping before the LIMIT would aggregate every user; page first.
+    page = list(users.values('id', 'username', 'first_name', 'last_name')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    counts = {row['id']: {'in_service': 0, 'out_repair': 0} for row in page}
+    grouped = Asset.objects.filter(assigned_to_id__in=list(counts)).order_by().values(
+        'assigned_to_id', 'status').annotate(n=Count('id'))
+    for row in grouped:
+        counts[row['assigned_to_id']][row['status']] = row['n']
+
+    summaries = {row['id']: [] for row in page}
+    with_assets = [user_id for user_id, by_status in counts.items() if any(by_status.values())]
+    if with_assets and assets_per_user:
+        newest = Asset.objects.filter(assigned_to_id__in=with_assets).annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=F('assigned_to_id'),
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(rank__lte=assets_per_user).order_by(
+            'assigned_to_id', '-created_at', '-id').values(*SUMMARY_FIELDS)
+        for row in newest:
+            summaries[row['assigned_to_id']].append(summarize_asset(row))
+
+    entries = [
+        {
+            'userId': row['id'],
+            'username': row['username'],
+            'name': display_name(row),
+            'total': sum(counts[row['id']].values()),
+            'inService': counts[row['id']]['in_service'],
+            'outRepair': counts[row['id']]['out_repair'],
+            'assets': summaries[row['id']],
+        }
+        for row in page
+    ]
+    next_after = page[-1]['id'] if has_more else None
+    return entries, next_after
@@ -0,0 +1,220 @@
+"""
+Versioned cache of serialized read-endpoint responses.
+
+Response bodies are cached as bytes under a key made of the view, the
+request path and query string, the caller's role and the generation of
+every collection the response is built from (see ``assets/versions.py``).
+Any write to those tables bumps a generation, whether it came from the API,
+the admin or a bulk path, so stale entries are never looked up again and
+simply age out; nothing has to be deleted on write.
+
+Concurrent misses for the same key are coalesced by ``singleflight``, so
+a burst of identical requests runs the view once.
+
+Entries live in a small in-process LRU in front of a Django cache backend
+(``RESPONSE_CACHE_ALIAS``), so hot pages are served without unpickling
+while the local-memory or file-based backend shares entries between
+workers and across restarts.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .models import UserProfile
+from .singleflight import process_lock, single_flight
+from .versions import arequest_generations, request_generations, versioning_available
+
+
+class ResponseCache:
+    """LRU of response bodies in front of a Django cache backend"""
+
+    def __init__(self, alias='default', timeout=300, local_entries=256):
+        self.alias = alias
+        self.timeout = timeout
+        self.local_entries = local_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _remember(self, key, entry):
+        if not self.local_entries:
+            return
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, key):
+        """Return the cached ``(content_type, body)`` for ``key``, or None"""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                self._stats['local_hits'] += 1
+                return entry
+
+        entry = self.backend.get(key)
+        if entry is None:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        with self._lock:
+            self._stats['shared_hits'] += 1
+        self._remember(key, entry)
+        return entry
+
+    async def aget(self, key):
+        """``get`` for async views; only the shared backend lookup awaits"""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                self._stats['local_hits'] += 1
+                return entry
+
+        entry = await self.backend.aget(key)
+        with self._lock:
+            self._stats['misses' if entry is None else 'shared_hits'] += 1
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    async def aset(self, key, content_type, body):
+        entry = (content_type, body)
+        await self.backend.aset(key, entry, self.timeout)
+        self._remember(key, entry)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def set(self, key, content_type, body):
+        entry = (content_type, body)
+        self.backend.set(key, entry, self.timeout)
+        self._remember(key, entry)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def clear(self):
+        """Drop the in-process entries and counters (the shared backend is left alone)"""
+        with self._lock:
+            self._local.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+        hits = stats['local_hits'] + stats['shared_hits']
+        lookups = hits + stats['misses']
+        stats['hit_ratio'] = hits / lookups if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__
+        return stats
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+    local_entries=getattr(settings, 'RESPONSE_CACHE_LOCAL_ENTRIES', 256),
+)
+
+
+def role_scope(request):
+    """The part of the caller's identity a response may depend on"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    profile = getattr(user, 'profile', None)
+    return profile.role if profile is not None else 'user'
+
+
+async def arole_scope(request):
+    """``role_scope`` for async views, which must not load the user lazily"""
+    user = await request.auser() if hasattr(request, 'auser') else None
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    role = await UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).afirst()
+    return role or 'user'
+
+
+def cache_key(request, view_name, generation_values, scope):
+    query = sorted(request.GET.lists())
+    digest = hashlib.sha1(repr((request.path, query)).encode()).hexdigest()
+    generation = '.'.join(str(value) for value in generation_values)
+    return f'response:{view_name}:{scope}:{generation}:{digest}'
+
+
+def cached_response(*collections, unless=None):
+    """
+    Serve successful GET responses of the decorated view from the cache.
+
+    ``collections`` names every collection the response is built from.
+    ``unless(request)`` may exclude requests from caching, for instance
+    ones that stream their response. Async views are cached the same way
+    but are not coalesced.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_cached(view, collections, unless)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if (request.method != 'GET' or not versioning_available()
+                    or (unless is not None and unless(request))):
+                return view(request, *args, **kwargs)
+
+            key = cache_key(request, view.__name__, request_generations(request, collections),
+                            role_scope(request))
+            entry = response_cache.get(key)
+            if entry is not None:
+                content_type, body = entry
+                return HttpResponse(body, content_type=content_type)
+
+            def compute():
+                with process_lock(key) as locked:
+                    # Another worker may have filled it while we waited
+                    entry = response_cache.get(key) if locked else None
+                    if entry is not None:
+                        return (200,) + entry
+                    response = view(request, *args, **kwargs)
+                    if response.status_code == 200:
+                        response_cache.set(key, response['Content-Type'], response.content)
+                    return response.status_code, response['Content-Type'], response.content
+
+            # Concurrent identical misses share one computation
+            status, content_type, body = single_flight.do(key, compute)
+            return HttpResponse(body, content_type=content_type, status=status)
+        return wrapped
+    return decorator
+
+
+def _async_cached(view, collections, unless):
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        if (request.method != 'GET' or not versioning_available()
+                or (unless is not None and unless(request))):
+            return await view(request, *args, **kwargs)
+
+        key = cache_key(request, view.__name__, await arequest_generations(request, collections),
+                        await arole_scope(request))
+        entry = await response_cache.aget(key)
+        if entry is not None:
+            content_type, body = entry
+            return HttpResponse(body, content_type=content_type)
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            await response_cache.aset(key, response['Content-Type'], response.content)
+        return response
+    return wrapped
@@ -0,0 +1,96 @@
+"""
+Optimistic concurrency for single-asset API updates.
+
+Every asset carries a ``revision`` that each write moves on (``Asset.save``,
+bulk updates and ``update_asset`` all increment it in SQL). Clients send
+back the revision they read, and ``update_asset`` applies their change with
+one statement:
+
+    UPDATE assets_asset SET <sent columns>, updated_at = ?, revision = revision + 1
+    WHERE id = ? AND revision = ? AND (<sent column> IS NOT ? OR ...)
+    RETURNING revision
+
+An edit based on a stale read is refused instead of silently overwriting a
+colleague's change, and a PUT that matches the stored row writes nothing,
+so its revision, ``updated_at`` and collection generation stay put. Only
+when no row comes back is the asset read again to tell a missing asset, a
+conflict and a no-op apart. RETURNING cannot see the old row, so the audit
+entry records the values that were sent.
+"""
+from django.db import connections, router
+from django.utils import timezone
+
+from .audit import record_on_commit
+from .models import Asset
+
+
+class RevisionConflict(Exception):
+    """The asset was changed after the client read it"""
+
+    def __init__(self, current):
+        super().__init__(f'Asset was changed by someone else since revision was read (now at {current})')
+        self.current = current
+
+
+def parse_revision(value):
+    """The client's revision, or None if it sent none. Raises ValueError."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError('revision must be an integer')
+    revision = int(value)
+    if revision < 1:
+        raise ValueError('revision must be at least 1')
+    return revision
+
+
+def update_asset(asset_id, values, revision=None):
+    """
+    Write ``{field: value}`` to one asset if it is still at ``revision``
+    (unconditionally when None) and return the new revision. Returns the
+    current revision without writing when nothing would change.
+
+    Raises ``Asset.DoesNotExist`` or ``RevisionConflict``.
+    """
+    connection = connections[router.db_for_write(Asset)]
+    quote = connection.ops.quote_name
+    meta = Asset._meta
+    fields = [meta.get_field(name) for name in values]
+    assignments = [f'{quote(field.column)} = %s' for field in fields]
+    params = [field.get_db_prep_save(values[field.name], connection) for field in fields]
+
+    updated_at = meta.get_field('updated_at')
+    assignments.append(f'{quote(updated_at.column)} = %s')
+    params.append(updated_at.get_db_prep_save(timezone.now(), connection))
+    revision_column = quote(meta.get_field('revision').column)
+    assignments.append(f'{revision_column} = {revision_column} + 1')
+
+    sql = f'UPDATE {quote(meta.db_table)} SET {", ".join(assignments)} WHERE {quote(meta.pk.column)} = %s'
+    params.append(asset_id)
+    if revision is not None:
+        sql += f' AND {revision_column} = %s'
+        params.append(revision)
+
+    row = None
+    if fields:
+        # Match no row when every sent value is already stored (IS NOT is NULL-safe)
+        sql += ' AND ({})'.format(' OR '.join(f'{quote(field.column)} IS NOT %s' for field in fields))
+        params.extend(params[:len(fields)])
+        sql += f' RETURNING {revision_column}'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    if row is None:
+        current = (Asset.objects.using(connection.alias).filter(id=asset_id)
+                   .values_list('revision', flat=True).first())
+        if current is None:
+            raise Asset.DoesNotExist('Asset not found')
+        if revision is not None and revision != current:
+            raise RevisionConflict(current)
+        return current
+
+    new_revision = row[0]
+    changes = {field.attname: [None, values[field.name]] for field in fields}
+    changes['revision'] = [new_revision - 1, new_revision]
+    record_on_commit(asset_id, 'updated', changes)
+    return new_revision
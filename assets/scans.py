@@ -0,0 +1,168 @@
+"""
+Barcode scan ingestion for warehouse handhelds.
+
+Handhelds post batches of ``{scanId, assetTag, action, location, timestamp}``.
+``ingest_scans`` validates them and applies them ``SCAN_BATCH_SIZE`` at a
+time, each chunk in one write transaction that runs the same handful of
+statements however many scans it holds:
+
+1. the chunk's scan ids that are already stored (unique index on scan_id)
+2. the assets carrying the scanned tags, with their locations (asset_tag_idx)
+3. the newest scan already stored for each of them (scan_asset_time_idx)
+4. bulk INSERTs of the new scan events
+5. one batched UPDATE moving each asset to the location of its newest scan
+
+A scan id that was stored before is reported as a duplicate and not applied
+again, so a handheld that lost a response can simply send the batch again.
+Scans older than one already stored for the asset are kept but do not move
+it, so batches may arrive out of order.
+"""
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .audit import record_many_on_commit
+from .db import run_write
+from .models import Asset, ScanEvent
+
+
+ACTIONS = {value for value, label in ScanEvent.ACTION_CHOICES}
+
+
+def _update_location_sql(connection):
+    """``UPDATE`` of one asset's location, bumping ``updated_at`` and ``revision``"""
+    quote = connection.ops.quote_name
+    meta = Asset._meta
+    location, updated_at, revision = (quote(meta.get_field(name).column)
+                                      for name in ('location', 'updated_at', 'revision'))
+    return (f'UPDATE {quote(meta.db_table)} SET {location} = %s, {updated_at} = %s, '
+            f'{revision} = {revision} + 1 WHERE {quote(meta.pk.column)} = %s')
+
+
+def clean_scan(scan):
+    """Validate one scan and return model field values. Raises ValueError."""
+    if not isinstance(scan, dict):
+        raise ValueError('scan must be an object')
+    scan_id = str(scan.get('scanId') or '').strip()
+    if not scan_id or len(scan_id) > 64:
+        raise ValueError('scanId is required (at most 64 characters)')
+    asset_tag = str(scan.get('assetTag') or '').strip()
+    if not asset_tag or len(asset_tag) > 50:
+        raise ValueError('assetTag is required (at most 50 characters)')
+    action = str(scan.get('action') or '').strip().lower().replace('-', '_').replace(' ', '_')
+    if action not in ACTIONS:
+        raise ValueError(f"action must be one of {', '.join(sorted(ACTIONS))}")
+    location = str(scan.get('location') or '').strip()
+    if len(location) > 200:
+        raise ValueError('location is at most 200 characters')
+
+    timestamp = scan.get('timestamp')
+    if timestamp:
+        scanned_at = parse_datetime(str(timestamp))
+        if scanned_at is None:
+            raise ValueError(f'timestamp is not an ISO 8601 date and time: {timestamp!r}')
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at, dt_timezone.utc)
+    else:
+        scanned_at = timezone.now()
+
+    return {'scan_id': scan_id, 'asset_tag': asset_tag, 'action': action, 'location': location,
+            'scanned_at': scanned_at}
+
+
+def _apply_chunk(scans):
+    """
+    Store and apply one chunk of cleaned scans in one transaction.
+    Returns ``{scan_id: (result, asset_id)}``.
+    """
+    outcomes = {}
+    with transaction.atomic():
+        stored = set(ScanEvent.objects.filter(scan_id__in=[scan['scan_id'] for scan in scans])
+                     .values_list('scan_id', flat=True))
+        fresh = []
+        for scan in scans:
+            if scan['scan_id'] in stored:
+                outcomes[scan['scan_id']] = ('duplicate', None)
+            else:
+                fresh.append(scan)
+
+        assets_by_tag = {}
+        locations = {}
+        for asset_id, tag, location in Asset.objects.filter(
+                asset_tag__in={scan['asset_tag'] for scan in fresh}).values_list('id', 'asset_tag', 'location'):
+            assets_by_tag.setdefault(tag, []).append(asset_id)
+            locations[asset_id] = location
+        latest = dict(ScanEvent.objects.filter(asset_id__in=list(locations)).values('asset_id')
+                      .annotate(latest=Max('scanned_at')).values_list('asset_id', 'latest'))
+
+        events = []
+        moves = {}
+        for scan in fresh:
+            matches = assets_by_tag.get(scan['asset_tag'], [])
+            asset_id = matches[0] if len(matches) == 1 else None
+            if asset_id is None:
+                outcomes[scan['scan_id']] = ('ambiguousTag' if matches else 'unknownTag', None)
+            else:
+                outcomes[scan['scan_id']] = ('applied', asset_id)
+                newest = latest.get(asset_id)
+                if scan['location'] and (newest is None or scan['scanned_at'] > newest):
+                    latest[asset_id] = scan['scanned_at']
+                    moves[asset_id] = scan['location']
+            events.append(ScanEvent(asset_id=asset_id, **scan))
+        ScanEvent.objects.bulk_create(events)
+
+        changes = {asset_id: {'location': [locations[asset_id], location]}
+                   for asset_id, location in moves.items() if location != locations[asset_id]}
+        if changes:
+            connection = connections[router.db_for_write(Asset)]
+            updated_at = Asset._meta.get_field('updated_at').get_db_prep_save(timezone.now(), connection)
+            with connection.cursor() as cursor:
+                cursor.executemany(_update_location_sql(connection), [
+                    (asset_changes['location'][1], updated_at, asset_id)
+                    for asset_id, asset_changes in changes.items()
+                ])
+            record_many_on_commit('updated', changes)
+    return outcomes
+
+
+def ingest_scans(scans, batch_size=None):
+    """
+    Validate, store and apply a list of API scans in chunks of
+    ``batch_size``. Returns one ``{scanId, result[, assetId | error]}`` per
+    scan, in order; result is ``applied``, ``duplicate``, ``unknownTag``,
+    ``ambiguousTag`` or ``invalid``.
+    """
+    batch_size = batch_size or getattr(settings, 'SCAN_BATCH_SIZE', 500)
+    results = []
+    cleaned = []
+    seen = set()
+    for scan in scans:
+        try:
+            values = clean_scan(scan)
+        except ValueError as e:
+            scan_id = scan.get('scanId') if isinstance(scan, dict) else None
+            results.append({'scanId': scan_id, 'result': 'invalid', 'error': str(e)})
+            continue
+        if values['scan_id'] in seen:
+            # Repeated within the request; only the first copy is applied
+            results.append({'scanId': values['scan_id'], 'result': 'duplicate'})
+            continue
+        seen.add(values['scan_id'])
+        results.append({'scanId': values['scan_id']})
+        cleaned.append(values)
+
+    outcomes = {}
+    for start in range(0, len(cleaned), batch_size):
+        outcomes.update(run_write(_apply_chunk, cleaned[start:start + batch_size]))
+
+    for result in results:
+        if 'result' not in result:
+            outcome, asset_id = outcomes[result['scanId']]
+            result['result'] = outcome
+            if asset_id is not None:
+                result['assetId'] = asset_id
+    return results
@@ -0,0 +1,161 @@
+"""
+Server-side search over assets and support tickets.
+
+On SQLite this queries the ``assets_searchindex`` FTS5 table, which
+triggers keep in sync with ``assets_asset`` and ``assets_supportticket``
+(see migration 0002). Other backends fall back to a LIKE scan over assets.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Asset, SupportTicket
+
+
+SEARCH_TABLE = 'assets_searchindex'
+
+# bm25() column weights for (identifiers, title, body). A hit on an asset
+# tag or serial number outranks one buried in repair notes.
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+
+KINDS = ('asset', 'ticket')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _connection():
+    # Raw SQL bypasses the router; ask it which database reads go to
+    return connections[router.db_for_read(Asset)]
+
+
+def fts_available():
+    return _connection().vendor == 'sqlite'
+
+
+def build_match_expression(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so user input can never be
+    parsed as FTS syntax and "ast-00" still matches "AST-005".
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def matching_asset_ids(query):
+    """
+    Return an expression usable as ``id__in=`` for assets matching ``query``,
+    or None if the query has no searchable words.
+
+    Lets querysets such as the admin changelist reuse the FTS index instead
+    of a multi-column LIKE scan.
+    """
+    expression = build_match_expression(query)
+    if expression is None:
+        return None
+    return RawSQL(
+        "SELECT rowid / 2 FROM {table} WHERE {table} MATCH %s AND kind = 'asset'".format(
+            table=SEARCH_TABLE),
+        [expression],
+    )
+
+
+def filter_matching_assets(queryset, query):
+    """
+    Narrow an asset queryset to the assets matching ``query``: through the
+    FTS index on SQLite, with a LIKE over the same columns elsewhere.
+    """
+    if not fts_available():
+        return queryset.filter(_like_filter(query.strip()))
+    matches = matching_asset_ids(query)
+    if matches is None:
+        return queryset.none()
+    return queryset.filter(id__in=matches)
+
+
+def search(query, kind=None, limit=20, offset=0):
+    """
+    Return ``(hits, has_more)`` for ``query``, best match first.
+
+    Each hit is a dict with ``kind``, ``id``, ``assetId``, ``title``,
+    ``snippet`` and ``score`` (lower bm25 scores rank higher).
+    """
+    if not fts_available():
+        return _like_search(query, kind, limit, offset)
+
+    expression = build_match_expression(query)
+    if expression is None:
+        return [], False
+
+    sql = (
+        "SELECT kind, ref_id, asset_id, bm25({table}, 0, 0, 0, %s, %s, %s) AS score, "
+        "snippet({table}, -1, '[', ']', '...', 10) "
+        "FROM {table} WHERE {table} MATCH %s"
+    ).format(table=SEARCH_TABLE)
+    params = list(COLUMN_WEIGHTS) + [expression]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    sql += ' ORDER BY score LIMIT %s OFFSET %s'
+    params += [limit + 1, offset]
+
+    with _connection().cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    asset_ids = [ref_id for kind_, ref_id, *_ in rows if kind_ == 'asset']
+    ticket_ids = [ref_id for kind_, ref_id, *_ in rows if kind_ == 'ticket']
+    titles = {('asset', a['id']): _asset_title(a) for a in Asset.objects.filter(
+        id__in=asset_ids).values('id', 'asset_type', 'manufacturer', 'model', 'product_name')}
+    titles.update({('ticket', t['id']): t['title'] for t in SupportTicket.objects.filter(
+        id__in=ticket_ids).values('id', 'title')})
+
+    hits = [
+        {
+            'kind': kind_,
+            'id': ref_id,
+            'assetId': asset_id,
+            'title': titles.get((kind_, ref_id), ''),
+            'snippet': snippet,
+            'score': round(score, 4),
+        }
+        for kind_, ref_id, asset_id, score, snippet in rows
+    ]
+    return hits, has_more
+
+
+def _asset_title(row):
+    if row['asset_type'] == 'physical':
+        return f"{row['manufacturer']} {row['model']}".strip()
+    return row['product_name']
+
+
+def _like_filter(term):
+    return (
+        Q(manufacturer__icontains=term) | Q(model__icontains=term)
+        | Q(product_name__icontains=term) | Q(asset_tag__icontains=term)
+        | Q(serial_number__icontains=term) | Q(repair_notes__icontains=term)
+    )
+
+
+def _like_search(query, kind, limit, offset):
+    if kind == 'ticket' or not (query or '').strip():
+        return [], False
+
+    rows = list(
+        Asset.objects.filter(_like_filter(query.strip())).values('id', 'asset_type', 'manufacturer', 'model', 'product_name')[offset:offset + limit + 1]
+    )
+    hits = [
+        {'kind': 'asset', 'id': row['id'], 'assetId': row['id'], 'title': _asset_title(row),
+         'snippet': '', 'score': 0}
+        for row in rows[:limit]
+    ]
+    return hits, len(rows) > limit
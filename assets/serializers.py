@@ -0,0 +1,123 @@
+"""
+Serialization helpers for the asset list API.
+
+The list endpoints read plain column tuples through ``values()`` instead of
+building full ``Asset`` instances, and pull the assignee's username through
+the join so every page is a single query.
+"""
+
+# Columns needed to build a list payload. ``created_at`` is only used for
+# the pagination cursor.
+ASSET_LIST_FIELDS = (
+    'id',
+    'asset_type',
+    'status',
+    'assigned_to_id',
+    'assigned_to__username',
+    'date_in_service',
+    'created_at',
+    'repair_notes',
+    'manufacturer',
+    'model',
+    'serial_number',
+    'asset_tag',
+    'location',
+    'product_name',
+    'license_key',
+    'version',
+    'renewal_date',
+    'revision',
+)
+
+
+def asset_list_values(queryset):
+    """Restrict an Asset queryset to the list projection"""
+    return queryset.values(*ASSET_LIST_FIELDS)
+
+
+def asset_sync_values(queryset):
+    """List projection plus ``change_seq``, which sync tokens are built from"""
+    return queryset.values(*ASSET_LIST_FIELDS, 'change_seq')
+
+
+# Keys of serialize_asset_row present for both physical and digital assets
+COMMON_KEYS = ('id', 'type', 'status', 'assigneeId', 'assigneeName', 'dateInService', 'repairNotes', 'revision')
+
+
+def serialize_asset_row(row):
+    """Convert one ``asset_list_values`` row into the API's JSON shape"""
+    asset_dict = {
+        'id': row['id'],
+        'type': row['asset_type'],
+        'status': 'In Service' if row['status'] == 'in_service' else 'Out for Repair',
+        'assigneeId': row['assigned_to_id'],
+        'assigneeName': row['assigned_to__username'] or 'Unassigned',
+        'dateInService': str(row['date_in_service']),
+        'repairNotes': row['repair_notes'],
+        'revision': row['revision'],
+    }
+
+    if row['asset_type'] == 'physical':
+        asset_dict.update({
+            'manufacturer': row['manufacturer'],
+            'model': row['model'],
+            'serialNumber': row['serial_number'] or '',
+            'assetTag': row['asset_tag'],
+            'location': row['location'],
+        })
+    else:
+        renewal_date = row['renewal_date']
+        asset_dict.update({
+            'productName': row['product_name'],
+            'licenseKey': row['license_key'],
+            'version': row['version'],
+            'renewalDate': str(renewal_date) if renewal_date else '',
+        })
+
+    return asset_dict
+
+
+# Columns with few distinct values, sent as a dictionary plus codes in the
+# columnar format
+DICTIONARY_COLUMNS = {
+    'type', 'status', 'assigneeId', 'assigneeName', 'dateInService',
+    'manufacturer', 'model', 'location', 'productName', 'version',
+}
+
+
+def _encode_column(key, values):
+    if key not in DICTIONARY_COLUMNS:
+        return values
+    codes = {}
+    encoded = [codes.setdefault(value, len(codes)) for value in values]
+    return {'dictionary': list(codes), 'codes': encoded}
+
+
+def serialize_columnar(rows):
+    """
+    ``asset_list_values`` rows as the compact ``?format=columnar`` payload.
+
+    Instead of one object per asset this sends one array per field, so key
+    names appear once per page. Fields shared by every asset are under
+    ``columns``; the physical-only and digital-only fields are under
+    ``physical`` and ``digital``, with one entry per asset of that type in
+    page order. Low-cardinality fields are ``{"dictionary": [...], "codes":
+    [...]}`` with ``codes`` indexing into ``dictionary``. Decoding gives the
+    same objects as ``serialize_asset_row``.
+    """
+    common = {}
+    groups = {'physical': {}, 'digital': {}}
+    for row in rows:
+        asset = serialize_asset_row(row)
+        group = groups['physical' if row['asset_type'] == 'physical' else 'digital']
+        for key, value in asset.items():
+            columns = common if key in COMMON_KEYS else group
+            columns.setdefault(key, []).append(value)
+
+    return {
+        'format': 'columnar',
+        'length': len(rows),
+        'columns': {key: _encode_column(key, values) for key, values in common.items()},
+        **{name: {key: _encode_column(key, values) for key, values in columns.items()}
+           for name, columns in groups.items()},
+    }
@@ -0,0 +1,84 @@
+"""
+Model signal receivers that keep derived data (typeahead index, audit log,
+sync tombstones) in sync with Asset, and publish the profiler switch.
+
+Connected in ``AssetsConfig.ready()``.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .audit import AUDITED_FIELDS, field_changes, initial_values, record_many_on_commit, record_on_commit
+from .models import Asset, AssetTombstone, ProfilerSwitch
+from .profiling import publish_switch, withdraw_switch
+from .typeahead import typeahead_index
+
+
+# Sent by bulk write paths that bypass Model.save(), such as the importer.
+# Receives ``assets``: the created Asset instances, with primary keys set.
+assets_bulk_created = Signal()
+
+
+# The typeahead index is process memory, not part of the transaction:
+# change it only once the write commits, so a rollback leaves it untouched.
+
+@receiver(post_save, sender=Asset)
+def update_typeahead_on_save(sender, instance, **kwargs):
+    if typeahead_index.ready:
+        entry = (instance.id, instance.asset_tag, instance.serial_number, instance.license_key)
+        transaction.on_commit(lambda: typeahead_index.update(*entry))
+
+
+@receiver(post_delete, sender=Asset)
+def update_typeahead_on_delete(sender, instance, **kwargs):
+    if typeahead_index.ready:
+        asset_id = instance.id
+        transaction.on_commit(lambda: typeahead_index.remove(asset_id))
+
+
+@receiver(assets_bulk_created, sender=Asset)
+def update_typeahead_on_bulk_create(sender, assets, **kwargs):
+    if typeahead_index.ready:
+        entries = [(asset.id, asset.asset_tag, asset.serial_number, asset.license_key) for asset in assets]
+        transaction.on_commit(lambda: typeahead_index.update_many(entries))
+
+
+@receiver(post_save, sender=Asset)
+def audit_asset_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or loaded is None:
+        record_on_commit(instance.id, 'created' if created else 'updated', initial_values(instance))
+    else:
+        changes = field_changes(loaded, instance)
+        if changes:
+            record_on_commit(instance.id, 'updated', changes)
+    instance._loaded_values = {field: getattr(instance, field) for field in AUDITED_FIELDS}
+
+
+@receiver(post_delete, sender=Asset)
+def leave_tombstone(sender, instance, **kwargs):
+    # Runs inside the deleting transaction, so the tombstone commits with the delete
+    AssetTombstone.objects.create(asset_id=instance.id)
+
+
+@receiver(post_delete, sender=Asset)
+def audit_asset_delete(sender, instance, **kwargs):
+    changes = {field: [old, None] for field, (_, old) in initial_values(instance).items()}
+    record_on_commit(instance.id, 'deleted', changes)
+
+
+@receiver(assets_bulk_created, sender=Asset)
+def audit_bulk_create(sender, assets, **kwargs):
+    record_many_on_commit('created', {asset.id: initial_values(asset) for asset in assets})
+
+
+@receiver(post_save, sender=ProfilerSwitch)
+def publish_profiler_switch(sender, instance, **kwargs):
+    publish_switch(instance)
+
+
+@receiver(post_delete, sender=ProfilerSwitch)
+def withdraw_profiler_switch(sender, instance, **kwargs):
+    withdraw_switch()
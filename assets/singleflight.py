@@ -0,0 +1,112 @@
+"""
+Single-flight coalescing of identical in-flight computations.
+
+When many requests for the same uncached page arrive together, the first
+one (the leader) computes it and the rest (followers) wait for its result
+instead of each running the same queries against SQLite. Within a process
+this uses a dict of pending calls; across worker processes an optional
+``flock`` on a small set of lock files lets one worker compute while the
+others wait and then read the result from the shared response cache.
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process coalescing
+    fcntl = None
+
+
+# Number of lock files keys are spread over. Bounded so the lock directory
+# never grows; an occasional collision just serializes two unrelated keys.
+LOCK_STRIPES = 64
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run ``fn`` once per key at a time and share its result with waiters"""
+
+    def __init__(self, enabled=True, timeout=30.0):
+        self.enabled = enabled
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'timeouts': 0}
+
+    def do(self, key, fn):
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._stats['leaders' if leader else 'followers'] += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                # The leader is stuck; do not hold this request hostage
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+single_flight = SingleFlight(
+    enabled=getattr(settings, 'SINGLE_FLIGHT_ENABLED', True),
+    timeout=getattr(settings, 'SINGLE_FLIGHT_TIMEOUT', 30.0),
+)
+
+
+@contextmanager
+def process_lock(key, directory=None):
+    """
+    Hold an exclusive cross-process lock for ``key`` while in the block.
+
+    Yields whether a lock was taken: nothing is locked unless ``directory``
+    (default ``SINGLE_FLIGHT_LOCK_DIR``) is set and the platform has
+    ``fcntl``.
+    """
+    directory = directory or getattr(settings, 'SINGLE_FLIGHT_LOCK_DIR', None)
+    if not directory or fcntl is None:
+        yield False
+        return
+
+    stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'flight-{stripe:02d}.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,51 @@
+"""
+Dashboard statistics read from the ``AssetStatusCount`` counter table.
+
+The counters are kept current by database triggers, so reading them costs
+one query over at most (statuses x types) rows however many assets exist.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Asset, AssetStatusCount
+
+
+def asset_stats():
+    """Return dashboard totals, overall and per asset type"""
+    return _summarize(AssetStatusCount.objects.values_list('status', 'asset_type', 'count'))
+
+
+async def aasset_stats():
+    """Async twin of ``asset_stats``, for ASGI views"""
+    counts = AssetStatusCount.objects.values_list('status', 'asset_type', 'count')
+    return _summarize([row async for row in counts])
+
+
+def _summarize(counts):
+    totals = {status: 0 for status, _ in Asset.STATUS_CHOICES}
+    by_type = {
+        asset_type: {status: 0 for status, _ in Asset.STATUS_CHOICES}
+        for asset_type, _ in Asset.ASSET_TYPE_CHOICES
+    }
+    for status, asset_type, count in counts:
+        totals[status] = totals.get(status, 0) + count
+        by_type.setdefault(asset_type, {})[status] = count
+
+    return {
+        'total': sum(totals.values()),
+        'inService': totals.get('in_service', 0),
+        'outRepair': totals.get('out_repair', 0),
+        'decommissioned': totals.get('decommissioned', 0),
+        'byType': by_type,
+    }
+
+
+def rebuild_status_counts():
+    """Recount assets from scratch, e.g. after restoring a backup"""
+    counts = Asset.objects.order_by().values('status', 'asset_type').annotate(total=Count('id'))
+    with transaction.atomic():
+        AssetStatusCount.objects.all().delete()
+        AssetStatusCount.objects.bulk_create(
+            AssetStatusCount(status=row['status'], asset_type=row['asset_type'], count=row['total'])
+            for row in counts
+        )
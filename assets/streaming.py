@@ -0,0 +1,97 @@
+"""
+Streaming encoders for large asset listings.
+
+Rows are read from the database with a server-side iterator and encoded a
+block at a time, so memory stays flat no matter how many rows are sent and
+the client starts receiving data before the query has been fully read.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .pagination import seek
+from .serializers import asset_list_values, serialize_asset_row
+
+
+STREAM_CHUNK_SIZE = 2000
+
+# Rows are joined into blocks of this many before being handed to the
+# server, which keeps per-write overhead low without buffering much.
+ROWS_PER_BLOCK = 200
+
+_encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+
+def iter_asset_dicts(queryset, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Return an iterator of serialized assets in list order.
+
+    The cursor is decoded up front so a bad cursor raises before any part
+    of the response has been sent.
+    """
+    queryset = asset_list_values(seek(queryset, cursor))
+    return (serialize_asset_row(row) for row in queryset.iterator(chunk_size=chunk_size))
+
+
+def aiter_asset_dicts(queryset, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Async twin of ``iter_asset_dicts``, for ASGI views"""
+    queryset = asset_list_values(seek(queryset, cursor))
+
+    async def rows():
+        async for row in queryset.aiterator(chunk_size=chunk_size):
+            yield serialize_asset_row(row)
+    return rows()
+
+
+def _blocks(items):
+    block = []
+    for item in items:
+        block.append(_encoder.encode(item))
+        if len(block) >= ROWS_PER_BLOCK:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+async def _ablocks(items):
+    block = []
+    async for item in items:
+        block.append(_encoder.encode(item))
+        if len(block) >= ROWS_PER_BLOCK:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def ndjson_stream(items):
+    """Encode items as newline-delimited JSON"""
+    for block in _blocks(items):
+        yield '\n'.join(block) + '\n'
+
+
+def json_array_stream(items, key='assets'):
+    """Encode items as ``{"<key>": [...]}`` one block at a time"""
+    yield '{%s:[' % json.dumps(key)
+    first = True
+    for block in _blocks(items):
+        yield ('' if first else ',') + ','.join(block)
+        first = False
+    yield ']}'
+
+
+async def andjson_stream(items):
+    """``ndjson_stream`` over an async iterator"""
+    async for block in _ablocks(items):
+        yield '\n'.join(block) + '\n'
+
+
+async def ajson_array_stream(items, key='assets'):
+    """``json_array_stream`` over an async iterator"""
+    yield '{%s:[' % json.dumps(key)
+    first = True
+    async for block in _ablocks(items):
+        yield ('' if first else ',') + ','.join(block)
+        first = False
+    yield ']}'
@@ -0,0 +1,262 @@
+"""
+Synthetic inventory for benchmarks.
+
+Generates users, assets, audit-log entries and support tickets with the
+shapes that make real inventories slow: a few heavy users hold most of the
+assigned assets, most assets are in service with a tail out for repair or
+decommissioned, manufacturers and locations follow a long-tailed mix, and
+audit entries and tickets pile up on the most recently added assets.
+
+Rows are written with ``executemany`` in large transactions rather than
+through model instances, so ``created_at``/``timestamp`` history can be
+back-dated (``auto_now_add`` would overwrite it) and millions of rows take
+minutes, not hours. The database triggers (search index, status counters,
+collection versions) still fire for every row.
+"""
+import json
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Asset, AuditLog, SupportTicket, UserProfile
+
+
+DEFAULT_BATCH_SIZE = 10_000
+
+USERNAME_PREFIX = 'synth'
+
+STATUS_WEIGHTS = {'in_service': 85, 'out_repair': 10, 'decommissioned': 5}
+PHYSICAL_SHARE = 0.75
+UNASSIGNED_SHARE = 0.15
+# Exponent of the assignee draw: 1 is uniform, higher concentrates assets
+# on the first users (with 3, the top 10% of users hold about 46%)
+ASSIGNMENT_SKEW = 3.0
+ROLE_WEIGHTS = {'user': 90, 'technician': 8, 'admin': 2}
+
+HARDWARE = [
+    ('Dell', ('Latitude 5440', 'Latitude 7440', 'OptiPlex 7010', 'Precision 3581', 'U2723QE'), 30),
+    ('Lenovo', ('ThinkPad T14', 'ThinkPad X1 Carbon', 'ThinkCentre M70q'), 22),
+    ('HP', ('EliteBook 840', 'ProDesk 400', 'LaserJet M404'), 18),
+    ('Apple', ('MacBook Pro 14', 'MacBook Air 13', 'iPad Air'), 14),
+    ('Cisco', ('Catalyst 9200', 'IP Phone 8841'), 6),
+    ('Logitech', ('MX Keys', 'Rally Bar'), 5),
+    ('Zebra', ('TC52 Scanner', 'ZD421 Printer'), 3),
+    ('Ubiquiti', ('UniFi U6 Pro',), 2),
+]
+SOFTWARE = [
+    ('Microsoft 365', 30), ('Adobe Acrobat Pro', 15), ('Slack', 12), ('Zoom Workplace', 10),
+    ('JetBrains All Products', 8), ('AutoCAD', 6), ('Tableau Creator', 5), ('Windows 11 Pro', 10),
+    ('Visio Plan 2', 4),
+]
+LOCATIONS = [
+    ('HQ Floor 1', 20), ('HQ Floor 2', 18), ('HQ Floor 3', 15), ('Warehouse A', 12),
+    ('Remote', 12), ('Branch - Memphis', 8), ('Branch - Nashville', 7), ('IT Storage', 5),
+    ('Data Center', 3),
+]
+REPAIR_NOTES = [
+    'Battery swells and will not hold a charge',
+    'Cracked screen after drop, replacement panel ordered',
+    'Keyboard keys unresponsive, sent to vendor',
+    'Fan noise and thermal throttling under load',
+    'Fails POST intermittently, suspect motherboard',
+    'Port damaged, awaiting replacement part',
+]
+TICKET_TITLES = [
+    'Device will not power on', 'Screen flickering', 'License expired', 'Slow performance',
+    'Cannot connect to Wi-Fi', 'Software fails to activate', 'Peripheral not detected',
+    'Request replacement charger',
+]
+TICKET_STATUS_WEIGHTS = {'open': 15, 'in_progress': 10, 'resolved': 35, 'closed': 40}
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Johnson', 'Lee', 'Garcia', 'Brown', 'Davis', 'Martinez', 'Nguyen', 'Patel', 'Kim']
+
+HISTORY_DAYS = 3 * 365
+
+ASSET_COLUMNS = (
+    'asset_type', 'status', 'assigned_to_id', 'date_in_service', 'created_at', 'updated_at',
+    'manufacturer', 'model', 'serial_number', 'asset_tag', 'location', 'product_name',
+    'license_key', 'version', 'renewal_date', 'repair_notes',
+)
+AUDIT_COLUMNS = ('asset_id', 'user_id', 'action', 'timestamp', 'details')
+TICKET_COLUMNS = ('asset_id', 'created_by_id', 'title', 'description', 'status', 'created_at',
+                  'updated_at', 'resolved_at')
+
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return list(values), list(weights)
+
+
+def _insert_sql(model, columns):
+    quote = connection.ops.quote_name
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table), ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)))
+
+
+def _write(model, columns, rows, batch_size):
+    """Insert ``rows`` with one transaction per batch; returns the row count"""
+    sql = _insert_sql(model, columns)
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written += _flush(sql, batch)
+            batch = []
+    if batch:
+        written += _flush(sql, batch)
+    return written
+
+
+def _flush(sql, batch):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, batch)
+    return len(batch)
+
+
+def _dt(value):
+    # Adapted the way Django stores aware datetimes on this backend
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+def _date(value):
+    return connection.ops.adapt_datefield_value(value)
+
+
+def _base36(number):
+    digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+    return encoded or '0'
+
+
+class InventoryGenerator:
+    """Generate one batch of synthetic rows; ``seed`` makes runs repeatable"""
+
+    def __init__(self, seed=0, batch_size=DEFAULT_BATCH_SIZE, skew=ASSIGNMENT_SKEW, now=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.skew = skew
+        self.now = now or timezone.now()
+        self.start = self.now - timedelta(days=HISTORY_DAYS)
+        # Keeps usernames and serial numbers unique across repeated runs
+        self.run = _base36(int(self.now.timestamp() * 1000))
+
+    def users(self, count):
+        """Create ``count`` users with profiles; returns their ids, heaviest first"""
+        rng = self.rng
+        users = [
+            User(username=f'{USERNAME_PREFIX}-{self.run}-{i:07d}', password='!',
+                 first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                 date_joined=self.start)
+            for i in range(count)
+        ]
+        roles, weights = _weighted(ROLE_WEIGHTS.items())
+        ids = []
+        for i in range(0, count, self.batch_size):
+            with transaction.atomic():
+                created = User.objects.bulk_create(users[i:i + self.batch_size])
+                UserProfile.objects.bulk_create(
+                    UserProfile(user=user, role=rng.choices(roles, weights)[0]) for user in created)
+            ids.extend(user.id for user in created)
+        return ids
+
+    def _assignee(self, user_ids):
+        if not user_ids or self.rng.random() < UNASSIGNED_SHARE:
+            return None
+        return user_ids[int(len(user_ids) * self.rng.random() ** self.skew)]
+
+    def _asset_rows(self, count, user_ids):
+        rng = self.rng
+        statuses, status_weights = _weighted(STATUS_WEIGHTS.items())
+        hardware = [(maker, models) for maker, models, _ in HARDWARE]
+        hardware_weights = [weight for _, _, weight in HARDWARE]
+        products, product_weights = _weighted(SOFTWARE)
+        locations, location_weights = _weighted(LOCATIONS)
+        span = (self.now - self.start).total_seconds()
+
+        for i in range(count):
+            # Creation times grow with the id, like a real insert history
+            created = self.start + timedelta(seconds=span * (i + rng.random()) / count)
+            updated = created + (self.now - created) * rng.random() ** 4
+            status = rng.choices(statuses, status_weights)[0]
+            assignee = None if status == 'decommissioned' else self._assignee(user_ids)
+            notes = rng.choice(REPAIR_NOTES) if status == 'out_repair' else ''
+            if rng.random() < PHYSICAL_SHARE:
+                maker, models = rng.choices(hardware, hardware_weights)[0]
+                yield ('physical', status, assignee, _date(created.date()), _dt(created), _dt(updated),
+                       maker, rng.choice(models), f'SYN-{self.run}-{i:09d}', f'AT-{self.run}-{i:07d}',
+                       rng.choices(locations, location_weights)[0], '', '', '', None, notes)
+            else:
+                renewal = (created + timedelta(days=rng.randint(180, 3 * 365))).date()
+                yield ('digital', status, assignee, _date(created.date()), _dt(created), _dt(updated),
+                       '', '', None, '', '', rng.choices(products, product_weights)[0],
+                       f'KEY-{self.run}-{i:09d}', f'{rng.randint(1, 12)}.{rng.randint(0, 9)}',
+                       _date(renewal), notes)
+
+    def assets(self, count, user_ids):
+        """Create ``count`` assets; returns the new id range as (first, last)"""
+        _write(Asset, ASSET_COLUMNS, self._asset_rows(count, user_ids), self.batch_size)
+        # AUTOINCREMENT ids of one writer's inserts are consecutive
+        last = Asset.objects.aggregate(last=Max('id'))['last'] or 0
+        return last - count + 1, last
+
+    def _pick_asset(self, id_range):
+        # Later (more recently created) assets see more activity
+        first, last = id_range
+        return first + int((last - first + 1) * (1 - self.rng.random() ** 2))
+
+    def _audit_rows(self, count, id_range, user_ids):
+        rng = self.rng
+        span = (self.now - self.start).total_seconds()
+        for _ in range(count):
+            asset_id = self._pick_asset(id_range)
+            moment = self.start + timedelta(seconds=span * rng.random())
+            if rng.random() < 0.6:
+                changes = {'status': ['in_service', 'out_repair']} if rng.random() < 0.5 else \
+                    {'status': ['out_repair', 'in_service']}
+            else:
+                changes = {'repair_notes': ['', rng.choice(REPAIR_NOTES)]}
+            yield (asset_id, rng.choice(user_ids) if user_ids else None, 'updated', _dt(moment),
+                   json.dumps({'asset_id': asset_id, 'changes': changes}))
+
+    def audit_logs(self, count, id_range, user_ids):
+        return _write(AuditLog, AUDIT_COLUMNS, self._audit_rows(count, id_range, user_ids), self.batch_size)
+
+    def _ticket_rows(self, count, id_range, user_ids):
+        rng = self.rng
+        statuses, weights = _weighted(TICKET_STATUS_WEIGHTS.items())
+        span = (self.now - self.start).total_seconds()
+        for _ in range(count):
+            asset_id = self._pick_asset(id_range)
+            created = self.start + timedelta(seconds=span * rng.random())
+            status = rng.choices(statuses, weights)[0]
+            resolved = created + timedelta(hours=rng.randint(1, 240)) if status in ('resolved', 'closed') else None
+            title = rng.choice(TICKET_TITLES)
+            yield (asset_id, rng.choice(user_ids) if user_ids else None, title,
+                   f'{title}. {rng.choice(REPAIR_NOTES)}.', status, _dt(created),
+                   _dt(resolved or created), _dt(resolved) if resolved else None)
+
+    def tickets(self, count, id_range, user_ids):
+        return _write(SupportTicket, TICKET_COLUMNS, self._ticket_rows(count, id_range, user_ids), self.batch_size)
+
+
+def generate_inventory(users=1000, assets=100_000, audit_logs=200_000, tickets=20_000,
+                       seed=0, batch_size=DEFAULT_BATCH_SIZE, skew=ASSIGNMENT_SKEW):
+    """Generate a synthetic inventory and return the number of rows per table"""
+    generator = InventoryGenerator(seed=seed, batch_size=batch_size, skew=skew)
+    # With no new users, assets are spread over the existing ones
+    user_ids = generator.users(users) or list(User.objects.order_by('id').values_list('id', flat=True))
+    id_range = generator.assets(assets, user_ids)
+    created = {'users': users, 'assets': assets, 'audit_logs': 0, 'tickets': 0}
+    if assets:
+        created['audit_logs'] = generator.audit_logs(audit_logs, id_range, user_ids)
+        created['tickets'] = generator.tickets(tickets, id_range, user_ids)
+    return created
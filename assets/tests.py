@@ -1,8 +1,44 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
 from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import Asset, UserProfile, AuditLog, SupportTicket
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from . import exporting, importer, urls as asset_urls
+from .audit import AuditWriter, audit_writer
+from .bulk import bulk_update_assets
+from .db import WriteQueue, retry_on_locked
+from .middleware import ProfilerMiddleware
+from .models import (Asset, AssetStatusCount, AssetTombstone, UserProfile, AuditLog, SupportTicket, ProfilerSwitch,
+                     ScanEvent, CollectionVersion)
+from .pagination import encode_cursor, seek
+from .replica import PIN_COOKIE, ReplicaRouter, SyncLead, sync_replica
+from .metrics import request_histograms
+from .profiling import profiler_switch
+from .response_cache import ResponseCache, response_cache
+from .singleflight import SingleFlight, process_lock
+from .synthetic import generate_inventory
+from .serializers import asset_list_values, asset_sync_values
+from .typeahead import typeahead_index, warm_index
+from .views import filter_assets
 
 
 class AssetLifecycleTests(TestCase):
@@ -427,4 +463,1804 @@ class DataOnboardingTests(TestCase):
             model='MacBook',
             serial_number='SN555'
         )
-        self.assertEqual(asset.status, 'in_service')
\ No newline at end of file
+        self.assertEqual(asset.status, 'in_service')
+
+
+class AssetListPaginationTests(TestCase):
+    """
+    Tests keyset pagination and filters on the asset list API
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='test123')
+        for i in range(5):
+            Asset.objects.create(
+                asset_type='physical',
+                manufacturer='Dell',
+                model=f'Model {i}',
+                serial_number=f'PG{i:03d}',
+                asset_tag=f'PG-{i:03d}',
+                status='out_repair' if i % 2 else 'in_service',
+                assigned_to=self.user if i < 2 else None
+            )
+    
+    def test_pages_cover_every_asset_once(self):
+        """Test that following nextCursor walks the list in Meta.ordering order"""
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/api/assets/', params).json()
+            self.assertLessEqual(len(data['assets']), 2)
+            seen.extend(a['id'] for a in data['assets'])
+            cursor = data['nextCursor']
+            if not cursor:
+                break
+        
+        expected = list(Asset.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_filters_by_status_and_assignee(self):
+        """Test that list filters accept display labels and assignee IDs"""
+        data = self.client.get('/api/assets/', {'status': 'Out for Repair'}).json()
+        self.assertEqual(len(data['assets']), 2)
+        
+        data = self.client.get('/api/assets/', {'assigneeId': self.user.id}).json()
+        self.assertEqual(len(data['assets']), 2)
+        self.assertIsNone(data['nextCursor'])
+    
+    def test_invalid_cursor_is_rejected(self):
+        """Test that a tampered cursor returns a 400 error"""
+        response = self.client.get('/api/assets/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class AssetListQueryCountTests(TestCase):
+    """
+    Tests that the asset list is built from one joined column projection
+    """
+    
+    def _create_assets(self, count, start=0):
+        users = [User.objects.create_user(username=f'qc{start + i}') for i in range(count)]
+        for i, user in enumerate(users):
+            Asset.objects.create(
+                asset_type='physical' if i % 2 else 'digital',
+                manufacturer='Dell',
+                model='Laptop',
+                serial_number=f'QC{start + i:04d}',
+                product_name='Office365',
+                license_key=f'KEY-{start + i}',
+                assigned_to=user
+            )
+    
+    def test_query_count_does_not_grow_with_assets(self):
+        """Test that listing 3 or 30 assigned assets costs the same ETag lookup plus one query"""
+        self._create_assets(3)
+        with self.assertNumQueries(2):
+            small = self.client.get('/api/assets/').json()
+        
+        self._create_assets(27, start=3)
+        with self.assertNumQueries(2):
+            large = self.client.get('/api/assets/').json()
+        
+        self.assertEqual(len(small['assets']), 3)
+        self.assertEqual(len(large['assets']), 30)
+    
+    def test_assignee_name_comes_from_join(self):
+        """Test that assignee fields are filled without loading the User model"""
+        self._create_assets(1)
+        asset = self.client.get('/api/assets/').json()['assets'][0]
+        self.assertEqual(asset['assigneeName'], 'qc0')
+        self.assertEqual(asset['licenseKey'], 'KEY-0')
+
+
+class AssetListStreamingTests(TestCase):
+    """
+    Tests the streamed NDJSON and JSON-array modes of the asset list
+    """
+    
+    def setUp(self):
+        for i in range(450):
+            Asset.objects.create(
+                asset_type='physical',
+                manufacturer='Lenovo',
+                model='ThinkPad',
+                serial_number=f'ST{i:04d}',
+                status='out_repair' if i % 3 == 0 else 'in_service'
+            )
+    
+    def test_ndjson_streams_every_row(self):
+        """Test that ?format=ndjson returns one JSON object per line"""
+        response = self.client.get('/api/assets/', {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        ids = [json.loads(line)['id'] for line in lines]
+        expected = list(Asset.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+    
+    def test_json_array_stream_is_valid_json(self):
+        """Test that ?format=stream produces the same document shape as the paged list"""
+        response = self.client.get('/api/assets/', {'format': 'stream', 'status': 'Out for Repair'})
+        self.assertTrue(response.streaming)
+        
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data['assets']), 150)
+        self.assertTrue(all(a['status'] == 'Out for Repair' for a in data['assets']))
+    
+    def test_stream_rejects_bad_cursor_before_streaming(self):
+        """Test that an invalid cursor fails with 400 instead of a broken stream"""
+        response = self.client.get('/api/assets/', {'format': 'ndjson', 'cursor': '%%%'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FullTextSearchTests(TestCase):
+    """
+    Tests the FTS5-backed search endpoint and its sync triggers
+    """
+    
+    def setUp(self):
+        self.laptop = Asset.objects.create(
+            asset_type='physical',
+            manufacturer='Dell',
+            model='Latitude 7420',
+            serial_number='FTS001',
+            asset_tag='AST-005',
+            repair_notes='Hinge cracked on left side'
+        )
+        self.monitor = Asset.objects.create(
+            asset_type='physical',
+            manufacturer='Samsung',
+            model='Odyssey',
+            serial_number='FTS002',
+            asset_tag='AST-006',
+            location='Dell lab'
+        )
+        self.ticket = SupportTicket.objects.create(
+            asset=self.monitor,
+            title='Flickering display',
+            description='Screen flickers after the hinge was replaced'
+        )
+    
+    def _search(self, **params):
+        return self.client.get('/api/search/', params).json()
+    
+    def test_finds_assets_and_tickets(self):
+        """Test that repair notes and ticket descriptions are searchable"""
+        results = self._search(q='hinge')['results']
+        found = {(r['kind'], r['id']) for r in results}
+        self.assertEqual(found, {('asset', self.laptop.id), ('ticket', self.ticket.id)})
+        
+        ticket_hit = next(r for r in results if r['kind'] == 'ticket')
+        self.assertEqual(ticket_hit['assetId'], self.monitor.id)
+    
+    def test_identifier_match_ranks_first(self):
+        """Test that a manufacturer match outranks a location mention"""
+        results = self._search(q='dell', kind='asset')['results']
+        self.assertEqual([r['id'] for r in results], [self.laptop.id, self.monitor.id])
+    
+    def test_prefix_match_on_asset_tag(self):
+        """Test that partial asset tags match"""
+        results = self._search(q='AST-00')['results']
+        self.assertEqual(len([r for r in results if r['kind'] == 'asset']), 2)
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the triggers keep the index in sync with the tables"""
+        self.laptop.repair_notes = 'Battery swollen'
+        self.laptop.save()
+        self.assertEqual(self._search(q='battery')['results'][0]['id'], self.laptop.id)
+        self.assertEqual(self._search(q='cracked')['results'], [])
+        
+        self.monitor.delete()
+        self.assertEqual(self._search(q='flickering')['results'], [])
+    
+    def test_pagination(self):
+        """Test that results are paged with hasMore"""
+        first = self._search(q='ast', limit=1)
+        second = self._search(q='ast', limit=1, page=2)
+        self.assertTrue(first['hasMore'])
+        self.assertFalse(second['hasMore'])
+        self.assertNotEqual(first['results'][0]['id'], second['results'][0]['id'])
+    
+    def test_fts_syntax_is_not_interpreted(self):
+        """Test that FTS operators in user input do not raise errors"""
+        response = self.client.get('/api/search/', {'q': 'dell" OR NEAR(*'})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class TypeaheadIndexTests(TestCase):
+    """
+    Tests the in-memory prefix index behind the typeahead endpoint
+    """
+    
+    def setUp(self):
+        self.laptop = Asset.objects.create(
+            asset_type='physical',
+            manufacturer='Dell',
+            serial_number='CN0X42',
+            asset_tag='AST-100'
+        )
+        self.license = Asset.objects.create(
+            asset_type='digital',
+            product_name='Office365',
+            license_key='ast-lic-9'
+        )
+        warm_index()
+        self.addCleanup(typeahead_index.clear)
+        self.addCleanup(audit_writer.flush)
+    
+    def _lookup(self, q):
+        return self.client.get('/api/assets/typeahead/', {'q': q}).json()['matches']
+    
+    def test_prefix_lookup_is_case_insensitive(self):
+        """Test that tags and license keys share one normalized key space"""
+        matches = self._lookup('ast-')
+        self.assertEqual({m['id'] for m in matches}, {self.laptop.id, self.license.id})
+        self.assertEqual(self._lookup('cn0')[0], {'id': self.laptop.id, 'field': 'serialNumber', 'value': 'CN0X42'})
+    
+    def test_index_follows_save_and_delete(self):
+        """Test that saves replace old keys and deletes drop them"""
+        self.laptop.asset_tag = 'BENCH-7'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.laptop.save()
+        self.assertEqual([m['id'] for m in self._lookup('ast-')], [self.license.id])
+        self.assertEqual(self._lookup('bench')[0]['id'], self.laptop.id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.license.delete()
+        self.assertEqual(self._lookup('ast-'), [])
+    
+    def test_rolled_back_writes_leave_index_alone(self):
+        """Test that the index only changes once the write commits"""
+        expected = {self.laptop.id, self.license.id}
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Asset.objects.create(asset_type='physical', serial_number='GHOST-1', asset_tag='GHOST')
+                self.license.delete()
+                raise RuntimeError('roll back')
+        self.assertEqual(self._lookup('ghost'), [])
+        self.assertEqual({m['id'] for m in self._lookup('ast-')}, expected)
+    
+    def test_lookup_does_not_query_database(self):
+        """Test that a warmed index answers without SQL"""
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self._lookup('a')), 2)
+
+
+class BulkImportTests(TestCase):
+    """
+    Tests the chunked CSV/JSONL import pipeline
+    """
+    
+    CSV_DATA = (
+        'type,manufacturer,model,serialNumber,assetTag,status\n'
+        'physical,Dell,Latitude,IMP001,T-1,In Service\n'
+        'physical,HP,EliteBook,IMP002,T-2,out_repair\n'
+        'physical,HP,EliteBook,IMP002,T-3,in_service\n'
+        'gadget,Acme,Widget,IMP003,T-4,in_service\n'
+        '\n'
+        'physical,Apple,MacBook,EXISTING,T-5,in_service\n'
+        'physical,Lenovo,ThinkPad,IMP004,T-6,in_service\n'
+    )
+    
+    def setUp(self):
+        Asset.objects.create(asset_type='physical', manufacturer='Apple', serial_number='EXISTING')
+    
+    def _import_csv(self, **kwargs):
+        stream = io.StringIO(self.CSV_DATA)
+        return importer.import_assets(stream, input_format='csv', chunk_size=2, **kwargs)
+    
+    def test_csv_import_reports_rejected_lines(self):
+        """Test that valid rows are created and bad rows are reported by line"""
+        errors = io.StringIO()
+        result = self._import_csv(error_writer=csv.writer(errors))
+        
+        self.assertEqual(result['created'], 3)
+        self.assertEqual([e['line'] for e in result['errors']], [4, 5, 7])
+        self.assertIn('serial_number', result['errors'][0]['error'])
+        self.assertEqual(len(errors.getvalue().splitlines()), 3)
+        self.assertEqual(Asset.objects.get(serial_number='IMP002').status, 'out_repair')
+    
+    def test_row_by_row_fallback_records_each_asset_once(self):
+        """Test that rows retried one by one after a collision get a single created audit entry"""
+        rows = [
+            (1, {'asset_type': 'physical', 'manufacturer': 'Dell', 'serial_number': 'FALLBACK-1'}),
+            (2, {'asset_type': 'physical', 'manufacturer': 'Apple', 'serial_number': 'EXISTING'}),
+        ]
+        errors = []
+        with override_settings(AUDIT_LOG_BACKGROUND=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                created = importer._write_chunk(rows, errors, batch_size=10)
+            audit_writer.flush()
+        
+        self.assertEqual([asset.serial_number for asset in created], ['FALLBACK-1'])
+        self.assertEqual([line for line, _ in errors], [2])
+        self.assertEqual(list(AuditLog.objects.filter(asset=created[0]).values_list('action', flat=True)),
+                         ['created'])
+    
+    def test_parallel_parsing_matches_inline(self):
+        """Test that the process pool path produces the same result"""
+        result = self._import_csv(workers=2)
+        self.assertEqual(result['created'], 3)
+        self.assertEqual(result['failed'], 3)
+    
+    def test_jsonl_upload_endpoint(self):
+        """Test importing JSON Lines through the API"""
+        user = User.objects.create_user(username='importee')
+        body = '\n'.join([
+            json.dumps({'type': 'digital', 'productName': 'Office365', 'licenseKey': 'K-1',
+                        'assigneeId': user.id, 'renewalDate': '2026-01-31'}),
+            json.dumps({'type': 'digital', 'productName': 'Slack', 'assigneeId': 999999}),
+            'not json',
+        ])
+        upload = SimpleUploadedFile('assets.jsonl', body.encode())
+        data = self.client.post('/api/assets/import/', {'file': upload}).json()
+        
+        self.assertTrue(data['success'])
+        self.assertEqual(data['created'], 1)
+        self.assertEqual([e['line'] for e in data['errors']], [2, 3])
+        self.assertEqual(user.assets.get().renewal_date, date(2026, 1, 31))
+
+
+class InventoryExportTests(TestCase):
+    """
+    Tests streaming CSV/NDJSON/gzip exports
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter')
+        for i in range(7):
+            asset = Asset.objects.create(
+                asset_type='physical',
+                manufacturer='Dell',
+                model='Optiplex',
+                serial_number=f'EXP{i}',
+                assigned_to=self.user if i % 2 else None
+            )
+            SupportTicket.objects.create(asset=asset, created_by=self.user,
+                                         title=f'Ticket {i}', description='Line one\nline two')
+    
+    def test_csv_export_endpoint_streams_all_rows(self):
+        """Test that the CSV export has a header plus one row per asset"""
+        response = self.client.get('/api/export/assets/')
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="assets.csv"', response['Content-Disposition'])
+        
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'asset_type', 'status'])
+        self.assertEqual(len(rows), 8)
+    
+    def test_keyset_chunks_do_not_skip_rows(self):
+        """Test that reading in small chunks returns every row once"""
+        ids = [row[0] for row in exporting.iter_table_rows('assets', chunk_size=3)]
+        self.assertEqual(ids, list(Asset.objects.order_by('pk').values_list('pk', flat=True)))
+    
+    def test_gzip_ndjson_export(self):
+        """Test that gzipped NDJSON decompresses to one ticket per line"""
+        response = self.client.get('/api/export/tickets/', {'format': 'ndjson', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        tickets = [json.loads(line) for line in lines]
+        self.assertEqual(len(tickets), 7)
+        self.assertEqual(tickets[0]['description'], 'Line one\nline two')
+    
+    def test_unknown_table_is_rejected(self):
+        """Test that only whitelisted tables can be exported"""
+        self.assertEqual(self.client.get('/api/export/auth_user/').status_code, 400)
+    
+    def test_export_command_writes_files(self):
+        """Test the export_inventory management command"""
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command('export_inventory', '--output-dir', output_dir, '--format', 'ndjson',
+                         '--gzip', stdout=io.StringIO())
+            self.assertEqual(sorted(os.listdir(output_dir)),
+                             ['assets.ndjson.gz', 'audit_logs.ndjson.gz', 'tickets.ndjson.gz'])
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class AuditWriterTests(TestCase):
+    """
+    Tests that asset changes are captured and written in batches
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='tech1')
+        self.addCleanup(audit_writer.flush)
+    
+    def _details(self, log):
+        return json.loads(log.details)
+    
+    def test_create_update_delete_are_recorded_with_diffs(self):
+        """Test that each change becomes one AuditLog row after flushing"""
+        with self.captureOnCommitCallbacks(execute=True):
+            asset = Asset.objects.create(asset_type='physical', manufacturer='Dell', serial_number='AUD1')
+        with self.captureOnCommitCallbacks(execute=True):
+            asset = Asset.objects.get(id=asset.id)
+            asset.status = 'out_repair'
+            asset.assigned_to = self.user
+            asset.save()
+        asset_id = asset.id
+        with self.captureOnCommitCallbacks(execute=True):
+            asset.delete()
+        
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(audit_writer.flush(), 3)
+        
+        logs = list(AuditLog.objects.order_by('timestamp', 'id'))
+        self.assertEqual([log.action for log in logs], ['created', 'updated', 'deleted'])
+        self.assertEqual(self._details(logs[1])['changes'], {
+            'status': ['in_service', 'out_repair'],
+            'assigned_to_id': [None, self.user.id],
+        })
+        # The asset is gone, but its entries keep the id
+        self.assertTrue(all(log.asset_id is None for log in logs))
+        self.assertTrue(all(self._details(log)['asset_id'] == asset_id for log in logs))
+    
+    def test_save_without_changes_is_not_logged(self):
+        """Test that saving an unchanged asset records nothing"""
+        asset = Asset.objects.create(asset_type='digital', product_name='Zoom')
+        with self.captureOnCommitCallbacks(execute=True):
+            Asset.objects.get(id=asset.id).save()
+        self.assertEqual(audit_writer.metrics()['queue_depth'], 0)
+    
+    def test_rolled_back_changes_are_not_logged(self):
+        """Test that entries are only buffered once the transaction commits"""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Asset.objects.create(asset_type='digital', product_name='Slack')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(audit_writer.metrics()['queue_depth'], 0)
+    
+    def test_batch_size_triggers_flush(self):
+        """Test that reaching the batch size writes the buffer with one bulk insert"""
+        writer = AuditWriter(batch_size=3)
+        asset = Asset.objects.create(asset_type='digital', product_name='Jira')
+        writer.record(asset.id, 'updated', {'status': ['a', 'b']})
+        writer.record(asset.id, 'updated', {'status': ['b', 'c']})
+        self.assertEqual(AuditLog.objects.count(), 0)
+        
+        writer.record(asset.id, 'updated', {'status': ['c', 'd']})
+        self.assertEqual(AuditLog.objects.filter(asset=asset).count(), 3)
+        
+        metrics = writer.metrics()
+        self.assertEqual(metrics['flushes'], 1)
+        self.assertEqual(metrics['queue_depth'], 0)
+    
+    def test_deleted_user_is_not_referenced(self):
+        """Test that an entry whose user was deleted before the flush is written without the user"""
+        writer = AuditWriter(batch_size=10)
+        asset = Asset.objects.create(asset_type='digital', product_name='Miro')
+        gone = User.objects.create_user(username='leaver')
+        writer.record(asset.id, 'updated', {'status': ['a', 'b']}, user_id=gone.id)
+        writer.record(asset.id, 'updated', {'status': ['b', 'c']}, user_id=self.user.id)
+        gone.delete()
+        
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(sorted(AuditLog.objects.filter(asset=asset).values_list('user_id', flat=True),
+                                key=lambda user_id: user_id or 0), [None, self.user.id])
+    
+    def test_bad_entry_does_not_block_the_queue(self):
+        """Test that a rejected entry is split off, retried, then dropped while the rest are written"""
+        writer = AuditWriter(batch_size=10, max_attempts=2)
+        asset = Asset.objects.create(asset_type='digital', product_name='Figma')
+        writer.record(asset.id, 'updated', {'status': ['a', 'b']})
+        writer.record(asset.id, None, {'status': ['b', 'c']})  # action is NOT NULL
+        writer.record(asset.id, 'updated', {'status': ['c', 'd']})
+        
+        with self.assertLogs('assets.audit', 'WARNING'):
+            self.assertEqual(writer.flush(), 2)
+        self.assertEqual(writer.metrics()['queue_depth'], 1)
+        
+        writer.record(asset.id, 'updated', {'status': ['d', 'e']})
+        with self.assertLogs('assets.audit', 'ERROR'):
+            self.assertEqual(writer.flush(), 1)
+        metrics = writer.metrics()
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertEqual(metrics['dropped'], 1)
+        self.assertEqual(AuditLog.objects.filter(asset=asset).count(), 3)
+    
+    def test_metrics_endpoint(self):
+        """Test that writer metrics are exposed as JSON"""
+        data = self.client.get('/api/audit/metrics/').json()
+        self.assertIn('queue_depth', data)
+        self.assertIn('avg_flush_seconds', data)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on the queries behind the API and fails if any
+    of them falls back to a full table scan
+    """
+    
+    TABLES = ('assets_asset', 'assets_auditlog', 'assets_supportticket')
+    
+    def _plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+    
+    def assertIndexed(self, queryset, sorted_by_index=False):
+        plan = self._plan(queryset)
+        for step in plan:
+            for table in self.TABLES:
+                if step.startswith(f'SCAN {table}') and 'USING' not in step:
+                    self.fail(f'Full scan of {table}: {plan}')
+        if sorted_by_index:
+            self.assertFalse(any('TEMP B-TREE' in step for step in plan), f'Sorts in memory: {plan}')
+    
+    def _list_query(self, query_string='', cursor=True):
+        queryset = filter_assets(Asset.objects.all(), QueryDict(query_string))
+        token = encode_cursor(timezone.now(), 100) if cursor else None
+        return asset_list_values(seek(queryset, token))[:101]
+    
+    def test_asset_list_pages(self):
+        """Test that first and later list pages walk the keyset index"""
+        self.assertIndexed(self._list_query(cursor=False), sorted_by_index=True)
+        self.assertIndexed(self._list_query(), sorted_by_index=True)
+    
+    def test_asset_list_filters(self):
+        """Test that status and type filters keep the keyset order"""
+        self.assertIndexed(self._list_query('status=In Service'), sorted_by_index=True)
+        self.assertIndexed(self._list_query('type=digital'), sorted_by_index=True)
+        self.assertIndexed(self._list_query('assigneeId=1'))
+        self.assertIndexed(self._list_query('q=dell'))
+    
+    def test_asset_tag_lookup(self):
+        """Test that asset tag lookups use an index"""
+        self.assertIndexed(Asset.objects.filter(asset_tag='AST-001'))
+    
+    def test_assignee_status_counts(self):
+        """Test that per-user status counts are answered from the composite index"""
+        self.assertIndexed(Asset.objects.filter(assigned_to_id=1, status='in_service').values('id'))
+    
+    def test_audit_log_for_asset(self):
+        """Test that an asset's audit history is read newest-first from an index"""
+        self.assertIndexed(AuditLog.objects.filter(asset_id=1)[:50], sorted_by_index=True)
+    
+    def test_tickets_for_asset_by_status(self):
+        """Test that open tickets for an asset are found by index"""
+        self.assertIndexed(SupportTicket.objects.filter(asset_id=1, status='open'))
+    
+    def test_export_chunks(self):
+        """Test that export chunks seek by primary key"""
+        for table in exporting.TABLES:
+            model, columns = exporting.TABLES[table]
+            self.assertIndexed(model.objects.order_by('pk').values_list(*columns).filter(pk__gt=100)[:5000],
+                               sorted_by_index=True)
+
+    def test_delta_sync_seeks(self):
+        """Test that a sync poll seeks the change_seq index"""
+        queryset = asset_sync_values(Asset.objects.filter(change_seq__gt=100).order_by('change_seq'))[:501]
+        self.assertIndexed(queryset, sorted_by_index=True)
+
+
+class AssetStatsTests(TestCase):
+    """
+    Tests the trigger-maintained counters behind the dashboard stats endpoint
+    """
+    
+    def setUp(self):
+        self.laptop = Asset.objects.create(asset_type='physical', serial_number='CNT1')
+        Asset.objects.create(asset_type='physical', serial_number='CNT2', status='out_repair')
+        Asset.objects.create(asset_type='digital', product_name='Office365')
+    
+    def _stats(self):
+        return self.client.get('/api/assets/stats/').json()
+    
+    def test_stats_reflect_saves_and_deletes(self):
+        """Test that counters move with status changes and deletes"""
+        stats = self._stats()
+        self.assertEqual((stats['total'], stats['inService'], stats['outRepair']), (3, 2, 1))
+        
+        self.laptop.status = 'out_repair'
+        self.laptop.save()
+        self.assertEqual(self._stats()['outRepair'], 2)
+        
+        self.laptop.delete()
+        stats = self._stats()
+        self.assertEqual((stats['total'], stats['outRepair']), (2, 1))
+        self.assertEqual(stats['byType']['digital']['in_service'], 1)
+    
+    def test_bulk_paths_are_counted(self):
+        """Test that bulk_create and queryset.update bypassing save() still count"""
+        Asset.objects.bulk_create([Asset(asset_type='digital', product_name=f'App {i}') for i in range(4)])
+        Asset.objects.filter(asset_type='digital').update(status='decommissioned')
+        stats = self._stats()
+        self.assertEqual(stats['total'], 7)
+        self.assertEqual(stats['decommissioned'], 5)
+    
+    def test_stats_is_one_query(self):
+        """Test that the endpoint does not scan the asset table"""
+        with self.assertNumQueries(1):
+            self.client.get('/api/assets/stats/')
+    
+    def test_rebuild_command_repairs_drift(self):
+        """Test that rebuild_asset_stats recounts from the asset table"""
+        AssetStatusCount.objects.all().delete()
+        call_command('rebuild_asset_stats', stdout=io.StringIO())
+        self.assertEqual(self._stats()['total'], 3)
+
+
+class WhoHasWhatReportTests(TestCase):
+    """
+    Tests the database-side "Who Has What" report and its drill-down
+    """
+    
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', first_name='Alice', last_name='Ng')
+        self.bob = User.objects.create_user(username='bob')
+        self.carol = User.objects.create_user(username='carol')
+        UserProfile.objects.create(user=self.carol, role='technician')
+        for i in range(7):
+            Asset.objects.create(asset_type='physical', manufacturer='Dell', model=f'M{i}',
+                                 serial_number=f'RPT{i}', asset_tag=f'R-{i}',
+                                 status='out_repair' if i == 0 else 'in_service', assigned_to=self.alice)
+        Asset.objects.create(asset_type='digital', product_name='Figma', license_key='FG-1', assigned_to=self.carol)
+        Asset.objects.create(asset_type='digital', product_name='Unassigned tool')
+    
+    def _report(self, **params):
+        return self.client.get('/api/reports/who-has-what/', params).json()
+    
+    def test_counts_and_newest_assets_per_user(self):
+        """Test that counts are grouped in SQL and summaries are capped"""
+        users = {u['username']: u for u in self._report()['users']}
+        self.assertEqual((users['alice']['total'], users['alice']['inService'], users['alice']['outRepair']), (7, 6, 1))
+        self.assertEqual(users['alice']['name'], 'Alice Ng')
+        self.assertEqual([a['identifier'] for a in users['alice']['assets']], ['R-6', 'R-5', 'R-4', 'R-3', 'R-2'])
+        self.assertEqual(users['bob']['total'], 0)
+        self.assertEqual(users['bob']['assets'], [])
+    
+    def test_role_filter(self):
+        """Test that role=user keeps users without a profile and drops technicians"""
+        names = [u['username'] for u in self._report(role='user')['users']]
+        self.assertEqual(names, ['alice', 'bob'])
+    
+    def test_pages_by_user(self):
+        """Test that the report pages through users with a cursor"""
+        first = self._report(limit=2)
+        second = self._report(limit=2, cursor=first['nextCursor'])
+        self.assertEqual([u['username'] for u in first['users']], ['alice', 'bob'])
+        self.assertEqual([u['username'] for u in second['users']], ['carol'])
+        self.assertIsNone(second['nextCursor'])
+    
+    def test_query_count_is_constant(self):
+        """Test that a report page costs an ETag lookup plus three queries however many users it holds"""
+        with self.assertNumQueries(4):
+            self._report()
+    
+    def test_drill_down(self):
+        """Test paging through one user's full asset list"""
+        data = self.client.get(f'/api/reports/who-has-what/{self.alice.id}/', {'limit': 5}).json()
+        self.assertEqual(len(data['assets']), 5)
+        self.assertIsNotNone(data['nextCursor'])
+        self.assertEqual(data['user']['name'], 'Alice Ng')
+        
+        missing = self.client.get('/api/reports/who-has-what/999999/')
+        self.assertEqual(missing.status_code, 404)
+
+
+class DeltaSyncTests(TestCase):
+    """
+    Tests the /api/assets/changes/ delta sync endpoint and its tombstones
+    """
+    
+    def setUp(self):
+        self.laptop = Asset.objects.create(asset_type='physical', manufacturer='Dell', serial_number='SYNC1')
+        self.license = Asset.objects.create(asset_type='digital', product_name='Office365')
+        self.token = self.client.get('/api/assets/changes/').json()['token']
+    
+    def _changes(self, token, **params):
+        return self.client.get('/api/assets/changes/', {'since': token, **params}).json()
+    
+    def test_no_changes_since_current_token(self):
+        """Test that a fresh token reports nothing and comes back unchanged"""
+        data = self._changes(self.token)
+        self.assertEqual((data['changed'], data['deleted'], data['hasMore']), ([], [], False))
+        self.assertEqual(data['token'], self.token)
+    
+    def test_returns_only_updated_assets(self):
+        """Test that only assets saved after the token are sent"""
+        self.laptop.status = 'out_repair'
+        self.laptop.save()
+        data = self._changes(self.token)
+        self.assertEqual([a['id'] for a in data['changed']], [self.laptop.id])
+        self.assertEqual(data['changed'][0]['status'], 'Out for Repair')
+        self.assertEqual(self._changes(data['token'])['changed'], [])
+    
+    def test_delete_leaves_tombstone(self):
+        """Test that deleting through the API is reported as a tombstone"""
+        response = self.client.delete(f'/api/assets/{self.license.id}/')
+        self.assertTrue(response.json()['success'])
+        self.assertTrue(AssetTombstone.objects.filter(asset_id=self.license.id).exists())
+        data = self._changes(self.token)
+        self.assertEqual(data['deleted'], [self.license.id])
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(self._changes(data['token'])['deleted'], [])
+    
+    def test_pages_large_deltas(self):
+        """Test that a delta larger than the limit is paged with hasMore"""
+        for i in range(5):
+            Asset.objects.create(asset_type='digital', product_name=f'App {i}')
+        first = self._changes(self.token, limit=3)
+        second = self._changes(first['token'], limit=3)
+        self.assertTrue(first['hasMore'])
+        self.assertFalse(second['hasMore'])
+        self.assertEqual(len(first['changed']) + len(second['changed']), 5)
+    
+    def test_poll_cost_is_constant(self):
+        """Test that a poll is two queries whatever the inventory size"""
+        with self.assertNumQueries(2):
+            self._changes(self.token)
+    
+    def test_invalid_token(self):
+        """Test that a token we did not issue is rejected"""
+        response = self.client.get('/api/assets/changes/', {'since': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        # (updated_at, id, tombstone id), as issued before change_seq
+        legacy = base64.urlsafe_b64encode(json.dumps([timezone.now().isoformat(), self.laptop.id, 0]).encode()).decode()
+        response = self.client.get('/api/assets/changes/', {'since': legacy})
+        self.assertIn('expired', response.json()['error'])
+    
+    def test_late_commit_with_earlier_timestamp_is_seen(self):
+        """Test that a write stamped before the token was issued but committed after it still syncs"""
+        stamped = timezone.now() - timedelta(seconds=10)
+        Asset.objects.filter(id=self.license.id).update(status='out_repair', updated_at=stamped)
+        data = self._changes(self.token)
+        self.assertEqual([a['id'] for a in data['changed']], [self.license.id])
+    
+    def test_every_write_path_moves_the_sequence(self):
+        """Test that saves, bulk inserts, bulk updates, revision-checked updates and scans all sync"""
+        self.laptop.asset_tag = 'SEQ-1'
+        self.laptop.save()
+        imported = Asset.objects.bulk_create([Asset(asset_type='digital', product_name='Bulk')])[0]
+        bulk_update_assets({'repair_notes': 'Cart'}, ids=[self.license.id])
+        seqs = dict(Asset.objects.values_list('id', 'change_seq'))
+        self.assertLess(seqs[self.laptop.id], seqs[imported.id])
+        self.assertLess(seqs[imported.id], seqs[self.license.id])
+        
+        token = self._changes(self.token)['token']
+        self.client.put(f'/api/assets/{self.laptop.id}/', json.dumps({'status': 'Out for Repair'}),
+                        content_type='application/json')
+        self.client.post('/api/scans/', json.dumps({'scans': [
+            {'scanId': 'seq-1', 'assetTag': 'SEQ-1', 'action': 'audit', 'location': 'Dock'}]}),
+            content_type='application/json')
+        data = self._changes(token)
+        self.assertEqual([a['id'] for a in data['changed']], [self.laptop.id])
+        self.assertEqual(data['changed'][0]['location'], 'Dock')
+
+    
+    def test_stamping_the_sequence_bumps_the_generation_once(self):
+        """Test that the change_seq stamp does not count as a second write to the asset collection"""
+        # Ahead of the clock, so each bump is exactly +1
+        CollectionVersion.objects.filter(name='assets').update(generation=10 ** 18)
+        self.laptop.location = 'Lab'
+        self.laptop.save()
+        Asset.objects.filter(id=self.license.id).update(status='out_repair')
+        Asset.objects.create(asset_type='digital', product_name='Visio')
+        self.assertEqual(CollectionVersion.objects.get(name='assets').generation, 10 ** 18 + 3)
+
+class ConditionalGetTests(TestCase):
+    """
+    Tests the generation-based ETags on the list, user and report endpoints
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='etag')
+        self.asset = Asset.objects.create(asset_type='physical', serial_number='ETAG1', assigned_to=self.user)
+    
+    def _etag(self, url='/api/assets/'):
+        return self.client.get(url)['ETag']
+    
+    def test_unchanged_poll_is_304_with_one_query(self):
+        """Test that a matching If-None-Match costs one query and no body"""
+        for url in ('/api/assets/', '/api/users/', '/api/reports/who-has-what/'):
+            etag = self._etag(url)
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+    
+    def test_responses_must_revalidate(self):
+        """Test that browsers are told to check the ETag before reusing a response"""
+        response = self.client.get('/api/assets/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+    
+    def test_writes_change_the_etag(self):
+        """Test that saves, queryset updates and deletes all invalidate the ETag"""
+        etags = [self._etag()]
+        self.asset.status = 'out_repair'
+        self.asset.save()
+        etags.append(self._etag())
+        Asset.objects.update(location='Lab')
+        etags.append(self._etag())
+        self.asset.delete()
+        etags.append(self._etag())
+        self.assertEqual(len(set(etags)), 4)
+    
+    def test_user_rename_changes_asset_etag(self):
+        """Test that the asset list ETag follows the assignee names it embeds"""
+        etag = self._etag()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertNotEqual(self._etag(), etag)
+    
+    def test_login_does_not_change_user_etag(self):
+        """Test that updating last_login leaves cached user lists valid"""
+        etag = self._etag('/api/users/')
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self._etag('/api/users/'), etag)
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Tests the generation-keyed cache of list and report responses
+    """
+    
+    def setUp(self):
+        response_cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='cached')
+        self.asset = Asset.objects.create(asset_type='physical', serial_number='CACHE1', assigned_to=self.user)
+    
+    def test_repeat_request_is_served_from_cache(self):
+        """Test that a second identical request only reads the generations"""
+        first = self.client.get('/api/assets/')
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/assets/')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(response_cache.metrics()['local_hits'], 1)
+    
+    def test_query_params_are_part_of_the_key(self):
+        """Test that different filters are cached separately"""
+        Asset.objects.create(asset_type='digital', product_name='Office365')
+        self.client.get('/api/assets/')
+        data = self.client.get('/api/assets/', {'type': 'digital'}).json()
+        self.assertEqual(len(data['assets']), 1)
+    
+    def test_api_writes_invalidate(self):
+        """Test that POST, PUT and DELETE through the API are visible on the next read"""
+        self.client.get('/api/assets/')
+        self.client.post('/api/assets/', json.dumps({'type': 'digital', 'productName': 'Zoom'}),
+                         content_type='application/json')
+        self.assertEqual(len(self.client.get('/api/assets/').json()['assets']), 2)
+        
+        self.client.put(f'/api/assets/{self.asset.id}/', json.dumps({'status': 'Out for Repair'}),
+                        content_type='application/json')
+        statuses = {a['id']: a['status'] for a in self.client.get('/api/assets/').json()['assets']}
+        self.assertEqual(statuses[self.asset.id], 'Out for Repair')
+        
+        self.client.delete(f'/api/assets/{self.asset.id}/')
+        self.assertEqual(len(self.client.get('/api/assets/').json()['assets']), 1)
+    
+    def test_bulk_update_invalidates_report(self):
+        """Test that writes bypassing save(), as the admin's bulk actions do, invalidate too"""
+        self.client.get('/api/reports/who-has-what/')
+        Asset.objects.update(status='out_repair')
+        entry = self.client.get('/api/reports/who-has-what/').json()['users'][0]
+        self.assertEqual(entry['outRepair'], 1)
+    
+    def test_streams_are_not_cached(self):
+        """Test that streaming list formats bypass the cache"""
+        self.client.get('/api/assets/', {'format': 'ndjson'})
+        self.assertEqual(response_cache.metrics()['stores'], 0)
+    
+    def test_shared_backend_hit_after_local_eviction(self):
+        """Test LRU eviction of local entries falling back to a file-based backend"""
+        with tempfile.TemporaryDirectory() as location, self.settings(CACHES={
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            cache = ResponseCache(alias='files', local_entries=2)
+            for key in ('a', 'b', 'c'):
+                cache.set(key, 'application/json', key.encode())
+            self.assertEqual(cache.metrics()['evictions'], 1)
+            self.assertEqual(cache.get('a'), ('application/json', b'a'))
+            self.assertEqual(cache.get('missing'), None)
+            metrics = cache.metrics()
+            self.assertEqual((metrics['shared_hits'], metrics['misses']), (1, 1))
+            self.assertEqual(metrics['backend'], 'FileBasedCache')
+    
+    def test_metrics_endpoint(self):
+        """Test that hit/miss counters are exposed"""
+        self.client.get('/api/assets/')
+        self.client.get('/api/assets/')
+        metrics = self.client.get('/api/cache/metrics/').json()
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['hit_ratio'], 0.5)
+
+
+class SingleFlightTests(TestCase):
+    """
+    Tests coalescing of concurrent identical computations
+    """
+    
+    def _burst(self, flight, fn, threads=8):
+        barrier = threading.Barrier(threads)
+        results, errors = [], []
+        
+        def worker():
+            barrier.wait()
+            try:
+                results.append(flight.do('key', fn))
+            except ValueError as e:
+                errors.append(e)
+        
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return results, errors
+    
+    def test_concurrent_callers_share_one_call(self):
+        """Test that followers get the leader's result without calling fn"""
+        calls = []
+        
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'page'
+        
+        flight = SingleFlight()
+        results, _ = self._burst(flight, slow)
+        self.assertEqual(results, ['page'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.metrics(), {'leaders': 1, 'followers': 7, 'timeouts': 0, 'in_flight': 0})
+    
+    def test_leader_error_reaches_followers(self):
+        """Test that a failed computation fails its followers instead of hanging them"""
+        def failing():
+            time.sleep(0.2)
+            raise ValueError('boom')
+        
+        _, errors = self._burst(SingleFlight(), failing)
+        self.assertEqual(len(errors), 8)
+    
+    def test_disabled_runs_every_call(self):
+        """Test that coalescing can be switched off"""
+        calls = []
+        self._burst(SingleFlight(enabled=False), lambda: calls.append(1))
+        self.assertEqual(len(calls), 8)
+    
+    def test_process_lock(self):
+        """Test that the cross-process lock is only taken when a directory is configured"""
+        with process_lock('key') as locked:
+            self.assertFalse(locked)
+        with tempfile.TemporaryDirectory() as directory:
+            with process_lock('key', directory) as locked:
+                self.assertEqual(locked, os.name == 'posix')
+
+
+class AsyncViewsTests(TestCase):
+    """
+    Tests that the ASGI-native views under /api/async/ match their sync twins
+    """
+    
+    def setUp(self):
+        response_cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='async')
+        self.laptop = Asset.objects.create(asset_type='physical', manufacturer='Dell', model='Latitude',
+                                           serial_number='ASYNC1', assigned_to=self.user)
+        self.license = Asset.objects.create(asset_type='digital', product_name='Office365')
+    
+    async def test_list_matches_sync_view(self):
+        """Test that a list page has the same payload as the sync endpoint"""
+        sync_page = await self.async_client.get('/api/assets/', {'limit': 1})
+        async_page = await self.async_client.get('/api/async/assets/', {'limit': 1})
+        self.assertEqual(async_page.json(), sync_page.json())
+        self.assertEqual(async_page['ETag'], sync_page['ETag'])
+    
+    async def test_unchanged_poll_is_304(self):
+        """Test that async views honour If-None-Match"""
+        etag = (await self.async_client.get('/api/async/assets/'))['ETag']
+        response = await self.async_client.get('/api/async/assets/', headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+    
+    async def test_stream_uses_async_iteration(self):
+        """Test that streamed listings are produced by an async iterator"""
+        response = await self.async_client.get('/api/async/assets/', {'format': 'ndjson'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.license.id, self.laptop.id])
+    
+    async def test_create_update_delete(self):
+        """Test writes through the async list and detail views"""
+        created = await self.async_client.post('/api/async/assets/', {'type': 'digital', 'productName': 'Zoom'},
+                                               content_type='application/json')
+        asset_id = created.json()['asset_id']
+        await self.async_client.put(f'/api/async/assets/{asset_id}/', {'status': 'Out for Repair'},
+                                    content_type='application/json')
+        self.assertEqual((await Asset.objects.aget(id=asset_id)).status, 'out_repair')
+        await self.async_client.delete(f'/api/async/assets/{asset_id}/')
+        self.assertFalse(await Asset.objects.filter(id=asset_id).aexists())
+        self.assertTrue(await AssetTombstone.objects.filter(asset_id=asset_id).aexists())
+    
+    async def test_stats_and_search(self):
+        """Test the async stats and search endpoints"""
+        stats = (await self.async_client.get('/api/async/assets/stats/')).json()
+        self.assertEqual(stats['total'], 2)
+        results = (await self.async_client.get('/api/async/search/', {'q': 'latitude'})).json()['results']
+        self.assertEqual([hit['id'] for hit in results], [self.laptop.id])
+
+
+class SQLiteProfileTests(TestCase):
+    """
+    Tests the connection pragmas applied by the connection_created hook
+    """
+    
+    def _pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+    
+    def test_pragmas_applied(self):
+        """Test that new connections get the configured pragmas"""
+        self.assertEqual(self._pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self._pragma('cache_size'), -64 * 1024)
+        self.assertEqual(self._pragma('temp_store'), 2)  # MEMORY
+    
+    def test_transactions_take_write_lock_up_front(self):
+        """Test that atomic blocks begin IMMEDIATE so writers queue on the busy timeout"""
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class WriteRetryTests(SimpleTestCase):
+    """
+    Tests lock retries and the single-writer queue without a database
+    """
+    
+    def _flaky(self, failures):
+        calls = []
+        
+        def write():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError('database is locked')
+            return 'written'
+        return write, calls
+    
+    def test_retries_locked_writes(self):
+        """Test that a write locked out twice succeeds on the third attempt"""
+        write, calls = self._flaky(2)
+        self.assertEqual(retry_on_locked(write, base_delay=0), 'written')
+        self.assertEqual(len(calls), 3)
+    
+    def test_gives_up_after_attempts(self):
+        """Test that persistent locking surfaces the error"""
+        write, calls = self._flaky(10)
+        with self.assertRaises(OperationalError):
+            retry_on_locked(write, attempts=2, base_delay=0)
+        self.assertEqual(len(calls), 3)
+    
+    def test_other_errors_are_not_retried(self):
+        """Test that only lock errors are retried"""
+        def broken():
+            raise OperationalError('no such table: assets_asset')
+        with self.assertRaises(OperationalError):
+            retry_on_locked(broken, base_delay=0)
+    
+    def test_write_queue_runs_writes_serially(self):
+        """Test that queued writes run one at a time and return their result"""
+        queue, active, peak = WriteQueue(), [0], [0]
+        
+        def write(n):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            active[0] -= 1
+            return n * 2
+        
+        futures = [queue.submit(write, n) for n in range(10)]
+        self.assertEqual([future.result() for future in futures], [n * 2 for n in range(10)])
+        self.assertEqual(peak[0], 1)
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class ReplicaTests(TransactionTestCase):
+    """
+    Tests that read-only endpoints are served from a synced replica file
+    while it is fresh, and that writers read their own writes
+    """
+    
+    databases = {'default', 'replica'}
+    
+    def setUp(self):
+        response_cache.clear()
+        caches['default'].clear()
+        self.addCleanup(audit_writer.flush)
+        replica = connections['replica']
+        original_name = replica.settings_dict['NAME']
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'replica.sqlite3')
+        replica.close()
+        replica.settings_dict['NAME'] = self.path
+        
+        def restore():
+            replica.close()
+            replica.settings_dict['NAME'] = original_name
+        self.addCleanup(restore)
+        Asset.objects.create(asset_type='physical', serial_number='REP1')
+    
+    def _total(self, **headers):
+        return self.client.get('/api/assets/stats/', headers=headers).json()['total']
+    
+    def test_sync_copies_a_snapshot(self):
+        """Test that a sync writes a complete, rollback-journal copy"""
+        self.assertGreater(sync_replica(), 0)
+        with sqlite3.connect(self.path) as copy:
+            self.assertEqual(copy.execute('SELECT COUNT(*) FROM assets_asset').fetchone()[0], 1)
+            self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+    
+    def test_one_process_leads_syncing(self):
+        """Test that only the holder of the sync lock file refreshes the replica"""
+        leader, other = SyncLead(), SyncLead()
+        self.assertTrue(leader.acquire('replica'))
+        self.assertTrue(leader.acquire('replica'))
+        self.assertFalse(other.acquire('replica'))
+        self.assertTrue(os.path.exists(self.path + '.sync-lock'))
+        
+        # The lock goes with the process (here: its file) that held it
+        leader._files.pop('replica').close()
+        self.assertTrue(other.acquire('replica'))
+        self.addCleanup(lambda: other._files.pop('replica').close())
+    
+    def test_reads_come_from_the_snapshot(self):
+        """Test that list, stats and export lag the primary until the next sync"""
+        sync_replica()
+        Asset.objects.create(asset_type='physical', serial_number='REP2')
+        
+        self.assertEqual(self._total(), 1)
+        self.assertEqual(len(self.client.get('/api/assets/').json()['assets']), 1)
+        export = self.client.get('/api/export/assets/', {'format': 'ndjson'})
+        self.assertEqual(len(b''.join(export.streaming_content).splitlines()), 1)
+        
+        sync_replica()
+        self.assertEqual(self._total(), 2)
+    
+    def test_stale_replica_falls_back_to_primary(self):
+        """Test that a snapshot older than the tolerance is not used"""
+        sync_replica()
+        Asset.objects.create(asset_type='physical', serial_number='REP2')
+        old = time.time() - 120
+        os.utime(self.path, (old, old))
+        
+        with override_settings(REPLICA_MAX_STALENESS=60):
+            self.assertEqual(self._total(), 2)
+    
+    def test_writers_read_their_own_writes(self):
+        """Test that a write pins the client to the primary until the next sync"""
+        sync_replica()
+        response = self.client.post('/api/assets/', json.dumps({'type': 'physical', 'serialNumber': 'REP2'}),
+                                    content_type='application/json')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        
+        self.assertEqual(self._total(), 2)
+        self.assertEqual(self._total(cookie=''), 1)
+        
+        time.sleep(0.01)
+        sync_replica()
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            self.assertEqual(self._total(), 2)
+        self.assertTrue(any('assets_assetstatuscount' in query['sql'] for query in replica_queries))
+    
+    async def test_async_views_use_the_replica(self):
+        """Test that ASGI views read from the replica too"""
+        await sync_to_async(sync_replica)()
+        await Asset.objects.acreate(asset_type='physical', serial_number='REP2')
+        
+        response = await self.async_client.get('/api/async/assets/stats/')
+        self.assertEqual(response.json()['total'], 1)
+    
+    def test_router_keeps_writes_and_migrations_on_primary(self):
+        """Test that nothing is written to or migrated on the replica"""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Asset), 'default')
+        self.assertIs(router.allow_migrate('replica', 'assets'), False)
+        self.assertIsNone(router.db_for_read(Asset))
+
+
+class RequestMetricsTests(TestCase):
+    """
+    Tests the Server-Timing header, slow-request log and Prometheus metrics
+    """
+    
+    def setUp(self):
+        response_cache.clear()
+        caches['default'].clear()
+        request_histograms.reset()
+        self.addCleanup(request_histograms.reset)
+        Asset.objects.create(asset_type='physical', manufacturer='Dell', serial_number='MET1')
+    
+    def test_server_timing_header(self):
+        """Test that responses report SQL, serialization and total time"""
+        response = self.client.get('/api/assets/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(timing, r'serialize;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+        self.assertIn(f'size;desc="{len(response.content)} bytes"', timing)
+    
+    def test_metrics_endpoint_uses_prometheus_format(self):
+        """Test that requests are counted per endpoint in the text exposition format"""
+        self.client.get('/api/assets/stats/')
+        self.client.get('/api/assets/stats/')
+        
+        response = self.client.get('/api/metrics/')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE inventory_request_duration_seconds histogram', body)
+        self.assertIn('inventory_request_duration_seconds_count{endpoint="assets:api_assets_stats",method="GET"} 2',
+                      body)
+        self.assertIn('inventory_requests_total{endpoint="assets:api_assets_stats",method="GET",status="200"} 2',
+                      body)
+        self.assertIn('inventory_request_duration_seconds_bucket'
+                      '{endpoint="assets:api_assets_stats",method="GET",le="+Inf"} 2', body)
+    
+    @override_settings(REQUEST_SLOW_MS=0)
+    def test_slow_requests_are_logged_with_top_queries(self):
+        """Test that a request over the threshold is logged with its slowest SQL"""
+        with self.assertLogs('assets.metrics', 'WARNING') as logs:
+            self.client.get('/api/assets/stats/')
+        self.assertIn('assets:api_assets_stats', logs.output[0])
+        self.assertIn('assets_assetstatuscount', logs.output[0])
+    
+    def test_streamed_responses_are_recorded_when_finished(self):
+        """Test that a streamed body is measured as it is sent"""
+        response = self.client.get('/api/assets/', {'format': 'ndjson'})
+        self.assertNotIn('api_assets_list', request_histograms.render())
+        
+        body = b''.join(response.streaming_content)
+        response.close()
+        metrics = request_histograms.render()
+        self.assertIn('inventory_response_bytes_total{endpoint="assets:api_assets_list",method="GET"} '
+                      f'{len(body)}', metrics)
+
+
+class SyntheticInventoryTests(TestCase):
+    """
+    Tests the synthetic inventory generator used for benchmarks
+    """
+    
+    def test_generates_skewed_consistent_data(self):
+        """Test row counts, status and assignment skew, and trigger-maintained tables"""
+        created = generate_inventory(users=20, assets=1000, audit_logs=300, tickets=50, seed=1)
+        self.assertEqual(created, {'users': 20, 'assets': 1000, 'audit_logs': 300, 'tickets': 50})
+        self.assertEqual(Asset.objects.count(), 1000)
+        self.assertEqual(AuditLog.objects.count(), 300)
+        self.assertEqual(SupportTicket.objects.count(), 50)
+        self.assertEqual(UserProfile.objects.count(), 20)
+        
+        self.assertGreater(Asset.objects.filter(status='in_service').count(), 700)
+        self.assertEqual(Asset.objects.filter(status='decommissioned').exclude(assigned_to=None).count(), 0)
+        per_user = sorted(Asset.objects.exclude(assigned_to=None).values('assigned_to').annotate(
+            n=Count('id')).values_list('n', flat=True), reverse=True)
+        self.assertGreater(sum(per_user[:2]), sum(per_user) * 0.25)
+        
+        # Raw inserts still go through the counter triggers
+        self.assertEqual(sum(AssetStatusCount.objects.values_list('count', flat=True)), 1000)
+        self.assertFalse(AuditLog.objects.filter(asset=None).exists())
+    
+    def test_repeated_runs_do_not_collide(self):
+        """Test that a second run adds rows instead of failing on unique fields"""
+        generate_inventory(users=5, assets=50, audit_logs=0, tickets=0, seed=1)
+        time.sleep(0.002)
+        generate_inventory(users=5, assets=50, audit_logs=0, tickets=0, seed=1)
+        self.assertEqual(Asset.objects.count(), 100)
+        self.assertEqual(User.objects.count(), 10)
+
+
+class BenchmarkEndpointsTests(TestCase):
+    """
+    Tests the endpoint benchmark runner and its regression comparison
+    """
+    
+    def setUp(self):
+        generate_inventory(users=5, assets=200, audit_logs=50, tickets=20, seed=2)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'bench.json')
+    
+    def _run(self, *args):
+        call_command('benchmark_endpoints', '--iterations', '2', '--warmup', '0', '--output', self.output,
+                     *args, stdout=io.StringIO())
+        with open(self.output) as f:
+            return json.load(f)
+    
+    def test_every_route_is_measured(self):
+        """Test that each URL gets latency, query, memory and size figures and writes are rolled back"""
+        report = self._run()
+        measured = {label.split('[')[0] for label in report['endpoints']}
+        self.assertEqual(measured, {pattern.name for pattern in asset_urls.urlpatterns})
+        for label, result in report['endpoints'].items():
+            self.assertLess(result['status'], 500, label)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            for key in ('queries', 'peak_memory_kib', 'response_bytes'):
+                self.assertIn(key, result)
+        self.assertEqual(report['meta']['rows']['assets'], 200)
+        self.assertEqual(Asset.objects.count(), 200)
+    
+    def test_compare_flags_regressions(self):
+        """Test that more queries or slower p95 than the baseline fails the run"""
+        baseline = self._run('--only', 'api_assets_stats')
+        baseline['endpoints']['api_assets_stats']['queries'] = 0
+        with open(self.output, 'w') as f:
+            json.dump(baseline, f)
+        
+        with self.assertRaisesMessage(CommandError, 'api_assets_stats: queries 0'):
+            call_command('benchmark_endpoints', '--iterations', '1', '--only', 'api_assets_stats',
+                         '--compare', self.output, stdout=io.StringIO())
+
+
+class RequestProfilerTests(TestCase):
+    """
+    Tests the admin-switched sampling profiler and its profile downloads
+    """
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILER_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(profiler_switch.invalidate)
+        profiler_switch.invalidate()
+        self.factory = RequestFactory()
+    
+    def _switch_on(self, **fields):
+        fields = {'enabled': True, 'sample_rate': 0.0, 'header': 'X-Profile', 'interval_ms': 1, **fields}
+        return ProfilerSwitch.objects.create(**fields)
+    
+    def _profiled(self, request):
+        def slow_view(request):
+            time.sleep(0.05)
+            return HttpResponse('ok')
+        return ProfilerMiddleware(slow_view)(request)
+    
+    def test_off_by_default(self):
+        """Test that nothing is sampled or saved until the switch is turned on"""
+        self.assertIsNone(profiler_switch.current())
+        response = self._profiled(self.factory.get('/api/assets/', HTTP_X_PROFILE='1'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+    
+    def test_header_profiles_request_as_folded_stacks(self):
+        """Test that a request sending the header is sampled and saved in collapsed format"""
+        self._switch_on()
+        self.assertIsNone(self._profiled(self.factory.get('/api/assets/')).get('X-Profile-Id'))
+        
+        response = self._profiled(self.factory.get('/api/assets/', HTTP_X_PROFILE='1'))
+        name = response['X-Profile-Id']
+        with open(os.path.join(self.directory, name)) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(stack.startswith('assets.middleware.ProfilerMiddleware.__call__;'))
+        self.assertIn('slow_view', stack)
+    
+    def test_path_pattern_sample_and_expiry(self):
+        """Test that the sample is drawn from matching paths and the switch expires"""
+        switch = self._switch_on(path_pattern=r'^/api/reports/', sample_rate=1.0, header='')
+        state = profiler_switch.current()
+        self.assertTrue(state.wants(self.factory.get('/api/reports/who-has-what/')))
+        self.assertFalse(state.wants(self.factory.get('/api/assets/')))
+        
+        switch.expires_at = timezone.now() - timedelta(seconds=1)
+        switch.save()
+        self.assertFalse(profiler_switch.current().wants(self.factory.get('/api/reports/who-has-what/')))
+        
+        switch.delete()
+        self.assertIsNone(profiler_switch.current())
+    
+    def test_invalid_pattern_rejected(self):
+        """Test that the admin form refuses a path pattern that is not a regular expression"""
+        with self.assertRaises(ValidationError):
+            ProfilerSwitch(enabled=True, path_pattern='[unclosed').full_clean()
+    
+    def test_profiles_downloadable_by_admins_only(self):
+        """Test listing, downloading and merging saved profiles"""
+        self._switch_on()
+        first = self._profiled(self.factory.get('/api/assets/', HTTP_X_PROFILE='1'))['X-Profile-Id']
+        self._profiled(self.factory.get('/api/assets/', HTTP_X_PROFILE='1'))
+        
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 302)
+        
+        admin_user = User.objects.create_superuser('profiler-admin', 'admin@example.com', 'pass')
+        self.client.force_login(admin_user)
+        profiles = self.client.get('/api/profiles/', {'endpoint': 'unmatched'}).json()['profiles']
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(profiles[0]['method'], 'GET')
+        
+        response = self.client.get(f'/api/profiles/{first}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('slow_view', b''.join(response.streaming_content).decode())
+        self.assertEqual(self.client.get('/api/profiles/..%2Fdb.sqlite3/').status_code, 404)
+        
+        response.close()
+        
+        def samples(text):
+            return sum(int(line.rsplit(' ', 1)[1]) for line in text.splitlines())
+        saved = 0
+        for profile in profiles:
+            with open(os.path.join(self.directory, profile['name'])) as f:
+                saved += samples(f.read())
+        self.assertEqual(samples(self.client.get('/api/profiles/merged/').content.decode()), saved)
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class BulkUpdateTests(TestCase):
+    """
+    Tests the set-based bulk status, assignee and repair-note endpoint
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='cart-owner')
+        self.addCleanup(audit_writer.flush)
+        self.assets = [
+            Asset.objects.create(asset_type='physical', manufacturer='Dell', serial_number=f'BULK{i}',
+                                 status='out_repair' if i == 0 else 'in_service')
+            for i in range(4)
+        ]
+        self.ids = [asset.id for asset in self.assets]
+    
+    def _post(self, data):
+        return self.client.post('/api/assets/bulk/', json.dumps(data), content_type='application/json')
+    
+    def test_ids_updated_with_per_id_results_and_audit(self):
+        """Test that listed assets change in one request and each gets a result and an audit entry"""
+        before = Asset.objects.get(id=self.ids[1]).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post({'ids': self.ids + [999999], 'changes': {'status': 'Out for Repair',
+                                                                          'repairNotes': 'Cart 7'}})
+        data = response.json()
+        self.assertEqual((data['updated'], data['unchanged'], data['notFound']), (4, 0, 1))
+        self.assertEqual(data['results'][-1], {'id': 999999, 'result': 'notFound'})
+        self.assertEqual(Asset.objects.filter(status='out_repair', repair_notes='Cart 7').count(), 4)
+        self.assertGreater(Asset.objects.get(id=self.ids[1]).updated_at, before)
+        # Counter triggers still see the set-based UPDATE
+        self.assertEqual(AssetStatusCount.objects.get(status='out_repair', asset_type='physical').count, 4)
+        
+        self.assertEqual(audit_writer.flush(), 4)
+        first = json.loads(AuditLog.objects.get(asset_id=self.ids[0]).details)
+        self.assertEqual(first['changes'], {'repair_notes': ['', 'Cart 7']})
+        second = json.loads(AuditLog.objects.get(asset_id=self.ids[1]).details)
+        self.assertEqual(second['changes']['status'], ['in_service', 'out_repair'])
+    
+    def test_unchanged_assets_are_not_written(self):
+        """Test that assets already in the requested state are reported and left alone"""
+        data = self._post({'ids': self.ids[:2], 'changes': {'status': 'out_repair'}}).json()
+        self.assertEqual(data['results'], [{'id': self.ids[0], 'result': 'unchanged'},
+                                           {'id': self.ids[1], 'result': 'updated'}])
+    
+    def test_query_count_does_not_grow_with_assets(self):
+        """Test that the change is applied with set-based statements rather than per asset"""
+        more = [Asset.objects.create(asset_type='digital', product_name=f'Bulk {i}').id for i in range(40)]
+        with CaptureQueriesContext(connection) as few:
+            self._post({'ids': self.ids, 'changes': {'assigneeId': self.user.id}})
+        with CaptureQueriesContext(connection) as many:
+            self._post({'ids': more, 'changes': {'assigneeId': self.user.id}})
+        self.assertEqual(len(many), len(few))
+    
+    def test_filter_selects_assets(self):
+        """Test that a list filter picks the assets and a null assignee unassigns them"""
+        Asset.objects.filter(id__in=self.ids[2:]).update(assigned_to=self.user)
+        data = self._post({'filter': {'assigneeId': self.user.id}, 'changes': {'assigneeId': None}}).json()
+        self.assertEqual([result['id'] for result in data['results']], self.ids[2:])
+        self.assertFalse(Asset.objects.filter(assigned_to=self.user).exists())
+    
+    @override_settings(BULK_UPDATE_MAX_ASSETS=3)
+    def test_invalid_requests_change_nothing(self):
+        """Test that bad changes, selections and oversized batches are rejected with 400"""
+        for body in (
+            {'ids': self.ids, 'changes': {'status': 'lost'}},
+            {'ids': self.ids, 'changes': {'assigneeId': 999999}},
+            {'ids': self.ids, 'changes': {'location': 'Lab'}},
+            {'ids': self.ids, 'changes': {}},
+            {'changes': {'status': 'Decommissioned'}},
+            {'filter': {'serial': 'BULK1'}, 'changes': {'status': 'Decommissioned'}},
+            {'ids': self.ids, 'changes': {'status': 'Decommissioned'}},
+            {'filter': {'type': 'physical'}, 'changes': {'status': 'Decommissioned'}},
+        ):
+            response = self._post(body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertFalse(response.json()['success'])
+        self.assertFalse(Asset.objects.filter(status='decommissioned').exists())
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class OptimisticConcurrencyTests(TestCase):
+    """
+    Tests revision-checked conditional asset updates
+    """
+    
+    def setUp(self):
+        response_cache.clear()
+        caches['default'].clear()
+        self.addCleanup(audit_writer.flush)
+        self.asset = Asset.objects.create(asset_type='physical', manufacturer='Dell', serial_number='REV1')
+    
+    def _put(self, data, prefix='/api'):
+        return self.client.put(f'{prefix}/assets/{self.asset.id}/', json.dumps(data),
+                                content_type='application/json')
+    
+    def test_list_carries_revision(self):
+        """Test that clients read the revision they must send back"""
+        self.assertEqual(self.client.get('/api/assets/').json()['assets'][0]['revision'], 1)
+    
+    def test_update_is_one_statement(self):
+        """Test that a matching revision applies with a single conditional UPDATE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self._put({'status': 'Out for Repair', 'revision': 1})
+        self.assertEqual(response.json(), {'success': True, 'revision': 2})
+        statements = [query['sql'] for query in queries if 'assets_asset' in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+        self.assertNotIn('"serial_number"', statements[0])
+        self.assertEqual(Asset.objects.get(id=self.asset.id).status, 'out_repair')
+    
+    def test_unchanged_update_writes_nothing(self):
+        """Test that a PUT matching the stored row keeps its revision, timestamp and ETag"""
+        before = Asset.objects.get(id=self.asset.id)
+        etag = self.client.get('/api/assets/')['ETag']
+        response = self._put({'status': 'In Service', 'repairNotes': '', 'revision': 1})
+        self.assertEqual(response.json(), {'success': True, 'revision': 1})
+        after = Asset.objects.get(id=self.asset.id)
+        self.assertEqual((after.revision, after.updated_at), (before.revision, before.updated_at))
+        self.assertEqual(self.client.get('/api/assets/')['ETag'], etag)
+        self.assertEqual(self._put({'status': 'In Service', 'revision': 2}).status_code, 409)
+    
+    def test_stale_revision_conflicts(self):
+        """Test that an edit based on an old read is refused instead of overwriting"""
+        self._put({'repairNotes': 'Screen cracked', 'revision': 1})
+        response = self._put({'repairNotes': 'Battery swollen', 'revision': 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['revision'], 2)
+        self.assertEqual(Asset.objects.get(id=self.asset.id).repair_notes, 'Screen cracked')
+        self.assertEqual(self._put({'revision': 'x'}).status_code, 400)
+    
+    def test_update_without_revision_and_missing_asset(self):
+        """Test that older clients still update, and unknown ids are reported"""
+        self.assertEqual(self._put({'status': 'Out for Repair'}).json()['revision'], 2)
+        response = self.client.put('/api/assets/999999/', json.dumps({'status': 'In Service', 'revision': 1}),
+                                   content_type='application/json')
+        self.assertEqual(response.json()['error'], 'Asset not found')
+    
+    def test_every_write_path_moves_revision(self):
+        """Test that saves and bulk updates invalidate revisions read earlier"""
+        asset = Asset.objects.get(id=self.asset.id)
+        asset.location = 'Lab'
+        asset.save()
+        self.assertEqual(asset.revision, 2)
+        bulk_update_assets({'repair_notes': 'Cart'}, ids=[self.asset.id])
+        self.assertEqual(self._put({'status': 'Out for Repair', 'revision': 2}).status_code, 409)
+    
+    def test_audit_records_sent_values_and_revision(self):
+        """Test that the update is audited without reading the old row, and a no-op is not audited"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._put({'status': 'Out for Repair', 'revision': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._put({'status': 'Out for Repair', 'revision': 2})
+        audit_writer.flush()
+        changes = [json.loads(log.details)['changes']
+                   for log in AuditLog.objects.filter(asset_id=self.asset.id, action='updated')]
+        self.assertEqual(changes, [{'status': [None, 'out_repair'], 'revision': [1, 2]}])
+    
+    async def test_async_update_conflicts(self):
+        """Test that the async detail view applies the same revision check"""
+        response = await self.async_client.put(f'/api/async/assets/{self.asset.id}/',
+                                               {'status': 'Out for Repair', 'revision': 5},
+                                               content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        response = await self.async_client.put(f'/api/async/assets/{self.asset.id}/',
+                                               {'status': 'Out for Repair', 'revision': 1},
+                                               content_type='application/json')
+        self.assertEqual(response.json()['revision'], 2)
+
+
+@override_settings(AUDIT_LOG_BACKGROUND=False)
+class ScanIngestionTests(TestCase):
+    """
+    Tests batched, idempotent barcode scan ingestion keyed by asset tag
+    """
+    
+    def setUp(self):
+        self.addCleanup(audit_writer.flush)
+        self.laptop = Asset.objects.create(asset_type='physical', asset_tag='AT-100', serial_number='SCAN1',
+                                           location='Shelf 1')
+        self.monitor = Asset.objects.create(asset_type='physical', asset_tag='AT-200', serial_number='SCAN2')
+    
+    def _post(self, scans):
+        return self.client.post('/api/scans/', json.dumps({'scans': scans}), content_type='application/json')
+    
+    def test_scans_resolve_tags_and_move_assets(self):
+        """Test that scans are stored, matched by tag and move assets to the newest location"""
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self._post([
+                {'scanId': 'h1-1', 'assetTag': 'AT-100', 'action': 'check-out', 'location': 'Dock 2',
+                 'timestamp': '2026-10-01T09:00:00Z'},
+                {'scanId': 'h1-2', 'assetTag': 'AT-100', 'action': 'check_in', 'location': 'Shelf 9',
+                 'timestamp': '2026-10-01T10:00:00Z'},
+                {'scanId': 'h1-3', 'assetTag': 'AT-999', 'action': 'audit'},
+                {'scanId': 'h1-4', 'assetTag': 'AT-200', 'action': 'teleport'},
+            ]).json()
+        self.assertEqual((data['applied'], data['unknownTag'], data['invalid']), (2, 1, 1))
+        self.assertEqual(data['results'][0], {'scanId': 'h1-1', 'result': 'applied', 'assetId': self.laptop.id})
+        self.assertEqual(Asset.objects.get(id=self.laptop.id).location, 'Shelf 9')
+        self.assertEqual(ScanEvent.objects.count(), 3)
+        
+        audit_writer.flush()
+        changes = json.loads(AuditLog.objects.get(asset_id=self.laptop.id).details)['changes']
+        self.assertEqual(changes, {'location': ['Shelf 1', 'Shelf 9']})
+    
+    def test_resent_scans_are_not_applied_twice(self):
+        """Test idempotency on client scan ids, across requests and within one"""
+        scan = {'scanId': 'h2-1', 'assetTag': 'AT-200', 'action': 'check_in', 'location': 'Lab'}
+        self._post([scan])
+        Asset.objects.filter(id=self.monitor.id).update(location='Moved by hand')
+        
+        data = self._post([scan, scan]).json()
+        self.assertEqual([result['result'] for result in data['results']], ['duplicate', 'duplicate'])
+        self.assertEqual(Asset.objects.get(id=self.monitor.id).location, 'Moved by hand')
+        self.assertEqual(ScanEvent.objects.filter(scan_id='h2-1').count(), 1)
+    
+    def test_out_of_order_scans_do_not_move_back(self):
+        """Test that a scan older than one already stored is kept but not applied to the location"""
+        self._post([{'scanId': 'h3-2', 'assetTag': 'AT-100', 'action': 'check_in', 'location': 'Shelf 5',
+                     'timestamp': '2026-10-02T12:00:00Z'}])
+        self._post([{'scanId': 'h3-1', 'assetTag': 'AT-100', 'action': 'check_out', 'location': 'Dock 1',
+                     'timestamp': '2026-10-02T08:00:00Z'}])
+        self.assertEqual(Asset.objects.get(id=self.laptop.id).location, 'Shelf 5')
+        self.assertEqual(ScanEvent.objects.filter(asset=self.laptop).count(), 2)
+    
+    def test_statements_per_chunk_do_not_grow_with_scans(self):
+        """Test that a chunk costs the same number of statements however many scans it holds"""
+        tags = [f'BATCH-{i}' for i in range(60)]
+        Asset.objects.bulk_create([Asset(asset_type='physical', asset_tag=tag, serial_number=tag) for tag in tags])
+        
+        def batch(prefix, count):
+            return [{'scanId': f'{prefix}-{i}', 'assetTag': tags[i], 'action': 'audit', 'location': prefix}
+                    for i in range(count)]
+        with CaptureQueriesContext(connection) as few:
+            self._post(batch('few', 3))
+        with CaptureQueriesContext(connection) as many:
+            self._post(batch('many', 60))
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(Asset.objects.filter(location='many').count(), 60)
+    
+    def test_bad_batches_rejected(self):
+        """Test that a body without a scans list is a 400"""
+        response = self.client.post('/api/scans/', json.dumps([{'scanId': 'x'}]), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with self.settings(SCAN_MAX_PER_REQUEST=1):
+            self.assertEqual(self._post([{}, {}]).status_code, 400)
+
+
+class ColumnarListTests(TestCase):
+    """
+    Tests the columnar, dictionary-encoded page format of the asset list
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='colin', password='pass')
+        for i in range(30):
+            Asset.objects.create(
+                asset_type='physical',
+                manufacturer='Dell',
+                model='Latitude' if i % 2 else 'Precision',
+                serial_number=f'COL{i:03d}',
+                location='Stores',
+                assigned_to=self.user if i % 3 == 0 else None,
+                status='out_repair' if i % 5 == 0 else 'in_service'
+            )
+        for i in range(10):
+            Asset.objects.create(asset_type='digital', product_name='Office', version=f'{i % 2}.0',
+                                 license_key=f'KEY-{i}', renewal_date=date(2027, 1, 1) if i % 2 else None)
+    
+    @staticmethod
+    def _decode(page):
+        def column(values):
+            return values if isinstance(values, list) else [values['dictionary'][code] for code in values['codes']]
+        groups = {name: {key: column(values) for key, values in page[name].items()}
+                  for name in ('physical', 'digital')}
+        offsets = {'physical': 0, 'digital': 0}
+        common = {key: column(values) for key, values in page['columns'].items()}
+        assets = []
+        for i in range(page['length']):
+            asset = {key: values[i] for key, values in common.items()}
+            group = 'physical' if asset['type'] == 'physical' else 'digital'
+            asset.update({key: values[offsets[group]] for key, values in groups[group].items()})
+            offsets[group] += 1
+            assets.append(asset)
+        return assets
+    
+    def test_decodes_to_the_row_format(self):
+        """Test that decoding a columnar page gives exactly the assets of the default page, cursor included"""
+        rows = self.client.get('/api/assets/', {'limit': 25}).json()
+        columnar = self.client.get('/api/assets/', {'limit': 25, 'format': 'columnar'}).json()
+        self.assertEqual(columnar['format'], 'columnar')
+        self.assertEqual(self._decode(columnar), rows['assets'])
+        self.assertEqual(columnar['nextCursor'], rows['nextCursor'])
+        
+        rest = self.client.get('/api/assets/', {'format': 'columnar', 'cursor': columnar['nextCursor']}).json()
+        self.assertEqual(len(self._decode(rest)), 15)
+        self.assertIsNone(rest['nextCursor'])
+    
+    def test_low_cardinality_fields_are_dictionary_encoded(self):
+        """Test that repeated values are sent once and the page is smaller than the row format"""
+        columnar = self.client.get('/api/assets/', {'format': 'columnar'})
+        status = columnar.json()['columns']['status']
+        self.assertEqual(sorted(status['dictionary']), ['In Service', 'Out for Repair'])
+        self.assertEqual(len(status['codes']), 40)
+        self.assertIsInstance(columnar.json()['physical']['serialNumber'], list)
+        
+        rows = self.client.get('/api/assets/')
+        self.assertLess(len(columnar.content), len(rows.content) * 0.7)
+    
+    def test_async_list_matches(self):
+        """Test that the async list serves the same columnar page"""
+        expected = self.client.get('/api/assets/', {'format': 'columnar'}).json()
+        response = self.client.get('/api/async/assets/', {'format': 'columnar'})
+        self.assertEqual(response.json(), expected)
+
+
+class AssetListSearchTests(TestCase):
+    """
+    Tests the ?q= search filter the dashboard table pages through
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='pass')
+        Asset.objects.create(asset_type='physical', manufacturer='Dell', model='Latitude 5440',
+                             serial_number='QS-001', asset_tag='AT-7001', status='in_service')
+        Asset.objects.create(asset_type='physical', manufacturer='Dell', model='Precision',
+                             serial_number='QS-002', asset_tag='AT-7002', status='out_repair',
+                             assigned_to=self.user)
+        Asset.objects.create(asset_type='physical', manufacturer='Lenovo', model='ThinkPad',
+                             serial_number='QS-003', asset_tag='AT-8001', status='in_service')
+        Asset.objects.create(asset_type='digital', product_name='Photoshop', license_key='PS-1', version='25')
+    
+    def _ids(self, **params):
+        response = self.client.get('/api/assets/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(asset['id'] for asset in response.json()['assets'])
+    
+    def _id(self, **lookup):
+        return Asset.objects.get(**lookup).id
+    
+    def test_search_matches_tags_serials_and_names(self):
+        """Test that q matches word prefixes of asset tags, serial numbers, models and product names"""
+        dells = sorted([self._id(serial_number='QS-001'), self._id(serial_number='QS-002')])
+        self.assertEqual(self._ids(q='dell'), dells)
+        self.assertEqual(self._ids(q='AT-700'), dells)
+        self.assertEqual(self._ids(q='qs 003'), [self._id(serial_number='QS-003')])
+        self.assertEqual(self._ids(q='photo'), [self._id(license_key='PS-1')])
+        self.assertEqual(self._ids(q='nothing-like-it'), [])
+        self.assertEqual(len(self._ids(q='  ')), 4)
+    
+    def test_search_combines_with_filters_and_pages(self):
+        """Test that q narrows the status and assignee filters and pages with the usual cursor"""
+        self.assertEqual(self._ids(q='dell', status='Out for Repair'), [self._id(serial_number='QS-002')])
+        self.assertEqual(self._ids(q='dell', assigneeId=self.user.id), [self._id(serial_number='QS-002')])
+        
+        first = self.client.get('/api/assets/', {'q': 'dell', 'limit': 1, 'format': 'columnar'}).json()
+        rest = self.client.get('/api/assets/', {'q': 'dell', 'cursor': first['nextCursor']}).json()
+        self.assertEqual(first['length'], 1)
+        self.assertEqual(len(rest['assets']), 1)
+        self.assertIsNone(rest['nextCursor'])
+    
+    def test_search_sees_new_assets(self):
+        """Test that the search index and the cached list both pick up a new asset"""
+        self.assertEqual(self._ids(q='surface'), [])
+        asset = Asset.objects.create(asset_type='physical', manufacturer='Microsoft', model='Surface Pro',
+                                     serial_number='QS-004')
+        self.assertEqual(self._ids(q='surface'), [asset.id])
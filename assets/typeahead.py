@@ -0,0 +1,174 @@
+"""
+In-process prefix index for asset tag / serial number / license key typeahead.
+
+Keys are held in one sorted list of plain strings and looked up with
+``bisect``, so a prefix query is a binary search plus a short scan and
+never touches the database. The index is warmed when the server starts
+(see ``inventory_project/wsgi.py``) and kept current by the Asset
+save/delete receivers in ``assets/signals.py``.
+"""
+import bisect
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError
+
+
+logger = logging.getLogger(__name__)
+
+# One-letter codes stored in each entry for the field a key came from
+FIELD_CODES = {
+    't': 'assetTag',
+    's': 'serialNumber',
+    'l': 'licenseKey',
+}
+
+# Separates the key from its "<code><asset id>" suffix. It sorts before
+# every printable character, so all entries for a key stay contiguous.
+_SEP = '\x00'
+
+
+def normalize(value):
+    return (value or '').strip().upper()
+
+
+class PrefixIndex:
+    """
+    Sorted list of ``"<KEY>\\0<code><asset id>"`` entries.
+
+    A plain list of str is far smaller than a trie of dict nodes and
+    inserts are a single memmove, which is cheap at inventory sizes.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._by_asset = {}
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _make_entries(asset_id, asset_tag, serial_number, license_key):
+        entries = []
+        for code, value in (('t', asset_tag), ('s', serial_number), ('l', license_key)):
+            key = normalize(value)
+            if key:
+                entries.append(f'{key}{_SEP}{code}{asset_id}')
+        return tuple(entries)
+
+    def build(self, rows):
+        """Replace the index contents from (id, tag, serial, license) tuples"""
+        by_asset = {}
+        entries = []
+        for asset_id, asset_tag, serial_number, license_key in rows:
+            asset_entries = self._make_entries(asset_id, asset_tag, serial_number, license_key)
+            if asset_entries:
+                by_asset[asset_id] = asset_entries
+                entries.extend(asset_entries)
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._by_asset = by_asset
+            self.ready = True
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._by_asset = {}
+            self.ready = False
+
+    def _discard_locked(self, asset_id):
+        for entry in self._by_asset.pop(asset_id, ()):
+            position = bisect.bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def update(self, asset_id, asset_tag, serial_number, license_key):
+        """Insert or replace the keys for one asset"""
+        asset_entries = self._make_entries(asset_id, asset_tag, serial_number, license_key)
+        with self._lock:
+            if self._by_asset.get(asset_id) == asset_entries:
+                return
+            self._discard_locked(asset_id)
+            for entry in asset_entries:
+                bisect.insort(self._entries, entry)
+            if asset_entries:
+                self._by_asset[asset_id] = asset_entries
+
+    def update_many(self, rows):
+        """
+        Insert or replace keys for many assets at once.
+
+        Appends and re-sorts instead of inserting one entry at a time, which
+        keeps large batches (such as a bulk import) linear.
+        """
+        with self._lock:
+            added = []
+            for asset_id, asset_tag, serial_number, license_key in rows:
+                self._discard_locked(asset_id)
+                asset_entries = self._make_entries(asset_id, asset_tag, serial_number, license_key)
+                if asset_entries:
+                    self._by_asset[asset_id] = asset_entries
+                    added.extend(asset_entries)
+            added.sort()
+            self._entries.extend(added)
+            self._entries.sort()
+
+    def remove(self, asset_id):
+        with self._lock:
+            self._discard_locked(asset_id)
+
+    def lookup(self, prefix, limit=10):
+        """
+        Return up to ``limit`` matches for ``prefix`` in key order.
+
+        Each match is ``{'id', 'field', 'value'}``; an asset appears once
+        even if several of its keys share the prefix.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            position = bisect.bisect_left(entries, prefix)
+            while position < len(entries) and len(results) < limit:
+                entry = entries[position]
+                if not entry.startswith(prefix):
+                    break
+                key, suffix = entry.split(_SEP, 1)
+                asset_id = int(suffix[1:])
+                if asset_id not in seen:
+                    seen.add(asset_id)
+                    results.append({'id': asset_id, 'field': FIELD_CODES[suffix[0]], 'value': key})
+                position += 1
+        return results
+
+
+typeahead_index = PrefixIndex()
+
+
+def warm_index():
+    """Load every asset key into ``typeahead_index`` with one streaming query"""
+    from .models import Asset
+
+    rows = Asset.objects.values_list(
+        'id', 'asset_tag', 'serial_number', 'license_key').order_by().iterator(chunk_size=5000)
+    typeahead_index.build(rows)
+    return typeahead_index
+
+
+def warm_on_startup():
+    """Warm the index from a server entry point, unless disabled in settings"""
+    if not getattr(settings, 'TYPEAHEAD_WARM_ON_STARTUP', True):
+        return
+    try:
+        warm_index()
+    except DatabaseError:
+        # Tables not migrated yet; the first lookup will warm it instead
+        logger.warning('Could not warm typeahead index at startup', exc_info=True)
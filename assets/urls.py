@@ -1,12 +1,32 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'assets'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('api/login/', views.api_login, name='api_login'),
+    path('api/async/assets/', async_views.api_assets_list, name='async_api_assets_list'),
+    path('api/async/assets/stats/', async_views.api_assets_stats, name='async_api_assets_stats'),
+    path('api/async/assets/<int:asset_id>/', async_views.api_asset_detail, name='async_api_asset_detail'),
+    path('api/async/search/', async_views.api_search, name='async_api_search'),
     path('api/assets/', views.api_assets_list, name='api_assets_list'),
+    path('api/assets/bulk/', views.api_assets_bulk_update, name='api_assets_bulk_update'),
+    path('api/assets/changes/', views.api_assets_changes, name='api_assets_changes'),
+    path('api/assets/import/', views.api_assets_import, name='api_assets_import'),
+    path('api/assets/stats/', views.api_assets_stats, name='api_assets_stats'),
+    path('api/assets/typeahead/', views.api_typeahead, name='api_typeahead'),
     path('api/assets/<int:asset_id>/', views.api_asset_detail, name='api_asset_detail'),
+    path('api/audit/metrics/', views.api_audit_metrics, name='api_audit_metrics'),
+    path('api/cache/metrics/', views.api_cache_metrics, name='api_cache_metrics'),
+    path('api/export/<str:table>/', views.api_export, name='api_export'),
+    path('api/metrics/', views.api_request_metrics, name='api_request_metrics'),
+    path('api/profiles/', views.api_profiles, name='api_profiles'),
+    path('api/profiles/merged/', views.api_profiles_merged, name='api_profiles_merged'),
+    path('api/profiles/<str:name>/', views.api_profile_download, name='api_profile_download'),
+    path('api/reports/who-has-what/', views.api_report_who_has_what, name='api_report_who_has_what'),
+    path('api/reports/who-has-what/<int:user_id>/', views.api_report_user_assets, name='api_report_user_assets'),
+    path('api/scans/', views.api_scans, name='api_scans'),
+    path('api/search/', views.api_search, name='api_search'),
     path('api/users/', views.api_users_list, name='api_users_list'),
 ]
\ No newline at end of file
@@ -1,10 +1,29 @@
+from django.conf import settings
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+import io
 import json
+from . import bulk, exporting, importer, profiling, reports, scans, search, sync
+from .audit import audit_writer
+from .db import run_write
+from .metrics import JsonResponse, request_histograms
 from .models import Asset, UserProfile
+from .replica import read_from_replica
+from .response_cache import cached_response, response_cache
+from .revisions import RevisionConflict, parse_revision, update_asset
+from .singleflight import single_flight
+from .pagination import InvalidCursor, keyset_page, parse_page_size
+from .serializers import asset_list_values, asset_sync_values, serialize_asset_row, serialize_columnar
+from .stats import asset_stats
+from .streaming import iter_asset_dicts, json_array_stream, ndjson_stream
+from .typeahead import typeahead_index, warm_index
+from .versions import collection_etag
 
 
 def index(request):
@@ -46,43 +65,82 @@ def api_login(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
-@csrf_exempt  
+STATUS_FILTER_VALUES = {
+    'in service': 'in_service',
+    'out for repair': 'out_repair',
+    'decommissioned': 'decommissioned',
+}
+
+
+def filter_assets(queryset, params):
+    """Apply the optional ?q=, ?status=, ?type= and ?assigneeId= list filters"""
+    query = params.get('q', '').strip()
+    if query:
+        queryset = search.filter_matching_assets(queryset, query)
+
+    status = params.get('status')
+    if status and status != 'all':
+        queryset = queryset.filter(status=STATUS_FILTER_VALUES.get(status.lower(), status))
+
+    asset_type = params.get('type')
+    if asset_type:
+        queryset = queryset.filter(asset_type=asset_type)
+
+    assignee = params.get('assigneeId')
+    if assignee:
+        if assignee == 'none':
+            queryset = queryset.filter(assigned_to__isnull=True)
+        else:
+            queryset = queryset.filter(assigned_to_id=int(assignee))
+
+    return queryset
+
+
+# ?format= values that stream the full (filtered) list instead of one page
+STREAM_FORMATS = {
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+    'stream': (json_array_stream, 'application/json'),
+}
+
+
+# Asset rows carry the assignee's username, so both collections count.
+# no-cache lets browsers keep the body but revalidate it on every use.
+asset_list_etag = collection_etag('assets', 'users')
+revalidate = cache_control(private=True, no_cache=True)
+
+
+def is_stream_request(request):
+    return request.GET.get('format') in STREAM_FORMATS
+
+
+@csrf_exempt
+@read_from_replica
+@revalidate
+@condition(etag_func=asset_list_etag)
+@cached_response('assets', 'users', unless=is_stream_request)
 def api_assets_list(request):
-    """Get all assets or create new asset"""
+    """Get one page of assets or create new asset"""
     if request.method == 'GET':
-        assets = Asset.objects.all()
-        assets_data = []
-        
-        for asset in assets:
-            asset_dict = {
-                'id': asset.id,
-                'type': asset.asset_type,
-                'status': 'In Service' if asset.status == 'in_service' else 'Out for Repair',
-                'assigneeId': asset.assigned_to.id if asset.assigned_to else None,
-                'assigneeName': asset.assigned_to.username if asset.assigned_to else 'Unassigned',
-                'dateInService': str(asset.date_in_service),
-                'repairNotes': asset.repair_notes,
-            }
-            
-            if asset.asset_type == 'physical':
-                asset_dict.update({
-                    'manufacturer': asset.manufacturer,
-                    'model': asset.model,
-                    'serialNumber': asset.serial_number or '',
-                    'assetTag': asset.asset_tag,
-                    'location': asset.location,
-                })
-            else:
-                asset_dict.update({
-                    'productName': asset.product_name,
-                    'licenseKey': asset.license_key,
-                    'version': asset.version,
-                    'renewalDate': str(asset.renewal_date) if asset.renewal_date else '',
-                })
-            
-            assets_data.append(asset_dict)
-        
-        return JsonResponse({'assets': assets_data})
+        if is_stream_request(request):
+            try:
+                queryset = filter_assets(Asset.objects.all(), request.GET)
+                assets = iter_asset_dicts(queryset, request.GET.get('cursor'))
+            except (InvalidCursor, ValueError) as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+            encode, content_type = STREAM_FORMATS[request.GET['format']]
+            return StreamingHttpResponse(encode(assets), content_type=content_type)
+
+        try:
+            limit = parse_page_size(request.GET.get('limit'))
+            queryset = filter_assets(Asset.objects.all(), request.GET)
+            rows, next_cursor = keyset_page(asset_list_values(queryset), request.GET.get('cursor'), limit)
+        except (InvalidCursor, ValueError) as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        if request.GET.get('format') == 'columnar':
+            return JsonResponse({**serialize_columnar(rows), 'nextCursor': next_cursor})
+        assets_data = [serialize_asset_row(row) for row in rows]
+        return JsonResponse({'assets': assets_data, 'nextCursor': next_cursor})
     
     elif request.method == 'POST':
         try:
@@ -119,7 +177,7 @@ def api_assets_list(request):
                     'renewal_date': data.get('renewalDate') if data.get('renewalDate') else None,
                 })
             
-            asset = Asset.objects.create(**asset_data)
+            asset = run_write(Asset.objects.create, **asset_data)
             
             return JsonResponse({'success': True, 'asset_id': asset.id})
         except Exception as e:
@@ -128,31 +186,135 @@ def api_assets_list(request):
     return JsonResponse({'success': False})
 
 
+def api_assets_changes(request):
+    """Assets changed and deleted since a sync token"""
+    since = request.GET.get('since')
+    if not since:
+        # Fetch a token before the initial full load, then poll with it
+        return JsonResponse({'changed': [], 'deleted': [], 'token': sync.current_token(), 'hasMore': False})
+
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=500)
+        rows, deleted, token, has_more = sync.changes_since(since, asset_sync_values(Asset.objects.all()), limit)
+    except (InvalidCursor, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'changed': [serialize_asset_row(row) for row in rows],
+        'deleted': deleted,
+        'token': token,
+        'hasMore': has_more,
+    })
+
+
+@read_from_replica
+def api_assets_stats(request):
+    """Dashboard totals from the maintained counter table"""
+    return JsonResponse(asset_stats())
+
+
+@csrf_exempt
+def api_assets_import(request):
+    """Bulk import assets from an uploaded CSV or JSON Lines file"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+    upload = request.FILES.get('file')
+    if upload is not None:
+        raw = upload.file
+        filename = upload.name
+    else:
+        raw = io.BytesIO(request.body)
+        filename = None
+
+    input_format = request.GET.get('format') or importer.detect_format(filename)
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        result = importer.import_assets(
+            stream,
+            input_format=input_format,
+            workers=getattr(settings, 'ASSET_IMPORT_WORKERS', 1),
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    finally:
+        stream.detach()
+
+    return JsonResponse({'success': True, **result})
+
+
+# Keys of the bulk endpoint's "filter", as in the list's query string
+BULK_FILTER_KEYS = {'status', 'type', 'assigneeId'}
+
+
+@csrf_exempt
+def api_assets_bulk_update(request):
+    """Apply one status, assignee or repair-note change to many assets at once"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        values = bulk.parse_changes(data.get('changes'))
+        if 'ids' in data:
+            results = run_write(bulk.bulk_update_assets, values, ids=bulk.parse_ids(data['ids']))
+        elif isinstance(data.get('filter'), dict) and data['filter']:
+            unknown = set(data['filter']) - BULK_FILTER_KEYS
+            if unknown:
+                raise ValueError(f"Unknown filter keys: {', '.join(sorted(unknown))}")
+            params = {key: str(value) for key, value in data['filter'].items()}
+            queryset = filter_assets(Asset.objects.all(), params)
+            results = run_write(bulk.bulk_update_assets, values, queryset=queryset)
+        else:
+            raise ValueError('Give a list of ids or a non-empty filter')
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    labels = {'updated': 'updated', 'unchanged': 'unchanged', 'not_found': 'notFound'}
+    counts = {label: 0 for label in labels.values()}
+    for _, result in results:
+        counts[labels[result]] += 1
+    return JsonResponse({
+        'success': True,
+        **counts,
+        'results': [{'id': asset_id, 'result': labels[result]} for asset_id, result in results],
+    })
+
+
+def asset_update_values(data):
+    """Model field values for a PUT /api/assets/<id>/ body"""
+    values = {}
+    if 'status' in data:
+        values['status'] = 'in_service' if data['status'] == 'In Service' else 'out_repair'
+    if 'repairNotes' in data:
+        values['repair_notes'] = data['repairNotes']
+    return values
+
+
 @csrf_exempt
 def api_asset_detail(request, asset_id):
     """Update or delete specific asset"""
     try:
-        asset = Asset.objects.get(id=asset_id)
-        
         if request.method == 'PUT':
             data = json.loads(request.body)
+            try:
+                revision = parse_revision(data.get('revision'))
+            except ValueError as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
             
-            # Update status
-            if 'status' in data:
-                status_value = data['status']
-                asset.status = 'in_service' if status_value == 'In Service' else 'out_repair'
-            
-            # Update repair notes
-            if 'repairNotes' in data:
-                asset.repair_notes = data['repairNotes']
-            
-            asset.save()
-            return JsonResponse({'success': True})
+            # One revision-checked UPDATE that skips unchanged rows (see revisions.py)
+            new_revision = run_write(update_asset, asset_id, asset_update_values(data), revision)
+            return JsonResponse({'success': True, 'revision': new_revision})
         
         elif request.method == 'DELETE':
-            asset.delete()
+            asset = Asset.objects.get(id=asset_id)
+            run_write(asset.delete)
             return JsonResponse({'success': True})
         
+    except RevisionConflict as e:
+        return JsonResponse({'success': False, 'error': str(e), 'revision': e.current}, status=409)
     except Asset.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Asset not found'})
     except Exception as e:
@@ -162,6 +324,171 @@ def api_asset_detail(request, asset_id):
 
 
 @csrf_exempt
+def api_scans(request):
+    """Ingest a batch of barcode scans from warehouse handhelds"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+    try:
+        data = json.loads(request.body)
+        batch = data.get('scans') if isinstance(data, dict) else None
+        if not isinstance(batch, list):
+            raise ValueError('Expected {"scans": [...]}')
+        limit = getattr(settings, 'SCAN_MAX_PER_REQUEST', 10000)
+        if len(batch) > limit:
+            raise ValueError(f'At most {limit} scans per request')
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    results = scans.ingest_scans(batch)
+    counts = {outcome: 0 for outcome in ('applied', 'duplicate', 'unknownTag', 'ambiguousTag', 'invalid')}
+    for result in results:
+        counts[result['result']] += 1
+    return JsonResponse({'success': True, **counts, 'results': results})
+
+
+@read_from_replica
+def api_export(request, table):
+    """Stream one table as a CSV or NDJSON download, optionally gzipped"""
+    output_format = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true')
+    try:
+        blocks = exporting.export_stream(table, output_format, compress)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    content_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    if compress:
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(blocks, content_type=content_type)
+    filename = exporting.export_filename(table, output_format, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def api_typeahead(request):
+    """Prefix matches on asset tag, serial number and license key"""
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=10, maximum=50)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if not typeahead_index.ready:
+        warm_index()
+    return JsonResponse({'matches': typeahead_index.lookup(request.GET.get('q', ''), limit)})
+
+
+@read_from_replica
+def api_search(request):
+    """Ranked full-text search over assets, repair notes and support tickets"""
+    query = request.GET.get('q', '')
+    kind = request.GET.get('kind') or None
+    if kind and kind not in search.KINDS:
+        return JsonResponse({'success': False, 'error': 'kind must be asset or ticket'}, status=400)
+
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=20, maximum=100)
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    hits, has_more = search.search(query, kind=kind, limit=limit, offset=(page - 1) * limit)
+    return JsonResponse({'results': hits, 'page': page, 'hasMore': has_more})
+
+
+@read_from_replica
+@revalidate
+@condition(etag_func=asset_list_etag)
+@cached_response('assets', 'users')
+def api_report_who_has_what(request):
+    """One page of users with their asset counts and newest assets"""
+    try:
+        limit = parse_page_size(request.GET.get('limit'), default=reports.DEFAULT_USERS_PER_PAGE,
+                                maximum=reports.MAX_USERS_PER_PAGE)
+        after = request.GET.get('cursor')
+        after = int(after) if after else None
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    entries, next_after = reports.who_has_what(after=after, limit=limit, role=request.GET.get('role'))
+    return JsonResponse({
+        'users': entries,
+        'nextCursor': str(next_after) if next_after is not None else None,
+    })
+
+
+@read_from_replica
+@revalidate
+@condition(etag_func=asset_list_etag)
+@cached_response('assets', 'users')
+def api_report_user_assets(request, user_id):
+    """Drill-down: every asset assigned to one user, one keyset page at a time"""
+    user = User.objects.filter(id=user_id).values('id', 'username', 'first_name', 'last_name').first()
+    if user is None:
+        return JsonResponse({'success': False, 'error': 'User not found'}, status=404)
+
+    try:
+        limit = parse_page_size(request.GET.get('limit'))
+        queryset = Asset.objects.filter(assigned_to_id=user_id)
+        rows, next_cursor = keyset_page(asset_list_values(queryset), request.GET.get('cursor'), limit)
+    except (InvalidCursor, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'user': {'userId': user['id'], 'username': user['username'], 'name': reports.display_name(user)},
+        'assets': [serialize_asset_row(row) for row in rows],
+        'nextCursor': next_cursor,
+    })
+
+
+def api_cache_metrics(request):
+    """Hit/miss counters for the versioned response cache and request coalescing"""
+    return JsonResponse({**response_cache.metrics(), 'single_flight': single_flight.metrics()})
+
+
+def api_audit_metrics(request):
+    """Queue depth and flush statistics for the buffered audit writer"""
+    return JsonResponse(audit_writer.metrics())
+
+
+def api_request_metrics(request):
+    """Per-endpoint latency histograms and SQL counters in Prometheus text format"""
+    return HttpResponse(request_histograms.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def api_profiles(request):
+    """Saved request profiles, newest first (admins only)"""
+    return JsonResponse({'profiles': profiling.list_profiles(request.GET.get('endpoint'))})
+
+
+@staff_member_required
+def api_profiles_merged(request):
+    """The saved profiles of one endpoint (or all) added up into a single folded-stack download"""
+    endpoint = request.GET.get('endpoint')
+    names = [profile['name'] for profile in profiling.list_profiles(endpoint)]
+    if not names:
+        raise Http404('No saved profiles')
+    response = HttpResponse(profiling.merge_profiles(names), content_type='text/plain; charset=utf-8')
+    filename = f"{endpoint or 'all'}-merged{profiling.PROFILE_SUFFIX}".replace(':', '.')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+def api_profile_download(request, name):
+    """One saved profile in the collapsed format read by flamegraph.pl and speedscope"""
+    try:
+        path = profiling.profile_path(name)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name,
+                            content_type='text/plain; charset=utf-8')
+    except (ValueError, FileNotFoundError):
+        raise Http404('Unknown profile')
+
+
+@csrf_exempt
+@revalidate
+@condition(etag_func=collection_etag('users'))
 def api_users_list(request):
     """Get all users for assignment dropdown"""
     # Return demo users for now
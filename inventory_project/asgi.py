@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_project.settings')
 
 application = get_asgi_application()
+
+# Build in-memory lookup structures and start replica syncing before the first request arrives
+from assets.typeahead import warm_on_startup  # noqa: E402
+from assets.replica import start_replica_sync  # noqa: E402
+
+warm_on_startup()
+start_replica_sync()
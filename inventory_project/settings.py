@@ -41,11 +41,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'assets.middleware.RequestMetricsMiddleware',
+    'assets.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'assets.middleware.AuditUserMiddleware',
+    'assets.middleware.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,9 +81,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Keep connections open between requests instead of reconnecting
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for the write lock before "database is locked"
+            'timeout': 5,
+            # Take the write lock when a transaction starts, so two
+            # transactions never deadlock upgrading from read to write
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Local copy of the primary for list, report, stats, export and search
+    # reads, refreshed with SQLite's backup API (see assets/replica.py)
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        # Connections are reopened when a sync swaps in a new file
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['assets.replica.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,3 +146,77 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Inventory tracker
+
+# Load the asset tag / serial number typeahead index when the server starts
+TYPEAHEAD_WARM_ON_STARTUP = True
+
+# Parser processes used by POST /api/assets/import/ (1 = parse in the request thread)
+ASSET_IMPORT_WORKERS = 1
+
+# Largest number of assets POST /api/assets/bulk/ changes in one request
+BULK_UPDATE_MAX_ASSETS = 5000
+
+# POST /api/scans/ applies scans this many per write transaction
+SCAN_BATCH_SIZE = 500
+SCAN_MAX_PER_REQUEST = 10000
+
+# Audit log entries are buffered and written in batches by a background thread
+AUDIT_LOG_BACKGROUND = True
+AUDIT_LOG_BATCH_SIZE = 500
+AUDIT_LOG_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_LOG_MAX_ATTEMPTS = 5  # flushes an entry may fail before it is dropped
+
+# Read endpoints cache their serialized responses, keyed by data generation.
+# Any Django backend works; a FileBasedCache shares entries between workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'inventory',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+RESPONSE_CACHE_LOCAL_ENTRIES = 256  # in-process LRU in front of the backend (0 = off)
+
+# Concurrent identical cache misses wait for one computation instead of each
+# querying the database. Set a directory to also coalesce across worker processes.
+SINGLE_FLIGHT_ENABLED = True
+SINGLE_FLIGHT_TIMEOUT = 30.0  # seconds a follower waits before computing itself
+SINGLE_FLIGHT_LOCK_DIR = None
+
+# Applied to every new SQLite connection (see assets/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB
+    'temp_store': 'memory',
+}
+# Retries of a write that still finds the database locked after the timeout
+SQLITE_WRITE_RETRIES = 5
+# Run API writes one at a time on a dedicated writer thread
+SQLITE_WRITE_QUEUE = False
+
+# Read-only endpoints use this alias while its snapshot is at most
+# REPLICA_MAX_STALENESS seconds old, and the primary otherwise
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_MAX_STALENESS = 60  # seconds
+# Re-copy the primary this often from a background thread in each server
+# process; None to sync externally with `manage.py sync_replica --interval`
+REPLICA_SYNC_INTERVAL = 30  # seconds
+
+# Server-Timing headers and per-endpoint histograms at /api/metrics/
+REQUEST_METRICS_ENABLED = True
+# Requests at least this slow are logged with their slowest queries (None = off)
+REQUEST_SLOW_MS = 500
+
+# On-demand request profiler, switched on in the admin. Profiles are saved
+# here as collapsed stacks for flame graphs (None = profiler unavailable)
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_SWITCH_TTL = 2.0  # seconds between checks for a changed switch
+PROFILER_MAX_CONCURRENT = 4  # requests profiled at once per process
+PROFILER_MAX_FILES = 500  # oldest profiles are deleted beyond this